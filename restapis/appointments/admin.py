@@ -1,3 +1,17 @@
 from django.contrib import admin
 from .models import Appointment
-admin.site.register(Appointment)
\ No newline at end of file
+
+
+@admin.register(Appointment)
+class AppointmentAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the `Appointment` model.
+
+    `Appointment.__str__` reads both usernames, so the change list joins the
+    users instead of loading them per row, and the forms use raw ID inputs
+    rather than a select listing every user.
+    """
+    list_display = ('__str__', 'scheduled_at', 'created_at')
+    list_select_related = ('doctor', 'patient')
+    raw_id_fields = ('doctor', 'patient')
+    date_hierarchy = 'scheduled_at'
@@ -0,0 +1,226 @@
+from datetime import timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_time
+from restapis.utils import batches, percentile
+from .scheduling import appointment_duration, candidate_slots
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HOURS_PER_WEEK = 7 * 24
+
+
+class UtilizationReport:
+    """
+    Doctor x hour-of-week utilization and weekly trends over a date range.
+
+    Appointments are read as `(doctor_id, scheduled_at)` columns in chunks of
+    `chunk_size` and folded into fixed-size counters, a doctors x 168 matrix
+    and one counter per week, so memory depends on the number of doctors and
+    weeks, never on the number of appointments. `scheduled_at` is read as the
+    database's text form, which skips building a datetime per row. Only the
+    distinct minutes are parsed and converted to local time, since bookings
+    share few start times. With NumPy each chunk is counted with `unique`
+    and `bincount`. Without it, the same arithmetic runs in plain Python with
+    identical results.
+
+    Utilization is booked appointments over the working-hour slots
+    (`APPOINTMENT_WORKING_HOURS`) that fall in each hour of the week during the range.
+    """
+
+    def __init__(self, doctors, start_date, end_date, rolling_weeks=4, chunk_size=None, use_numpy=True):
+        """
+        Args:
+            doctors (list): `(id, username, specialization)` of the doctors to report on.
+            start_date (date): First day of the range.
+            end_date (date): Last day of the range, inclusive.
+            rolling_weeks (int): Window of the weekly rolling average.
+            chunk_size (int, optional): Rows read at a time. Defaults to `ANALYTICS_CHUNK_SIZE`.
+            use_numpy (bool): Use NumPy when it is installed.
+        """
+        self.doctors = list(doctors)
+        self.doctor_index = {doctor[0]: index for index, doctor in enumerate(self.doctors)}
+        self.start_date = start_date
+        self.end_date = end_date
+        self.week_start = start_date - timedelta(days=start_date.weekday())
+        self.weeks = (end_date - self.week_start).days // 7 + 1
+        self.rolling_weeks = rolling_weeks
+        self.chunk_size = chunk_size or getattr(settings, 'ANALYTICS_CHUNK_SIZE', 50000)
+        self.np = np if use_numpy else None
+        self.tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        self.buckets = {}
+        if self.np is not None:
+            self.counts = self.np.zeros((len(self.doctors), HOURS_PER_WEEK), dtype=self.np.int64)
+            self.weekly = self.np.zeros(self.weeks, dtype=self.np.int64)
+        else:
+            self.counts = [[0] * HOURS_PER_WEEK for _ in self.doctors]
+            self.weekly = [0] * self.weeks
+        self.capacity = self.working_capacity()
+
+    def working_capacity(self):
+        """
+        Return the number of working-hour slots in the range per hour of the week.
+        """
+        work_start, work_end = (
+            parse_time(value) for value in getattr(settings, 'APPOINTMENT_WORKING_HOURS', ('09:00', '17:00'))
+        )
+        slots = candidate_slots(self.start_date, self.start_date, appointment_duration(), work_start, work_end)
+        hours = [(timezone.localtime(slot) if settings.USE_TZ else slot).hour for slot in slots]
+        capacity = [0] * HOURS_PER_WEEK
+        for days in range((self.end_date - self.start_date).days + 1):
+            offset = (self.start_date + timedelta(days=days)).weekday() * 24
+            for hour in hours:
+                capacity[offset + hour] += 1
+        return capacity
+
+    def load(self, queryset):
+        """
+        Count the appointments of `queryset` that fall in the range.
+        """
+        rows = (
+            queryset.scheduled_between(self.start_date, self.end_date)
+            .annotate(scheduled_text=Cast('scheduled_at', CharField()))
+            .values_list('doctor_id', 'scheduled_text')
+            .iterator(chunk_size=self.chunk_size)
+        )
+        for chunk in batches(rows, self.chunk_size):
+            self.add_chunk(chunk)
+        return self
+
+    def bucket(self, minute):
+        """
+        Return `(hour_of_week, week)` of the local time of a `YYYY-MM-DD HH:MM` minute.
+
+        `minute` is the start of `scheduled_at` in its database text form, in the
+        connection's time zone, which is UTC when `USE_TZ` is enabled. Results
+        are cached, as bookings share few distinct minutes.
+
+        Raises:
+            ValueError: If the database returned a format that is not ISO 8601.
+        """
+        bucket = self.buckets.get(minute)
+        if bucket is None:
+            value = parse_datetime(minute)
+            if value is None:
+                raise ValueError(f'Cannot parse {minute!r} as a datetime.')
+            if settings.USE_TZ:
+                value = value.replace(tzinfo=dt_timezone.utc).astimezone(self.tz)
+            bucket = self.buckets[minute] = (
+                value.weekday() * 24 + value.hour,
+                (value.date() - self.week_start).days // 7,
+            )
+        return bucket
+
+    def add_chunk(self, rows):
+        """
+        Add `(doctor_id, scheduled_text)` rows to the counters. Doctors not in the report are skipped.
+        """
+        doctor_index = self.doctor_index
+        if self.np is None:
+            counts, weekly, bucket = self.counts, self.weekly, self.bucket
+            for doctor_id, text in rows:
+                index = doctor_index.get(doctor_id)
+                if index is None:
+                    continue
+                hour_of_week, week = bucket(text[:16])
+                counts[index][hour_of_week] += 1
+                weekly[week] += 1
+            return
+
+        np = self.np
+        doctors = np.fromiter((doctor_index.get(doctor_id, -1) for doctor_id, _ in rows), dtype=np.int64, count=len(rows))
+        minutes = np.array([text[:16] for _, text in rows])
+        known = doctors >= 0
+        doctors, minutes = doctors[known], minutes[known]
+        unique, inverse = np.unique(minutes, return_inverse=True)
+        buckets = np.array([self.bucket(str(minute)) for minute in unique], dtype=np.int64).reshape(-1, 2)
+        hours_of_week, weeks = buckets[inverse, 0], buckets[inverse, 1]
+        self.counts += np.bincount(
+            doctors * HOURS_PER_WEEK + hours_of_week, minlength=self.counts.size
+        ).reshape(self.counts.shape)
+        self.weekly += np.bincount(weeks, minlength=self.weeks)
+
+    def as_dict(self):
+        """
+        Return the report: per-doctor and overall heatmaps, utilization percentiles and weekly trends.
+
+        Heatmaps are 7 rows (Monday first) of 24 hourly utilizations, None for hours
+        without working slots. Utilizations are fractions rounded to 4 decimals.
+        """
+        capacity = self.capacity
+        total_capacity = sum(capacity)
+        if self.np is not None:
+            counts = self.counts.tolist()
+            weekly = self.weekly.tolist()
+            booked = self.counts.sum(axis=1).tolist()
+            overall = self.counts.sum(axis=0).tolist()
+        else:
+            counts = self.counts
+            weekly = self.weekly
+            booked = [sum(row) for row in counts]
+            overall = [sum(column) for column in zip(*counts)] if counts else [0] * HOURS_PER_WEEK
+
+        doctors = []
+        for (pk, username, specialization), row, appointments in zip(self.doctors, counts, booked):
+            doctors.append({
+                'doctor': pk,
+                'username': username,
+                'specialization': specialization,
+                'appointments': appointments,
+                'utilization': self.ratio(appointments, total_capacity),
+                'heatmap': self.heatmap(row, capacity),
+            })
+        utilizations = [doctor['utilization'] for doctor in doctors if doctor['utilization'] is not None]
+        return {
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'slots_per_doctor': total_capacity,
+            'appointments': sum(booked),
+            'heatmap': self.heatmap(overall, [slots * len(doctors) for slots in capacity]),
+            'percentiles': {
+                name: None if value is None else round(value, 4)
+                for name, value in (
+                    ('p50', percentile(utilizations, 0.5)),
+                    ('p90', percentile(utilizations, 0.9)),
+                    ('p99', percentile(utilizations, 0.99)),
+                )
+            },
+            'weekly': self.weekly_trend(weekly),
+            'doctors': doctors,
+        }
+
+    def ratio(self, booked, slots):
+        return round(booked / slots, 4) if slots else None
+
+    def heatmap(self, row, capacity):
+        cells = [self.ratio(booked, slots) for booked, slots in zip(row, capacity)]
+        return [cells[day * 24:(day + 1) * 24] for day in range(7)]
+
+    def weekly_trend(self, weekly):
+        """
+        Return per-week appointment counts with the change from the previous week
+        and the rolling average over `rolling_weeks`, once that many weeks are in.
+        """
+        window = self.rolling_weeks
+        if self.np is not None and len(weekly) >= window:
+            sums = self.np.convolve(self.np.asarray(weekly, dtype=self.np.float64), self.np.ones(window), 'valid')
+            averages = [None] * (window - 1) + (sums / window).tolist()
+        else:
+            averages = [
+                sum(weekly[index + 1 - window:index + 1]) / window if index + 1 >= window else None
+                for index in range(len(weekly))
+            ]
+        return [
+            {
+                'week_start': (self.week_start + timedelta(weeks=index)).isoformat(),
+                'appointments': count,
+                'change': None if index == 0 else count - weekly[index - 1],
+                'rolling_average': None if average is None else round(average, 2),
+            }
+            for index, (count, average) in enumerate(zip(weekly, averages))
+        ]
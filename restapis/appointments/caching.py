@@ -0,0 +1,229 @@
+import hashlib
+import threading
+import uuid
+from datetime import date, timedelta
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+
+
+YEAR_SPANS = (1000, 100, 10, 1)
+
+
+def _month_end(day):
+    if day.month == 12:
+        return date(day.year, 12, 31)
+    return date(day.year, day.month + 1, 1) - timedelta(days=1)
+
+
+def date_buckets(day):
+    """
+    Return the generation keys of every bucket containing `day`.
+    """
+    return [f'd:{day.isoformat()}', f'm:{day.year}-{day.month:02d}'] + [
+        f'y{span}:{day.year // span}' for span in YEAR_SPANS
+    ]
+
+
+def covering_buckets(start, end):
+    """
+    Return the generation keys whose buckets exactly cover `start`..`end` inclusive.
+
+    Aligned millennia, centuries, decades, years and months in the range are
+    represented by one bucket each, so even an open range ending at `date.max`
+    needs at most about a hundred keys instead of one per day.
+    """
+    buckets = []
+    day = start
+    while day <= end:
+        bucket = None
+        if day.month == 1 and day.day == 1:
+            for span in YEAR_SPANS:
+                last_year = day.year + span - 1
+                if day.year % span == 0 and last_year <= date.max.year and date(last_year, 12, 31) <= end:
+                    bucket, last = f'y{span}:{day.year // span}', date(last_year, 12, 31)
+                    break
+        if bucket is None and day.day == 1 and _month_end(day) <= end:
+            bucket, last = f'm:{day.year}-{day.month:02d}', _month_end(day)
+        if bucket is None:
+            bucket, last = f'd:{day.isoformat()}', day
+        buckets.append(bucket)
+        if last == date.max:
+            break
+        day = last + timedelta(days=1)
+    return buckets
+
+
+class ResponseCache:
+    """
+    Caches rendered data for the summary and admin list endpoints.
+
+    Every entry remembers the range of dates its data depends on and a snapshot
+    of the generations covering that range. Writing an appointment bumps the
+    generations of every bucket containing the dates it touches, so only entries
+    whose range includes those dates stop validating; the rest of the cache is
+    left alone. Open ranges run to `date.min` or `date.max`. Entries filtered by doctor name also depend on a `users`
+    generation bumped when users change.
+    """
+
+    def __init__(self, alias='default', timeout=300, key_prefix='appointments'):
+        """
+        Args:
+            alias (str): The `CACHES` alias to store entries in.
+            timeout (int): Seconds an entry lives in the backend.
+            key_prefix (str): Prefix of every key written by this cache.
+        """
+        self.alias = alias
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, *parts):
+        """
+        Build an entry key from normalized request parts.
+        """
+        digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+        return f'{self.key_prefix}:entry:{digest}'
+
+    def generation_key(self, bucket):
+        return f'{self.key_prefix}:gen:{bucket}'
+
+    def snapshot(self, start, end, users=False):
+        """
+        Return the current generations covering `start`..`end`.
+        """
+        keys = [self.generation_key(bucket) for bucket in covering_buckets(start, end)]
+        if users:
+            keys.append(self.generation_key('users'))
+        values = self.cache.get_many(keys)
+        for key in keys:
+            if key not in values:
+                # A generation that was never bumped or got evicted starts afresh,
+                # so entries recorded against its previous value stop validating.
+                self.cache.add(key, uuid.uuid4().hex, None)
+                values[key] = self.cache.get(key)
+        return tuple(values[key] for key in keys)
+
+    def get(self, key, start, end, users=False):
+        """
+        Look up `key` before building its data.
+
+        Args:
+            key (str): The entry key.
+            start (date): First date the data about to be built may depend on.
+            end (date): Last date the data about to be built may depend on.
+            users (bool): Whether the data also depends on the `users` generation.
+
+        Returns:
+            tuple: `(data, None)` if the entry is still valid, else `(None, snapshot)`,
+            where `snapshot` records the generations covering `start`..`end` before
+            the data is read. Pass it to `set()` with the data.
+        """
+        entry = self.cache.get(key)
+        current = None
+        if entry is not None:
+            entry_start, entry_end, entry_snapshot, data = entry
+            current = self.snapshot(entry_start, entry_end, users)
+            if entry_snapshot == current:
+                self._count(hit=True)
+                return data, None
+            if (entry_start, entry_end) != (start, end):
+                current = None
+        self._count(hit=False)
+        return None, (start, end, users, current or self.snapshot(start, end, users))
+
+    def set(self, key, start, end, data, snapshot):
+        """
+        Store `data`, which depends on the dates `start`..`end`, under `key`.
+
+        `snapshot` comes from the `get()` miss that preceded the read, so a write
+        committed while the data was being built leaves the entry already invalid.
+        When `start`..`end` is narrower than the snapshot's range, as for a list
+        page whose bounds are only known once it is read, the entry records the
+        generations of its own range, and is not stored at all if the snapshot's
+        range changed in the meantime.
+
+        Data read from a replica may predate writes that already bumped the
+        generations, so it is kept no longer than `REPLICA_STICKY_SECONDS`, the
+        replication lag the deployment is configured to tolerate.
+        """
+        read_start, read_end, users, generations = snapshot
+        if (start, end) != (read_start, read_end):
+            narrowed = self.snapshot(start, end, users)
+            if self.snapshot(read_start, read_end, users) != generations:
+                return
+            generations = narrowed
+        timeout = self.timeout
+        if router.db_for_read(apps.get_model('appointments', 'Appointment')) != DEFAULT_DB_ALIAS:
+            timeout = min(timeout, getattr(settings, 'REPLICA_STICKY_SECONDS', 5))
+        self.cache.set(key, (start, end, generations, data), timeout)
+
+    def invalidate_dates(self, dates, using=None):
+        """
+        Bump the generations of every bucket containing a date in `dates`.
+
+        Inside a transaction the generations are bumped again once it commits:
+        a reader that takes its snapshot after the first bump but reads before
+        the commit would otherwise cache the old rows under the new generations.
+        """
+        buckets = set()
+        for day in dates:
+            if day is None:
+                continue
+            buckets.update(date_buckets(day))
+        self.invalidate_buckets(buckets, using)
+
+    def invalidate_buckets(self, buckets, using=None):
+        """
+        Bump the generations of `buckets` now and, inside a transaction, on commit.
+        """
+        buckets = list(buckets)
+        self._bump_all(buckets)
+        if transaction.get_connection(using).in_atomic_block:
+            transaction.on_commit(lambda: self._bump_all(buckets), using=using)
+
+    def invalidate_users(self, using=None):
+        """
+        Bump the generation shared by every entry filtered by doctor name.
+        """
+        self.invalidate_buckets(['users'], using)
+
+    def stats(self):
+        """
+        Return the hit/miss counters and hit ratio of this process.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def _bump_all(self, buckets):
+        self.cache.set_many({self.generation_key(bucket): uuid.uuid4().hex for bucket in buckets}, None)
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+response_cache = ResponseCache(
+    alias=getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default'),
+    timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300),
+)
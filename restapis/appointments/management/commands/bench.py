@@ -0,0 +1,268 @@
+import itertools
+import json
+import random
+import resource
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Max, Min
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from restapis.routers import replica_aliases
+from restapis.utils import percentile
+from appointments.models import Appointment
+from appointments.scheduling import appointment_duration
+from appointments.seeding import DataSeeder
+from users.models import CustomUser
+
+BENCH_PREFIX = 'bench_'
+BENCH_PASSWORD = 'bench-password'
+ENDPOINTS = ('login', 'list', 'detail', 'summary', 'create', 'user_list')
+
+
+def peak_rss_mib():
+    # `ru_maxrss` is in KiB on Linux.
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class Command(BaseCommand):
+    """
+    Load-test every main API endpoint against a seeded dataset and report comparable JSON.
+    """
+    help = (
+        'Seed a benchmark dataset (kept between runs unless --reseed), drive the login, list, '
+        'detail, summary, create and user list endpoints with concurrent workers through the '
+        'test client or a running server, and report latency percentiles, throughput, query '
+        'counts and peak RSS as JSON. With --baseline, fail on regressions against a previous report.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=100, help='Doctors in the dataset.')
+        parser.add_argument('--patients', type=int, default=1000, help='Patients in the dataset.')
+        parser.add_argument('--appointments', type=int, default=10000, help='Appointments in the dataset.')
+        parser.add_argument('--reseed', action='store_true', help='Drop and recreate the benchmark dataset.')
+        parser.add_argument('--cleanup', action='store_true', help='Drop the benchmark dataset after the run.')
+        parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS))
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent workers.')
+        parser.add_argument('--server', default=None, help='Base URL of a running server, e.g. http://127.0.0.1:8000.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the request mix.')
+        parser.add_argument('--output', default=None, help='Also write the report to this file.')
+        parser.add_argument('--baseline', default=None, help='Previous report to compare against.')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative p95/throughput regression.')
+
+    def handle(self, *args, **options):
+        if options['reseed']:
+            self.drop_dataset()
+        dataset = self.ensure_dataset(options)
+        context = self.build_context(dataset)
+
+        report = {
+            'dataset': dataset['counts'],
+            'mode': 'server' if options['server'] else 'test_client',
+            'concurrency': options['concurrency'],
+            'requests_per_endpoint': options['requests'],
+            'endpoints': {},
+        }
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                for name in options['endpoints']:
+                    report['endpoints'][name] = self.run_endpoint(name, context, options)
+        finally:
+            if options['cleanup']:
+                self.drop_dataset()
+        report['peak_rss_mib'] = peak_rss_mib()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        self.stdout.write(output)
+
+        if options['baseline']:
+            self.check_regressions(report, options['baseline'], options['tolerance'])
+
+    def ensure_dataset(self, options):
+        """
+        Seed the benchmark users and appointments unless they already exist.
+        """
+        admin = CustomUser.objects.filter(username=f'{BENCH_PREFIX}admin_0').first()
+        if admin is None:
+            self.seeder().seed_data(options['doctors'], options['patients'], options['appointments'])
+            admin = CustomUser.objects.get(username=f'{BENCH_PREFIX}admin_0')
+        doctors = list(
+            CustomUser.objects.filter(username__startswith=f'{BENCH_PREFIX}doctor_').order_by('pk').values_list('pk', flat=True)
+        )
+        appointments = Appointment.objects.filter(doctor_id__in=doctors)
+        counts = {
+            'doctors': len(doctors),
+            'patients': CustomUser.objects.filter(username__startswith=f'{BENCH_PREFIX}patient_').count(),
+            'appointments': appointments.count(),
+        }
+        return {'admin': admin, 'doctors': doctors, 'counts': counts}
+
+    def seeder(self):
+        return DataSeeder(prefix=BENCH_PREFIX, password=BENCH_PASSWORD)
+
+    def drop_dataset(self):
+        self.seeder().delete()
+
+    def build_context(self, dataset):
+        admin = dataset['admin']
+        doctors = dataset['doctors']
+        bounds = Appointment.objects.filter(doctor_id__in=doctors).aggregate(
+            first_id=Min('id'), last_id=Max('id'), first=Min('scheduled_at'), last=Max('scheduled_at'),
+        )
+        now = timezone.now()
+        return {
+            'admin_token': Token.objects.get_or_create(user=admin)[0].key,
+            'doctors': doctors,
+            'patient': CustomUser.objects.filter(username=f'{BENCH_PREFIX}patient_0').values_list('pk', flat=True).first(),
+            'id_range': (bounds['first_id'] or 0, bounds['last_id'] or 0),
+            'days': (timezone.localdate(bounds['first'] or now), timezone.localdate(bounds['last'] or now)),
+            # Created appointments go after everything seeded so they never overlap.
+            'create_start': (bounds['last'] or now) + timezone.timedelta(days=1),
+            'create_counter': itertools.count(),
+            'create_lock': threading.Lock(),
+        }
+
+    def build_request(self, name, context, rng):
+        """
+        Return `(method, path, params_or_body, token)` for one request to endpoint `name`.
+        """
+        token = context['admin_token']
+        if name == 'login':
+            index = rng.randrange(len(context['doctors']))
+            return 'POST', reverse('login'), {'username': f'{BENCH_PREFIX}doctor_{index}', 'password': BENCH_PASSWORD}, None
+        if name == 'list':
+            return 'GET', reverse('appointment-list'), {'page_size': 100}, token
+        if name == 'detail':
+            return 'GET', reverse('appointment-detail', args=[rng.randint(*context['id_range'])]), {}, token
+        if name == 'summary':
+            first, last = context['days']
+            start = first + timezone.timedelta(days=rng.randint(0, max((last - first).days - 7, 0)))
+            params = {'start_date': start.isoformat(), 'end_date': (start + timezone.timedelta(days=6)).isoformat()}
+            return 'GET', reverse('appointment-summary'), params, token
+        if name == 'create':
+            with context['create_lock']:
+                slot = next(context['create_counter'])
+            scheduled_at = context['create_start'] + appointment_duration() * slot
+            body = {'doctor': context['doctors'][0], 'patient': context['patient'], 'scheduled_at': scheduled_at.isoformat()}
+            return 'POST', reverse('appointment-create'), body, token
+        if name == 'user_list':
+            return 'GET', reverse('user-list'), {'role': 'doctor'}, token
+        raise CommandError(f'Unknown endpoint {name}')
+
+    def run_endpoint(self, name, context, options):
+        rng = random.Random(f'{options["seed"]}:{name}')
+        requests = [self.build_request(name, context, rng) for _ in range(options['requests'])]
+        send = self.send_to_server(options['server']) if options['server'] else self.send_to_client()
+
+        started = time.perf_counter()
+        if options['concurrency'] <= 1:
+            results = [send(request) for request in requests]
+        else:
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                results = list(executor.map(send, requests))
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency for latency, _, _ in results]
+        statuses = {}
+        for _, status_code, _ in results:
+            statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+        queries = [count for _, _, count in results if count is not None]
+        return {
+            'statuses': statuses,
+            'throughput_rps': round(len(results) / elapsed, 1),
+            'latency_ms': {
+                'p50': round(percentile(latencies, 0.5, default=0.0), 2),
+                'p95': round(percentile(latencies, 0.95, default=0.0), 2),
+                'p99': round(percentile(latencies, 0.99, default=0.0), 2),
+            },
+            'queries_per_request': round(statistics.mean(queries), 2) if queries else None,
+            'peak_rss_mib': peak_rss_mib(),
+        }
+
+    def send_to_client(self):
+        """
+        Return a function sending one request through a per-thread test client,
+        counting the queries it runs on the primary and the replicas.
+
+        Database connections belong to the thread that opened them, so they are
+        looked up in the thread sending each request.
+        """
+        local = threading.local()
+        aliases = (DEFAULT_DB_ALIAS, *replica_aliases())
+
+        def send(request):
+            method, path, data, token = request
+            client = getattr(local, 'client', None) or Client()
+            local.client = client
+            headers = {'authorization': f'Token {token}'} if token else {}
+            with ExitStack() as stack:
+                captures = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in aliases]
+                started = time.perf_counter()
+                if method == 'GET':
+                    response = client.get(path, data, headers=headers)
+                else:
+                    response = client.post(path, data, content_type='application/json', headers=headers)
+                latency = (time.perf_counter() - started) * 1000
+            return latency, response.status_code, sum(len(capture) for capture in captures)
+        return send
+
+    def send_to_server(self, base_url):
+        """
+        Return a function sending one request to a running server. Query counts are not available.
+        """
+        base_url = base_url.rstrip('/')
+
+        def send(request):
+            method, path, data, token = request
+            headers = {'Authorization': f'Token {token}'} if token else {}
+            if method == 'GET':
+                url, body = f'{base_url}{path}?{urlencode(data)}', None
+            else:
+                url, body = f'{base_url}{path}', json.dumps(data).encode()
+                headers['Content-Type'] = 'application/json'
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(urllib.request.Request(url, body, headers, method=method)) as response:
+                    response.read()
+                    status_code = response.status
+            except urllib.error.HTTPError as exc:
+                status_code = exc.code
+            return (time.perf_counter() - started) * 1000, status_code, None
+        return send
+
+    def check_regressions(self, report, baseline_path, tolerance):
+        """
+        Raise CommandError if an endpoint's p95 latency or throughput regressed beyond `tolerance`.
+        """
+        with open(baseline_path) as handle:
+            baseline = json.load(handle)
+        regressions = []
+        for name, current in report['endpoints'].items():
+            previous = baseline.get('endpoints', {}).get(name)
+            if previous is None:
+                continue
+            if current['latency_ms']['p95'] > previous['latency_ms']['p95'] * (1 + tolerance):
+                regressions.append(f"{name}: p95 {previous['latency_ms']['p95']} -> {current['latency_ms']['p95']} ms")
+            if current['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+                regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps")
+            if None not in (current['queries_per_request'], previous['queries_per_request']) \
+                    and current['queries_per_request'] > previous['queries_per_request']:
+                regressions.append(f"{name}: queries {previous['queries_per_request']} -> {current['queries_per_request']}")
+        if regressions:
+            raise CommandError('Regressions against baseline:\n' + '\n'.join(regressions))
+        self.stderr.write('No regressions against baseline.')
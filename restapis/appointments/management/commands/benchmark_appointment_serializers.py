@@ -0,0 +1,54 @@
+import json
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from appointments.models import Appointment
+from appointments.serializers import AppointmentReadSerializer, AppointmentSerializer
+
+
+class Command(BaseCommand):
+    """
+    Compare `AppointmentSerializer` with the `AppointmentReadSerializer` fast path.
+    """
+    help = 'Microbenchmark appointment list serialization on in-memory rows (no database access).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Number of appointments to serialize.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per serializer; the best is reported.')
+
+    def handle(self, *args, **options):
+        request = APIRequestFactory().get('/appointments/', SERVER_NAME='localhost')
+        now = timezone.now()
+        rows = [
+            (index, 1 + index % 50, 1000 + index, now + timedelta(minutes=15 * index), now, now)
+            for index in range(1, options['rows'] + 1)
+        ]
+        instances = [
+            Appointment(id=pk, doctor_id=doctor_id, patient_id=patient_id,
+                        scheduled_at=scheduled_at, created_at=created_at, updated_at=updated_at)
+            for pk, doctor_id, patient_id, scheduled_at, created_at, updated_at in rows
+        ]
+
+        def model_serializer():
+            return AppointmentSerializer(instances, many=True, context={'request': request}).data
+
+        def read_serializer():
+            return AppointmentReadSerializer(request).serialize(rows)
+
+        renderer = JSONRenderer()
+        if renderer.render(model_serializer()) != renderer.render(read_serializer()):
+            self.stderr.write('Output mismatch between serializers.')
+
+        results = {}
+        for name, func in (('model_serializer', model_serializer), ('read_serializer', read_serializer)):
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+            results[name] = {'rows': len(rows), 'best_ms': round(min(timings) * 1000, 2)}
+        results['speedup'] = round(results['model_serializer']['best_ms'] / results['read_serializer']['best_ms'], 1)
+        self.stdout.write(json.dumps(results, indent=2))
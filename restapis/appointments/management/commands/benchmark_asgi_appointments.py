@@ -0,0 +1,146 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from restapis.utils import percentile
+from appointments.models import Appointment
+from users.models import CustomUser
+
+ENDPOINTS = {
+    'list': ('appointment-list', 'appointment-list-async', {'page_size': 50}),
+    'summary': ('appointment-summary', 'appointment-summary-async', {'start_date': '2000-01-01'}),
+}
+
+
+class Command(BaseCommand):
+    """
+    Compare the synchronous DRF views behind a thread pool with the async views on one event loop.
+    """
+    help = (
+        'Send the same burst of concurrent requests to the synchronous appointment views '
+        'through a WSGI-style thread pool and to the async views through the ASGI handler '
+        'on a single event loop, with every client taking --client-delay-ms to send its request, '
+        'and report throughput, latency, threads and peak memory as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--appointments', type=int, default=2000, help='Appointments to seed.')
+        parser.add_argument('--requests', type=int, default=400, help='Requests per run.')
+        parser.add_argument('--concurrency', type=int, default=200, help='Requests in flight at once.')
+        parser.add_argument('--threads', type=int, default=8, help='Worker threads of the WSGI-style pool.')
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='list', help='Endpoint to load.')
+        parser.add_argument(
+            '--client-delay-ms', type=float, default=200,
+            help='Time each simulated slow client takes to send its request, holding the connection.',
+        )
+
+    def handle(self, *args, **options):
+        token_key = self.seed(options['appointments'])
+        sync_name, async_name, params = ENDPOINTS[options['endpoint']]
+        headers = {'authorization': f'Token {token_key}'}
+
+        try:
+            results = {}
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                results['wsgi'] = self.measure(lambda: self.run_wsgi(reverse(sync_name), params, headers, options))
+                results['asgi'] = self.measure(
+                    lambda: asyncio.run(self.run_asgi(reverse(async_name), params, headers, options))
+                )
+        finally:
+            CustomUser.objects.filter(username__startswith='bench_asgi_').delete()
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def seed(self, count):
+        CustomUser.objects.filter(username__startswith='bench_asgi_').delete()
+        admin, doctor, patient = (
+            CustomUser.objects.create_user(
+                username=f'bench_asgi_{role}', email=f'bench_asgi_{role}@example.com', password=None, role=role
+            )
+            for role in ('admin', 'doctor', 'patient')
+        )
+        start = timezone.now()
+        Appointment.objects.bulk_create(
+            Appointment(doctor=doctor, patient=patient, scheduled_at=start + timezone.timedelta(hours=index))
+            for index in range(count)
+        )
+        return Token.objects.create(user=admin).key
+
+    def measure(self, run):
+        """
+        Run `run()` under `tracemalloc` and report its latencies and resource use.
+        """
+        tracemalloc.start()
+        started = time.perf_counter()
+        latencies, statuses, peak_threads = run()
+        elapsed = time.perf_counter() - started
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {
+            'statuses': statuses,
+            'seconds': round(elapsed, 3),
+            'requests_per_second': round(len(latencies) / elapsed, 1),
+            'latency_ms': {
+                'p50': round(statistics.median(latencies), 2),
+                'p99': round(percentile(latencies, 0.99, default=0.0), 2),
+            },
+            'peak_threads': peak_threads,
+            'peak_traced_memory_kib': round(peak_memory / 1024),
+        }
+
+    def run_wsgi(self, url, params, headers, options):
+        delay = options['client_delay_ms'] / 1000
+        local = threading.local()
+        statuses = {}
+        peak_threads = threading.active_count()
+        lock = threading.Lock()
+
+        def request(started):
+            nonlocal peak_threads
+            client = getattr(local, 'client', None) or Client()
+            local.client = client
+            # A WSGI worker blocks on the socket while a slow client sends its request.
+            time.sleep(delay)
+            response = client.get(url, params, headers=headers)
+            latency = (time.perf_counter() - started) * 1000
+            with lock:
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                peak_threads = max(peak_threads, threading.active_count())
+            return latency
+
+        # Every in-flight request holds a worker thread until its response is written;
+        # latency includes the time spent waiting for a free worker.
+        with ThreadPoolExecutor(max_workers=min(options['threads'], options['concurrency'])) as executor:
+            submitted = [time.perf_counter() for _ in range(options['requests'])]
+            latencies = list(executor.map(request, submitted))
+        return latencies, statuses, peak_threads
+
+    async def run_asgi(self, url, params, headers, options):
+        delay = options['client_delay_ms'] / 1000
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        statuses = {}
+        peak_threads = threading.active_count()
+
+        async def request():
+            nonlocal peak_threads
+            started = time.perf_counter()
+            async with semaphore:
+                # The event loop serves other requests while a slow client sends its request.
+                await asyncio.sleep(delay)
+                response = await client.get(url, params, headers=headers)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                peak_threads = max(peak_threads, threading.active_count())
+                return (time.perf_counter() - started) * 1000
+
+        latencies = await asyncio.gather(*(request() for _ in range(options['requests'])))
+        return latencies, statuses, peak_threads
@@ -0,0 +1,73 @@
+import io
+import json
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from appointments.serializers import AppointmentReadSerializer
+from restapis.parsers import FastJSONParser, MessagePackParser
+from restapis.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+
+
+class Command(BaseCommand):
+    """
+    Compare DRF's `JSONRenderer` and `JSONParser` with the orjson and MessagePack ones.
+    """
+    help = 'Microbenchmark rendering and parsing an appointment list page built from in-memory rows (no database access).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Number of appointments in the page.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per renderer; the best is reported.')
+
+    def handle(self, *args, **options):
+        request = APIRequestFactory().get('/appointments/', SERVER_NAME='localhost')
+        now = timezone.now()
+        rows = [
+            (index, 1 + index % 50, 1000 + index, now + timedelta(minutes=15 * index), now, now)
+            for index in range(1, options['rows'] + 1)
+        ]
+        data = {'next': None, 'previous': None, 'results': AppointmentReadSerializer(request).serialize(rows)}
+
+        candidates = [('drf_json', JSONRenderer(), JSONParser())]
+        if orjson is not None:
+            candidates.append(('fast_json', FastJSONRenderer(), FastJSONParser()))
+        else:
+            self.stderr.write('orjson is not installed; fast_json is skipped.')
+        if msgpack is not None:
+            candidates.append(('msgpack', MessagePackRenderer(), MessagePackParser()))
+        else:
+            self.stderr.write('msgpack is not installed; msgpack is skipped.')
+
+        expected = JSONRenderer().render(data)
+        results = {}
+        for name, renderer, parser in candidates:
+            body = renderer.render(data)
+            if renderer.format == 'json' and body != expected:
+                self.stderr.write(f'Output mismatch between drf_json and {name}.')
+            results[name] = {
+                'rows': len(rows),
+                'bytes': len(body),
+                'render_best_ms': self.best_ms(lambda: renderer.render(data), options['repeat']),
+                'parse_best_ms': self.best_ms(lambda: parser.parse(io.BytesIO(body)), options['repeat']),
+            }
+        for name in results:
+            if name != 'drf_json':
+                results[name]['render_speedup'] = round(
+                    results['drf_json']['render_best_ms'] / results[name]['render_best_ms'], 1
+                )
+                results[name]['parse_speedup'] = round(
+                    results['drf_json']['parse_best_ms'] / results[name]['parse_best_ms'], 1
+                )
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def best_ms(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return round(min(timings) * 1000, 2)
+
@@ -0,0 +1,127 @@
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, OperationalError, close_old_connections, connections
+from django.db.utils import load_backend
+from django.utils import timezone
+from appointments.models import Appointment
+from users.models import CustomUser
+
+DEVELOPMENT_PROFILE = {'ENGINE': 'django.db.backends.sqlite3'}
+
+
+def use_database(name, profile):
+    """
+    Point the `default` alias of this process at `name` with the given profile.
+    """
+    settings_dict = connections.configure_settings({DEFAULT_DB_ALIAS: {**profile, 'NAME': name}})[DEFAULT_DB_ALIAS]
+    connections[DEFAULT_DB_ALIAS] = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, DEFAULT_DB_ALIAS)
+
+
+def run_worker(name, profile, index, doctor_id, patient_id, options, results):
+    """
+    Mix appointment writes and list reads for `options['seconds']`, ending a
+    simulated request after each operation, and report the counts to `results`.
+    """
+    use_database(name, profile)
+    rng = random.Random(index)
+    start = timezone.now() + timezone.timedelta(days=1)
+    counts = {'writes': 0, 'reads': 0, 'locked': 0}
+    deadline = time.monotonic() + options['seconds']
+    while time.monotonic() < deadline:
+        try:
+            if rng.random() < options['write_ratio']:
+                Appointment.objects.create(
+                    doctor_id=doctor_id,
+                    patient_id=patient_id,
+                    scheduled_at=start + timezone.timedelta(minutes=30 * counts['writes']),
+                )
+                counts['writes'] += 1
+            else:
+                list(Appointment.objects.filter(doctor_id=doctor_id).order_by('-scheduled_at')[:50])
+                counts['reads'] += 1
+        except OperationalError:
+            counts['locked'] += 1
+        # Same as the end of a request: closes the connection unless CONN_MAX_AGE keeps it.
+        close_old_connections()
+    connections.close_all()
+    results.put(counts)
+
+
+class Command(BaseCommand):
+    """
+    Compare the default SQLite settings with `SQLITE_PRODUCTION_PROFILE` under several writer processes.
+    """
+    help = (
+        'Copy the default database into temporary files and run the same multi-process '
+        'mix of appointment writes and reads against each with the development settings '
+        'and with SQLITE_PRODUCTION_PROFILE, reporting throughput and lock errors as JSON. '
+        'The default database must be migrated.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Worker processes.')
+        parser.add_argument('--seconds', type=float, default=5, help='Duration of each run.')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Fraction of operations that write.')
+
+    def handle(self, *args, **options):
+        profiles = {'development': DEVELOPMENT_PROFILE, 'production': settings.SQLITE_PRODUCTION_PROFILE}
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for label, profile in profiles.items():
+                name = os.path.join(directory, f'{label}.sqlite3')
+                results[label] = self.run_profile(name, profile, options)
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run_profile(self, name, profile, options):
+        source = connections[DEFAULT_DB_ALIAS]
+        source.ensure_connection()
+        target = sqlite3.connect(name)
+        source.connection.backup(target)
+        target.close()
+        original = connections[DEFAULT_DB_ALIAS]
+
+        use_database(name, DEVELOPMENT_PROFILE)
+        try:
+            patient = CustomUser.objects.create(
+                username='bench_sqlite_patient', email='bench_sqlite_patient@example.com', role='patient'
+            )
+            doctor_ids = [
+                CustomUser.objects.create(
+                    username=f'bench_sqlite_doctor_{index}', email=f'bench_sqlite_doctor_{index}@example.com', role='doctor'
+                ).pk
+                for index in range(options['workers'])
+            ]
+        finally:
+            connections.close_all()
+            connections[DEFAULT_DB_ALIAS] = original
+
+        # Forked children must not share the parent's sqlite handles.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        processes = [
+            context.Process(target=run_worker, args=(name, profile, index, doctor_id, patient.pk, options, queue))
+            for index, doctor_id in enumerate(doctor_ids)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        counts = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        totals = {key: sum(count[key] for count in counts) for key in ('writes', 'reads', 'locked')}
+        return {
+            **totals,
+            'seconds': round(elapsed, 3),
+            'writes_per_second': round(totals['writes'] / elapsed, 1),
+            'reads_per_second': round(totals['reads'] / elapsed, 1),
+        }
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from appointments.caching import response_cache
+from appointments.models import Appointment, AppointmentDailyCount
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the `AppointmentDailyCount` rollup from the `Appointment` table.
+
+    Cached responses over any date whose counts were dropped or rebuilt are
+    invalidated, since summaries read the rollup.
+    """
+    help = 'Rebuild the per-day, per-doctor appointment counts from scratch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per bulk_create call.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        buckets = (
+            Appointment.objects
+            .values('scheduled_at__date', 'doctor_id')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+
+        created = 0
+        with transaction.atomic():
+            dates = set(AppointmentDailyCount.objects.values_list('date', flat=True).distinct())
+            AppointmentDailyCount.objects.all().delete()
+            batch = []
+            for bucket in buckets.iterator():
+                batch.append(AppointmentDailyCount(
+                    date=bucket['scheduled_at__date'],
+                    doctor_id=bucket['doctor_id'],
+                    count=bucket['count'],
+                ))
+                dates.add(bucket['scheduled_at__date'])
+                if len(batch) >= batch_size:
+                    AppointmentDailyCount.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            if batch:
+                AppointmentDailyCount.objects.bulk_create(batch)
+                created += len(batch)
+            response_cache.invalidate_dates(dates)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} appointment daily counts.'))
@@ -0,0 +1,56 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from appointments.seeding import SEED_PASSWORD, DataSeeder
+
+
+class Command(BaseCommand):
+    """
+    Generate synthetic users and appointments for development and benchmarks.
+    """
+    help = (
+        'Insert synthetic admins, doctors, patients and appointments with bulk_create in '
+        'streaming batches. Every user gets the same password, bookings never overlap, and '
+        'the same --seed always produces the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=100, help='Doctors to create.')
+        parser.add_argument('--patients', type=int, default=1000, help='Patients to create.')
+        parser.add_argument('--appointments', type=int, default=10000, help='Appointments to create.')
+        parser.add_argument('--admins', type=int, default=1, help='Admins to create.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random choices.')
+        parser.add_argument('--prefix', default='seed_', help='Prefix of every generated username.')
+        parser.add_argument('--password', default=SEED_PASSWORD, help='Password of every generated user.')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Objects generated and inserted per batch.')
+        parser.add_argument('--start-date', type=date.fromisoformat, default=None, help='First day with appointments (YYYY-MM-DD).')
+        parser.add_argument('--days', type=int, default=None, help='Days over which appointments are spread.')
+        parser.add_argument('--flush', action='store_true', help='Delete previously seeded data with the same prefix first.')
+
+    def handle(self, *args, **options):
+        seeder = DataSeeder(
+            prefix=options['prefix'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            password=options['password'],
+            start_date=options['start_date'],
+            days=options['days'],
+        )
+        if options['flush']:
+            deleted = seeder.delete()
+            self.stdout.write(f'Deleted {deleted} previously seeded users.')
+
+        started = time.perf_counter()
+        try:
+            result = seeder.seed_data(
+                options['doctors'], options['patients'], options['appointments'], admins=options['admins']
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        rows = result['users'] + result['appointments']
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {result['users']} users, {result['appointments']} appointments and "
+            f"{result['daily_counts']} daily counts in {elapsed:.1f}s ({rows / elapsed * 60:,.0f} rows per minute)."
+        ))
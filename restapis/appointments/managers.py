@@ -0,0 +1,132 @@
+from datetime import date, datetime, time, timedelta
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+from .scheduling import appointment_duration
+
+
+def day_bounds(start_date, end_date=None):
+    """
+    Convert an inclusive date range into a half-open datetime range.
+
+    The bounds are midnights in the current time zone, so filtering with
+    `scheduled_at__gte=start` and `scheduled_at__lt=end` selects the same rows as
+    `scheduled_at__date__gte/lte` while letting the database use an index on
+    `scheduled_at` instead of casting every row to a date.
+
+    Args:
+        start_date (date): The first day of the range.
+        end_date (date, optional): The last day of the range, inclusive.
+
+    Returns:
+        tuple: `(start, end)` aware datetimes; `end` is None for an open range,
+        including one ending on `date.max`, whose next midnight does not exist.
+    """
+    start = _midnight(start_date) if start_date else None
+    end = _midnight(end_date + timedelta(days=1)) if end_date and end_date < date.max else None
+    return start, end
+
+
+def _midnight(day):
+    value = datetime.combine(day, time.min)
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+class AppointmentQuerySet(models.QuerySet):
+    """
+    QuerySet for the `Appointment` model.
+    """
+
+    def scheduled_between(self, start_date=None, end_date=None):
+        """
+        Filter appointments scheduled on `start_date` through `end_date` inclusive,
+        using an index-friendly half-open timestamp range.
+        """
+        start, end = day_bounds(start_date, end_date)
+        queryset = self
+        if start is not None:
+            queryset = queryset.filter(scheduled_at__gte=start)
+        if end is not None:
+            queryset = queryset.filter(scheduled_at__lt=end)
+        return queryset
+
+    def overlapping(self, doctor_id, scheduled_at, exclude_pk=None):
+        """
+        Filter the doctor's appointments whose time overlaps one starting at `scheduled_at`.
+
+        Every appointment lasts `APPOINTMENT_DURATION_MINUTES`, so two overlap when
+        their starts are less than one duration apart. The range is served by the
+        `(doctor, scheduled_at)` unique index.
+        """
+        duration = appointment_duration()
+        queryset = self.filter(
+            doctor_id=doctor_id,
+            scheduled_at__gt=scheduled_at - duration,
+            scheduled_at__lt=scheduled_at + duration,
+        )
+        if exclude_pk is not None:
+            queryset = queryset.exclude(pk=exclude_pk)
+        return queryset
+
+
+class AppointmentDailyCountQuerySet(models.QuerySet):
+    """
+    QuerySet for the `AppointmentDailyCount` rollup model.
+    """
+
+    def adjust(self, date, doctor_id, delta):
+        """
+        Add `delta` to the count stored for (`date`, `doctor_id`).
+
+        The bucket is created on the first increment. Decrements of a missing
+        bucket are ignored, which happens when the doctor itself is being deleted.
+
+        Args:
+            date (date): The day of the bucket.
+            doctor_id (int): The id of the doctor.
+            delta (int): The amount to add to the count, may be negative.
+        """
+        queryset = self.filter(date=date, doctor_id=doctor_id)
+        if delta < 0:
+            queryset = queryset.filter(count__gte=-delta)
+        if queryset.update(count=F('count') + delta) or delta <= 0:
+            return
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(date=date, doctor_id=doctor_id, count=delta)
+        except IntegrityError:
+            queryset.update(count=F('count') + delta)
+
+    def adjust_many(self, deltas):
+        """
+        Add positive counts to many (`date`, `doctor_id`) buckets at once.
+
+        The existing buckets are read in one query, locked where the database
+        supports it, and saved with `bulk_update`; the missing ones are inserted
+        with `bulk_create`. The number of statements does not grow with the
+        number of buckets. Must run inside a transaction.
+
+        Args:
+            deltas (dict): Maps `(date, doctor_id)` to the amount to add.
+        """
+        if not deltas:
+            return
+        lookup = models.Q()
+        for day, doctor_id in deltas:
+            lookup |= models.Q(date=day, doctor_id=doctor_id)
+        buckets = list(self.select_for_update().filter(lookup))
+        for bucket in buckets:
+            bucket.count += deltas[bucket.date, bucket.doctor_id]
+        self.bulk_update(buckets, ['count'])
+        existing = {(bucket.date, bucket.doctor_id) for bucket in buckets}
+        self.bulk_create(
+            self.model(date=day, doctor_id=doctor_id, count=delta)
+            for (day, doctor_id), delta in deltas.items() if (day, doctor_id) not in existing
+        )
+
+
+AppointmentDailyCountManager = models.Manager.from_queryset(AppointmentDailyCountQuerySet)
+
+
+AppointmentManager = models.Manager.from_queryset(AppointmentQuerySet)
@@ -1,10 +1,15 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
+from users.roles import get_roles
+from .caching import response_cache
+from .managers import AppointmentDailyCountManager, AppointmentManager
 
 User = get_user_model()
 
+OVERLAP_MESSAGE = 'The doctor already has an appointment overlapping this time.'
+
 class Appointment(models.Model):
     """
     Model representing an appointment between a doctor and a patient.
@@ -14,40 +19,120 @@ class Appointment(models.Model):
     scheduled_at = models.DateTimeField()
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = AppointmentManager()
     
     class Meta:
         """
         Meta options for the `Appointment` model.
         """
         unique_together = ('doctor', 'scheduled_at')
+        indexes = [
+            models.Index(fields=['scheduled_at'], name='appointment_scheduled_idx'),
+            models.Index(fields=['patient', 'scheduled_at'], name='appointment_patient_sched_idx'),
+            models.Index(fields=['updated_at'], name='appointment_updated_idx'),
+        ]
         verbose_name = 'Appointment'
         verbose_name_plural = 'Appointments'
     
     def clean(self):
         """
         Validate the appointment data to ensure that the `doctor` and `patient` 
-        have appropriate roles.
+        have appropriate roles and that the doctor is free at `scheduled_at`.
+
+        Roles come from the in-process role cache (or the related users, when
+        already loaded), so an appointment built from ids costs no user queries.
 
         Raises:
-            ValidationError: If the selected doctor is not a doctor or 
-            if the selected patient is not a patient.
+            ValidationError: If the selected doctor is not a doctor, 
+            if the selected patient is not a patient, or if the appointment
+            overlaps another appointment of the same doctor.
         """
         super().clean()
-        if self.doctor.role != 'doctor':
+        roles = self.participant_roles()
+        if roles.get(self.doctor_id) != 'doctor':
             raise ValidationError({'doctor': 'The selected user is not a doctor.'})
-        if self.patient.role != 'patient':
+        if roles.get(self.patient_id) != 'patient':
             raise ValidationError({'patient': 'The selected user is not a patient.'})
+        if Appointment.objects.overlapping(self.doctor_id, self.scheduled_at, exclude_pk=self.pk).exists():
+            raise ValidationError({'scheduled_at': OVERLAP_MESSAGE})
+
+    def participant_roles(self):
+        """
+        Return the roles of the doctor and patient, keyed by user id.
+        """
+        roles = {}
+        missing = []
+        for field, pk in (('doctor', self.doctor_id), ('patient', self.patient_id)):
+            user = self._state.fields_cache.get(field)
+            if user is not None and user.pk == pk:
+                roles[pk] = user.role
+            else:
+                missing.append(pk)
+        if missing:
+            roles.update(get_roles(missing))
+        return roles
+
+    def mark_validated(self):
+        """
+        Record that the current doctor, patient and time were validated, for
+        example by `AppointmentSerializer`, so `save()` does not run `clean()` again.
+
+        Changing any of them before saving makes `save()` validate as usual.
+        """
+        self._validated_state = self.validation_state()
+
+    def validation_state(self):
+        return (self.pk, self.doctor_id, self.patient_id, self.scheduled_at)
 
     def save(self, *args, **kwargs):
         """
         Override the save method to perform custom validation before saving the instance.
+
+        Validation is skipped when `mark_validated()` was called for the current values.
+
+        The matching `AppointmentDailyCount` buckets are adjusted in the same
+        transaction, including when the appointment moves to another date or doctor,
+        and cached responses covering the old or new date are invalidated.
         
         Args:
             *args: Variable length argument list.
             **kwargs: Arbitrary keyword arguments.
         """
-        self.clean()  
-        super().save(*args, **kwargs)
+        if getattr(self, '_validated_state', None) != self.validation_state():
+            self.clean()
+        self._validated_state = None
+        using = kwargs.get('using') or router.db_for_write(Appointment, instance=self)
+        with transaction.atomic(using=using):
+            previous = None
+            if self.pk is not None:
+                previous = (
+                    Appointment.objects.using(using)
+                    .filter(pk=self.pk)
+                    .values_list('doctor_id', 'scheduled_at')
+                    .first()
+                )
+            super().save(*args, **kwargs)
+
+            current = (self.doctor_id, self.rollup_date(self.scheduled_at))
+            if previous is not None:
+                previous = (previous[0], self.rollup_date(previous[1]))
+            if previous != current:
+                if previous is not None:
+                    AppointmentDailyCount.objects.using(using).adjust(previous[1], previous[0], -1)
+                AppointmentDailyCount.objects.using(using).adjust(current[1], current[0], 1)
+            response_cache.invalidate_dates({current[1], previous and previous[1]}, using)
+
+    @staticmethod
+    def rollup_date(scheduled_at):
+        """
+        Return the date bucket an appointment scheduled at `scheduled_at` belongs to.
+
+        This matches the `scheduled_at__date` lookup, which uses the current time zone.
+        """
+        if timezone.is_aware(scheduled_at):
+            scheduled_at = timezone.localtime(scheduled_at)
+        return scheduled_at.date()
     
     def __str__(self):
         """
@@ -57,3 +142,31 @@ class Appointment(models.Model):
             str: A string representing the appointment, including patient and doctor usernames.
         """
         return f'Appointment for {self.patient.username} with Dr. {self.doctor.username}'
+
+
+class AppointmentDailyCount(models.Model):
+    """
+    Rollup of the number of appointments per doctor per day.
+
+    Rows are kept in sync by `Appointment.save()` and the `post_delete` signal,
+    and can be rebuilt from scratch with the `rebuild_appointment_rollup` command.
+    """
+    date = models.DateField()
+    doctor = models.ForeignKey(User, related_name="daily_appointment_counts", on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)
+
+    objects = AppointmentDailyCountManager()
+
+    class Meta:
+        """
+        Meta options for the `AppointmentDailyCount` model.
+        """
+        unique_together = ('date', 'doctor')
+        verbose_name = 'Appointment daily count'
+        verbose_name_plural = 'Appointment daily counts'
+
+    def __str__(self):
+        """
+        Return a string representation of the rollup row.
+        """
+        return f'{self.count} appointments on {self.date} for doctor #{self.doctor_id}'
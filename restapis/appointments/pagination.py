@@ -0,0 +1,161 @@
+import base64
+import binascii
+import json
+from datetime import timezone as dt_timezone
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class AppointmentCursorPagination(BasePagination):
+    """
+    Keyset pagination over appointments ordered by `(scheduled_at, id)`.
+
+    Each page is fetched with a `WHERE (scheduled_at, id) > cursor` range and a
+    `LIMIT`, so deep pages cost the same as the first one. Cursors are opaque,
+    url-safe base64 strings that encode the boundary row and the direction.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 1000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Return the page of appointments selected by the request's cursor.
+        """
+        return self.build_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async version of `paginate_queryset`, fetching the page with `aiterator()`.
+        """
+        return self.build_page([row async for row in self.get_page_queryset(queryset, request).aiterator()])
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Return `queryset` narrowed to the rows of the requested page, plus one
+        extra row that tells whether another page follows.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            scheduled_at, pk, self.reverse = None, None, False
+        else:
+            scheduled_at, pk, self.reverse = cursor
+
+        if self.reverse:
+            queryset = queryset.order_by('-scheduled_at', '-id')
+            if cursor is not None:
+                queryset = queryset.filter(Q(scheduled_at__lt=scheduled_at) | Q(scheduled_at=scheduled_at, id__lt=pk))
+        else:
+            queryset = queryset.order_by('scheduled_at', 'id')
+            if cursor is not None:
+                queryset = queryset.filter(Q(scheduled_at__gt=scheduled_at) | Q(scheduled_at=scheduled_at, id__gt=pk))
+        return queryset[:self.page_size + 1]
+
+    def build_page(self, results):
+        """
+        Trim the rows fetched from `get_page_queryset` to the page and record its boundaries.
+        """
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        self.first = results[0] if results else None
+        self.last = results[-1] if results else None
+        if self.reverse:
+            self.has_next = self.cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return results
+
+    def get_paginated_response(self, data):
+        """
+        Wrap the serialized page with links to its neighbours.
+        """
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_page_size(self, request):
+        """
+        Return the requested page size, capped at `max_page_size`.
+        """
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.build_link(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.build_link(self.first, reverse=True)
+
+    def build_link(self, appointment, reverse):
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(appointment, reverse))
+
+    def encode_cursor(self, appointment, reverse):
+        """
+        Encode the boundary appointment and direction as an opaque string.
+
+        `appointment` may be a model instance or a named `values_list` row.
+        """
+        payload = {'s': appointment.scheduled_at.isoformat(), 'i': appointment.id}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('ascii'))
+        return encoded.decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        """
+        Decode the cursor from the request, or return None for the first page.
+
+        Raises:
+            NotFound: If the cursor cannot be decoded, or its time cannot be
+                converted to UTC and the current time zone.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            scheduled_at = parse_datetime(payload['s'])
+            pk = int(payload['i'])
+            reverse = bool(payload.get('r'))
+            if scheduled_at is None or not -2 ** 63 <= pk < 2 ** 63:
+                raise ValueError(encoded)
+            if timezone.is_aware(scheduled_at):
+                # The database compares in UTC and the response cache buckets by local date.
+                scheduled_at.astimezone(dt_timezone.utc)
+                scheduled_at = timezone.localtime(scheduled_at)
+        except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError, OverflowError):
+            raise NotFound(self.invalid_cursor_message)
+        return scheduled_at, pk, reverse
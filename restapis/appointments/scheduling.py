@@ -0,0 +1,143 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.utils import timezone
+
+
+def appointment_duration():
+    """
+    Return the length of every appointment, from `APPOINTMENT_DURATION_MINUTES`.
+    """
+    return timedelta(minutes=getattr(settings, 'APPOINTMENT_DURATION_MINUTES', 30))
+
+
+class DoctorSchedule:
+    """
+    Sorted start times of one doctor's appointments.
+
+    Every appointment lasts `duration`, so the intervals are `[start, start + duration)`
+    and overlap queries reduce to a binary search over the start times.
+    """
+
+    def __init__(self, starts=(), duration=None):
+        """
+        Args:
+            starts (iterable): Appointment start times, in any order.
+            duration (timedelta, optional): Appointment length. Defaults to `appointment_duration()`.
+        """
+        self.starts = sorted(starts)
+        self.duration = duration or appointment_duration()
+
+    def add(self, start):
+        """
+        Insert an appointment starting at `start`, keeping the index sorted.
+        """
+        insort(self.starts, start)
+
+    def contains(self, start):
+        """
+        Return True if an appointment starts exactly at `start`.
+        """
+        index = bisect_left(self.starts, start)
+        return index < len(self.starts) and self.starts[index] == start
+
+    def overlaps(self, start, length=None):
+        """
+        Return True if `[start, start + length)` overlaps any appointment.
+
+        Args:
+            start (datetime): Start of the interval to test.
+            length (timedelta, optional): Length of the interval. Defaults to `duration`.
+        """
+        length = length or self.duration
+        # Appointments starting at or before `start - duration` end before `start`.
+        index = bisect_right(self.starts, start - self.duration)
+        return index < len(self.starts) and self.starts[index] < start + length
+
+    def free_slots(self, candidates, length):
+        """
+        Return the candidate slot starts whose `[start, start + length)` is free.
+
+        `candidates` must be sorted; the appointments are swept once alongside
+        them, so the cost is linear in the number of slots plus appointments.
+        """
+        free = []
+        starts = self.starts
+        duration = self.duration
+        index = 0
+        for start in candidates:
+            while index < len(starts) and starts[index] + duration <= start:
+                index += 1
+            if index == len(starts) or starts[index] >= start + length:
+                free.append(start)
+        return free
+
+
+class ScheduleIndex:
+    """
+    Per-doctor `DoctorSchedule`s loaded with a single range query.
+    """
+
+    def __init__(self, schedules, duration):
+        self.schedules = schedules
+        self.duration = duration
+
+    @classmethod
+    def load(cls, doctor_ids, start, end, queryset=None):
+        """
+        Load the appointments of `doctor_ids` that may overlap `[start, end)`.
+
+        Args:
+            doctor_ids (iterable): The doctors to index.
+            start (datetime): Start of the window.
+            end (datetime): End of the window, or None for an open one.
+            queryset (QuerySet, optional): Appointments to read from. Defaults to all appointments.
+
+        Returns:
+            ScheduleIndex: The loaded index.
+        """
+        from .models import Appointment
+
+        duration = appointment_duration()
+        doctor_ids = set(doctor_ids)
+        queryset = Appointment.objects.all() if queryset is None else queryset
+        queryset = queryset.filter(doctor_id__in=doctor_ids, scheduled_at__gt=start - duration)
+        if end is not None:
+            queryset = queryset.filter(scheduled_at__lt=end)
+        rows = (
+            queryset
+            .order_by('doctor_id', 'scheduled_at')
+            .values_list('doctor_id', 'scheduled_at')
+        )
+        grouped = {doctor_id: [] for doctor_id in doctor_ids}
+        for doctor_id, scheduled_at in rows:
+            grouped[doctor_id].append(scheduled_at)
+        schedules = {doctor_id: DoctorSchedule(starts, duration) for doctor_id, starts in grouped.items()}
+        return cls(schedules, duration)
+
+    def get(self, doctor_id):
+        """
+        Return the schedule of `doctor_id`, creating an empty one if needed.
+        """
+        schedule = self.schedules.get(doctor_id)
+        if schedule is None:
+            schedule = self.schedules[doctor_id] = DoctorSchedule(duration=self.duration)
+        return schedule
+
+
+def candidate_slots(start_date, end_date, length, work_start, work_end):
+    """
+    Return the sorted slot starts of length `length` within working hours.
+
+    Slots start at `work_start` on every day from `start_date` to `end_date`
+    inclusive (in the current time zone) and must end by `work_end`.
+    """
+    slots = []
+    for offset in range((end_date - start_date).days + 1):
+        day = start_date + timedelta(days=offset)
+        slot = datetime.combine(day, work_start)
+        closing = datetime.combine(day, work_end)
+        while slot + length <= closing:
+            slots.append(timezone.make_aware(slot) if settings.USE_TZ else slot)
+            slot += length
+    return slots
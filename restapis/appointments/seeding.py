@@ -0,0 +1,282 @@
+import math
+import random
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+from restapis.utils import batches
+from users.models import CustomUser
+from users.roles import forget_bulk_created_users
+from .caching import response_cache
+from .models import Appointment, AppointmentDailyCount
+from .scheduling import appointment_duration, candidate_slots
+
+SEED_PASSWORD = 'seed-password'
+SPECIALIZATIONS = (
+    'Cardiology', 'Dermatology', 'Family Medicine', 'Neurology', 'Oncology',
+    'Orthopedics', 'Pediatrics', 'Psychiatry', 'Radiology', 'Urology',
+)
+
+
+class SlotGenerator:
+    """
+    Deterministic, collision-free `(doctor_id, scheduled_at)` pairs.
+
+    Every doctor gets the same working-hour slots between `start_date` and
+    `end_date`. The k-th pair goes to doctor `k % len(doctor_ids)`, which takes
+    its n-th slot through the permutation `(a * n + b) % capacity` with `a`
+    coprime to the capacity, so a doctor never gets the same slot twice while
+    the slots still look randomly spread over the period.
+    """
+
+    def __init__(self, doctor_ids, start_date, end_date, rng, duration=None, working_hours=None):
+        """
+        Args:
+            doctor_ids (list): The doctors to book.
+            start_date (date): First day with slots.
+            end_date (date): Last day with slots, inclusive.
+            rng (random.Random): Source of the per-doctor permutations.
+            duration (timedelta, optional): Slot length. Defaults to `appointment_duration()`.
+            working_hours (tuple, optional): `(start, end)` as HH:MM strings.
+                Defaults to `APPOINTMENT_WORKING_HOURS`.
+        """
+        work_start, work_end = working_hours or getattr(settings, 'APPOINTMENT_WORKING_HOURS', ('09:00', '17:00'))
+        self.doctor_ids = list(doctor_ids)
+        self.slots = candidate_slots(
+            start_date, end_date, duration or appointment_duration(), parse_time(work_start), parse_time(work_end)
+        )
+        self.dates = [timezone.localdate(slot) if settings.USE_TZ else slot.date() for slot in self.slots]
+        capacity = self.capacity
+        self.permutations = []
+        for _ in self.doctor_ids:
+            multiplier = rng.randrange(1, max(capacity, 2))
+            while math.gcd(multiplier, capacity) != 1:
+                multiplier = rng.randrange(1, capacity)
+            self.permutations.append((multiplier, rng.randrange(max(capacity, 1))))
+
+    @property
+    def capacity(self):
+        """
+        Number of slots available to each doctor.
+        """
+        return len(self.slots)
+
+    def generate(self, count):
+        """
+        Yield `(doctor_id, slot_index)` for `count` appointments.
+
+        Raises:
+            ValueError: If the doctors do not have `count` free slots between them.
+        """
+        doctors = len(self.doctor_ids)
+        if count and (not doctors or math.ceil(count / doctors) > self.capacity):
+            raise ValueError(
+                f'{doctors} doctors with {self.capacity} slots each cannot take {count} appointments.'
+            )
+        doctor_ids, permutations, capacity = self.doctor_ids, self.permutations, self.capacity
+        for index in range(count):
+            doctor, ordinal = index % doctors, index // doctors
+            multiplier, offset = permutations[doctor]
+            yield doctor_ids[doctor], (multiplier * ordinal + offset) % capacity
+
+
+class DataSeeder:
+    """
+    Generates synthetic users and appointments in streaming batches.
+
+    Skips everything that makes `create_user` and `Appointment.objects.create`
+    slow for bulk data: every user shares one precomputed password hash, slots
+    come from a `SlotGenerator` so no overlap check is needed, appointments are
+    inserted without model instances, and the `AppointmentDailyCount` rollup is
+    counted in memory and inserted once.
+    The same `seed` and arguments always produce the same users and bookings.
+    Usernames are `<prefix><role>_<n>`, so `delete()` can remove a dataset again.
+    """
+    sqlite_cache_kib = 256 * 1024
+
+    def __init__(self, prefix='seed_', seed=0, batch_size=10000, password=SEED_PASSWORD, start_date=None, days=None):
+        """
+        Args:
+            prefix (str): Prefix of every generated username.
+            seed (int): Seed of the random choices.
+            batch_size (int): Objects generated and inserted at a time.
+            password (str): Password of every generated user.
+            start_date (date, optional): First day with appointments. Defaults to
+                half of the period before today.
+            days (int, optional): Length of the period. Defaults to twice the days
+                needed to fit every appointment, so doctors are about half booked.
+        """
+        self.prefix = prefix
+        self.seed = seed
+        self.batch_size = batch_size
+        self.password = password
+        self.start_date = start_date
+        self.days = days
+
+    def seed_data(self, doctors, patients, appointments, admins=1):
+        """
+        Insert the users and appointments in one transaction.
+
+        Raises:
+            ValueError: If users with the prefix already exist, or the appointments
+                do not fit in the doctors' slots.
+
+        Returns:
+            dict: The number of rows inserted per kind.
+        """
+        if appointments and (not doctors or not patients):
+            raise ValueError('Appointments need at least one doctor and one patient.')
+        if CustomUser.objects.filter(username__startswith=self.prefix).exists():
+            raise ValueError(f'Users starting with {self.prefix!r} already exist.')
+
+        rng = random.Random(self.seed)
+        password = make_password(self.password, salt=f'seed{self.seed}')
+        with transaction.atomic():
+            self.create_users('admin', admins, password, rng)
+            doctor_ids = self.create_users('doctor', doctors, password, rng)
+            patient_ids = self.create_users('patient', patients, password, rng)
+            rollup = self.create_appointments(doctor_ids, patient_ids, appointments, rng)
+            AppointmentDailyCount.objects.bulk_create(
+                (AppointmentDailyCount(date=day, doctor_id=doctor_id, count=count)
+                 for (day, doctor_id), count in rollup.items()),
+                batch_size=self.batch_size,
+            )
+            response_cache.invalidate_dates({day for day, _ in rollup})
+            response_cache.invalidate_users()
+        forget_bulk_created_users()
+        return {
+            'users': admins + doctors + patients,
+            'appointments': appointments,
+            'daily_counts': len(rollup),
+        }
+
+    def create_users(self, role, count, password, rng):
+        """
+        Insert `count` users of `role` sharing the hash `password`.
+
+        Returns:
+            list: Their primary keys, in username order.
+        """
+        def users():
+            for index in range(count):
+                user = CustomUser(
+                    username=f'{self.prefix}{role}_{index}',
+                    email=f'{self.prefix}{role}_{index}@example.com',
+                    first_name=role.capitalize(),
+                    last_name=str(index),
+                    role=role,
+                    specialization=rng.choice(SPECIALIZATIONS) if role == 'doctor' else None,
+                    password=password,
+                )
+                user.apply_role_rules()
+                yield user
+
+        pks = []
+        for batch in batches(users(), self.batch_size):
+            pks.extend(user.pk for user in CustomUser.objects.bulk_create(batch))
+        return pks
+
+    def create_appointments(self, doctor_ids, patient_ids, count, rng):
+        """
+        Insert `count` appointments spread over the doctors' slots.
+
+        Rows go through `executemany` rather than `bulk_create`: building model
+        instances and preparing every value per row would cost several times the
+        insert itself, while here each slot's database value is prepared once.
+
+        Returns:
+            Counter: Appointments per `(date, doctor_id)`, for the rollup.
+        """
+        if not count:
+            return Counter()
+        days = self.days or max(1, 2 * math.ceil(count / len(doctor_ids) / self.slots_per_day()))
+        start_date = self.start_date or timezone.localdate() - timedelta(days=days // 2)
+        slots = SlotGenerator(doctor_ids, start_date, start_date + timedelta(days=days - 1), rng)
+
+        connection = connections[router.db_for_write(Appointment)]
+        opts = Appointment._meta
+        fields = [opts.get_field(name) for name in ('doctor', 'patient', 'scheduled_at', 'created_at', 'updated_at')]
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            connection.ops.quote_name(opts.db_table),
+            ', '.join(connection.ops.quote_name(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        scheduled_field = opts.get_field('scheduled_at')
+        scheduled = [scheduled_field.get_db_prep_save(slot, connection) for slot in slots.slots]
+        now = scheduled_field.get_db_prep_save(timezone.now(), connection)
+
+        rollup = Counter()
+        patients = len(patient_ids)
+        randrange = rng.randrange
+
+        def rows():
+            for doctor_id, slot in slots.generate(count):
+                rollup[slots.dates[slot], doctor_id] += 1
+                yield doctor_id, patient_ids[randrange(patients)], scheduled[slot], now, now
+
+        with connection.cursor() as cursor:
+            previous_cache_size = None
+            if connection.vendor == 'sqlite':
+                # The indexes of a large table outgrow SQLite's default 2 MB page
+                # cache, and random inserts into them then thrash the disk.
+                cursor.execute('PRAGMA cache_size')
+                previous_cache_size = cursor.fetchone()[0]
+                cursor.execute(f'PRAGMA cache_size = -{self.sqlite_cache_kib}')
+            try:
+                for batch in batches(rows(), self.batch_size):
+                    cursor.executemany(sql, batch)
+            finally:
+                if previous_cache_size is not None:
+                    cursor.execute(f'PRAGMA cache_size = {previous_cache_size}')
+        return rollup
+
+    def slots_per_day(self):
+        work_start, work_end = (
+            parse_time(value) for value in getattr(settings, 'APPOINTMENT_WORKING_HOURS', ('09:00', '17:00'))
+        )
+        minutes = (work_end.hour * 60 + work_end.minute) - (work_start.hour * 60 + work_start.minute)
+        return max(1, minutes // int(appointment_duration().total_seconds() // 60))
+
+    def delete_appointments(self, doctor_ids):
+        """
+        Delete the appointments of `doctor_ids` with plain `DELETE` statements.
+
+        `QuerySet.delete()` would load every row to send `pre_delete`/`post_delete`,
+        and the rollup handler would then decrement `AppointmentDailyCount` once per
+        appointment. The caller drops those rollup rows and invalidates the response
+        cache itself, so the signals would only cost time on a seeded table.
+
+        Args:
+            doctor_ids (iterable): The doctors whose appointments are deleted.
+        """
+        connection = connections[router.db_for_write(Appointment)]
+        opts = Appointment._meta
+        table = connection.ops.quote_name(opts.db_table)
+        column = connection.ops.quote_name(opts.get_field('doctor').column)
+        with connection.cursor() as cursor:
+            # Stay well under the bound-parameter limit of older SQLite builds.
+            for batch in batches(doctor_ids, 500):
+                placeholders = ', '.join(['%s'] * len(batch))
+                cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({placeholders})', batch)
+
+    def delete(self):
+        """
+        Delete the users with the prefix and their appointments, then rebuild the rollup.
+
+        Appointments are deleted with raw statements, skipping the per-row `post_delete` handlers.
+
+        Returns:
+            int: The number of users deleted.
+        """
+        with transaction.atomic():
+            appointments = Appointment.objects.filter(doctor__username__startswith=self.prefix)
+            dates = set(appointments.dates('scheduled_at', 'day'))
+            self.delete_appointments(list(appointments.values_list('doctor_id', flat=True).distinct()))
+            AppointmentDailyCount.objects.filter(doctor__username__startswith=self.prefix).delete()
+            deleted, per_model = CustomUser.objects.filter(username__startswith=self.prefix).delete()
+            response_cache.invalidate_dates(dates)
+            response_cache.invalidate_users()
+        return per_model.get(CustomUser._meta.label, 0)
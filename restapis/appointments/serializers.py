@@ -1,14 +1,54 @@
-from rest_framework import serializers
-from .models import Appointment
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from users.roles import get_roles
+from .models import Appointment, OVERLAP_MESSAGE
 from django.urls import reverse
 
+UNIQUE_MESSAGE = 'The fields doctor, scheduled_at must make a unique set.'
+
+
+class UserIdField(serializers.Field):
+    """
+    Primary key of a related user, kept as a plain id.
+
+    Declared with `source='<field>_id'` so validation never loads the user; its
+    existence and role are checked by the serializer through the role cache.
+    """
+    default_error_messages = {
+        'incorrect_type': 'Incorrect type. Expected pk value, received {data_type}.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (int, str)):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return int(data)
+        except ValueError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def to_representation(self, value):
+        return value
+
+
 class AppointmentSerializer(serializers.ModelSerializer):
+    """
+    Validates and saves single appointments.
+
+    Validation costs one query for the overlap check, plus one for the roles of
+    the doctor and patient when they are not in the role cache. The saved
+    appointment is marked as validated, so `Appointment.save()` goes straight
+    to the write.
+    """
+    doctor = UserIdField(source='doctor_id')
+    patient = UserIdField(source='patient_id')
     url = serializers.SerializerMethodField()
 
     class Meta:
         model = Appointment
         fields = ['id', 'doctor', 'patient', 'scheduled_at', 'created_at', 'updated_at', 'url']
         read_only_fields = ['created_at', 'updated_at']
+        # Exact duplicates are reported by the overlap check in `validate`.
+        validators = []
 
     def get_url(self, obj):
         request = self.context.get('request')
@@ -17,12 +57,187 @@ class AppointmentSerializer(serializers.ModelSerializer):
         return None
 
     def validate(self, data):
-        doctor = data.get('doctor')
-        patient = data.get('patient')
+        roles = get_roles([data[key] for key in ('doctor_id', 'patient_id') if key in data])
+        for field in ('doctor', 'patient'):
+            pk = data.get(f'{field}_id')
+            if pk is None:
+                continue
+            if pk not in roles:
+                raise serializers.ValidationError({field: [f'Invalid pk "{pk}" - object does not exist.']})
+            if roles[pk] != field:
+                raise serializers.ValidationError({field: f'The selected user is not a {field}.'})
 
-        if doctor and doctor.role != 'doctor':
-            raise serializers.ValidationError({'doctor': 'The selected user is not a doctor.'})
-        if patient and patient.role != 'patient':
-            raise serializers.ValidationError({'patient': 'The selected user is not a patient.'})
+        doctor_id = data.get('doctor_id') or getattr(self.instance, 'doctor_id', None)
+        scheduled_at = data.get('scheduled_at') or getattr(self.instance, 'scheduled_at', None)
+        if doctor_id and scheduled_at:
+            exclude_pk = self.instance.pk if self.instance is not None else None
+            conflict = (
+                Appointment.objects.overlapping(doctor_id, scheduled_at, exclude_pk=exclude_pk)
+                .values_list('scheduled_at', flat=True)
+                .first()
+            )
+            if conflict == scheduled_at:
+                raise serializers.ValidationError(UNIQUE_MESSAGE)
+            if conflict is not None:
+                raise serializers.ValidationError({'scheduled_at': OVERLAP_MESSAGE})
 
         return data
+
+    def create(self, validated_data):
+        appointment = Appointment(**validated_data)
+        appointment.mark_validated()
+        appointment.save()
+        return appointment
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.mark_validated()
+        instance.save()
+        return instance
+
+
+class AppointmentBulkItemSerializer(serializers.Serializer):
+    """
+    Field-level validation for one item of a bulk appointment import.
+
+    Doctors and patients are taken as plain ids; their existence and roles are
+    checked for the whole batch at once by `AppointmentBulkCreateAPIView`.
+    """
+    doctor = serializers.IntegerField()
+    patient = serializers.IntegerField()
+    scheduled_at = serializers.DateTimeField()
+
+
+def appointment_url_template(request):
+    """
+    Resolve the `appointment-detail` URL once and return it as a format string.
+
+    The result produces the same absolute URLs as `AppointmentSerializer.get_url`
+    when formatted with an appointment id, without a `reverse()` call per row.
+    """
+    detail_url = request.build_absolute_uri(reverse('appointment-detail', args=[0]))
+    head, _, tail = detail_url.rpartition('/0/')
+    return head + '/{}/' + tail
+
+
+def datetime_formatter():
+    """
+    Return a function that formats datetimes exactly like `serializers.DateTimeField`.
+
+    The output format and time zone are resolved once instead of per value.
+    Configurations other than ISO 8601 with a time zone fall back to DRF itself.
+    """
+    field = serializers.DateTimeField()
+    output_format = api_settings.DATETIME_FORMAT
+    field_timezone = field.default_timezone()
+    if output_format is None or field_timezone is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    def format_datetime(value):
+        if not value:
+            return None
+        if isinstance(value, str) or value.tzinfo is None:
+            return field.to_representation(value)
+        text = value.astimezone(field_timezone).isoformat()
+        if text.endswith('+00:00'):
+            return text[:-6] + 'Z'
+        return text
+
+    return format_datetime
+
+
+class AppointmentReadSerializer:
+    """
+    Read-only fast path producing the same output as `AppointmentSerializer`.
+
+    Rows are fetched as `values_list` tuples in `columns` order instead of model
+    instances, datetimes go through a precomputed `datetime_formatter`, and URLs are
+    filled into a template resolved once per request. Used by the list, summary
+    and export endpoints.
+
+    Created with `fields=`, it outputs only those fields and fetches only their
+    columns, plus `id` and `scheduled_at`, which keyset pagination needs, and
+    `updated_at`, which the list's validators need.
+    """
+    fields = ('id', 'doctor', 'patient', 'scheduled_at', 'created_at', 'updated_at', 'url')
+    columns = ('id', 'doctor_id', 'patient_id', 'scheduled_at', 'created_at', 'updated_at')
+    field_columns = {
+        'id': 'id',
+        'doctor': 'doctor_id',
+        'patient': 'patient_id',
+        'scheduled_at': 'scheduled_at',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+        'url': 'id',
+    }
+
+    def __init__(self, request, fields=None):
+        """
+        Args:
+            request: The current request, used to build absolute URLs.
+            fields (iterable, optional): The fields to output, in `fields` order.
+                Defaults to all of them.
+        """
+        self.url_template = appointment_url_template(request)
+        self.format_datetime = datetime_formatter()
+        if fields is not None and tuple(fields) != self.fields:
+            self.fields = tuple(fields)
+            self.columns = tuple(dict.fromkeys(
+                ('id', 'scheduled_at', 'updated_at', *(self.field_columns[name] for name in self.fields))
+            ))
+            self.converters = [
+                (self.columns.index(self.field_columns[name]), self.converter(name)) for name in self.fields
+            ]
+            self.to_values = self.select_values
+
+    def get_rows(self, queryset, named=False):
+        """
+        Return `queryset` as tuples of `columns`.
+        """
+        return queryset.values_list(*self.columns, named=named)
+
+    def to_values(self, row):
+        """
+        Return the output values of one row, in `fields` order.
+        """
+        format_datetime = self.format_datetime
+        return [
+            row[0],
+            row[1],
+            row[2],
+            format_datetime(row[3]),
+            format_datetime(row[4]),
+            format_datetime(row[5]),
+            self.url_template.format(row[0]),
+        ]
+
+    def select_values(self, row):
+        """
+        Return the output values of one row for a subset of `fields`.
+        """
+        return [convert(row[index]) for index, convert in self.converters]
+
+    def converter(self, name):
+        """
+        Return the function turning the column value of field `name` into its output.
+        """
+        if name == 'url':
+            return self.url_template.format
+        if name in ('scheduled_at', 'created_at', 'updated_at'):
+            return self.format_datetime
+        return int
+
+    def to_representation(self, row):
+        """
+        Return one row as a dict keyed by `fields`.
+        """
+        return dict(zip(self.fields, self.to_values(row)))
+
+    def serialize(self, rows):
+        """
+        Return a list of dicts for `rows`.
+        """
+        fields = self.fields
+        to_values = self.to_values
+        return [dict(zip(fields, to_values(row))) for row in rows]
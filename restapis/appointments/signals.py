@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .caching import response_cache
+from .models import Appointment, AppointmentDailyCount
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Appointment)
+def decrement_daily_count(sender, instance, using, **kwargs):
+    """
+    Remove a deleted appointment from its `AppointmentDailyCount` bucket.
+
+    Runs inside the deletion transaction, so it also covers queryset deletes
+    and cascades from deleted users.
+    """
+    day = Appointment.rollup_date(instance.scheduled_at)
+    AppointmentDailyCount.objects.using(using).adjust(day, instance.doctor_id, -1)
+    response_cache.invalidate_dates([day], using)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_responses(sender, instance, using, update_fields=None, **kwargs):
+    """
+    Invalidate cached responses filtered by doctor name when a user changes.
+
+    Saves that only record a login leave the cache alone. Appointments removed
+    along with a deleted user invalidate their own dates.
+    """
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    response_cache.invalidate_users(using)
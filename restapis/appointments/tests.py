@@ -1,31 +1,61 @@
+import base64
+import csv
+from collections import Counter
+import io
+import json
+import tempfile
+import time
+from io import StringIO
+from datetime import date, datetime, timezone as dt_timezone
+import uuid
+from decimal import Decimal
+from unittest import mock, skipIf, skipUnless
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.conf import settings
+from django.db import OperationalError, connection, connections
+from django.db.utils import load_backend
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+from restapis.instrumentation import slow_request_log
+from restapis.parsers import FastJSONParser
+from restapis.renderers import FastJSONRenderer, msgpack, orjson
+from restapis.replication import SQLiteReplicationShim
+from restapis.sqlite.base import LockRetry
+from restapis.testing import QueryBudgetMixin, RoleUsersMixin, create_user
+from restapis.routers import PrimaryReplicaRouter, pin_to_primary
+from restapis.utils import percentile
 from django.utils import timezone
-from .models import Appointment
+from django.utils.translation import gettext_lazy
+from .caching import covering_buckets, response_cache
+from .models import Appointment, AppointmentDailyCount, OVERLAP_MESSAGE
+from .analytics import UtilizationReport, np
+from .seeding import DataSeeder
+from .pagination import AppointmentCursorPagination
+from .scheduling import DoctorSchedule
+from .serializers import AppointmentReadSerializer, AppointmentSerializer, datetime_formatter
+from .views import AppointmentListAPIView, AppointmentSummaryAPIView
 from django.contrib.auth import get_user_model
+from users import urls as users_urls
+from users.authentication import token_cache
+from users.importers import UserImporter
+from users.roles import get_roles, role_cache
+from . import urls as appointments_urls
 
 User = get_user_model()
 
-class AppointmentAPITests(APITestCase):
+class AppointmentAPITests(RoleUsersMixin, QueryBudgetMixin, APITestCase):
     def setUp(self):
-        self.admin_user = User.objects.create_superuser(
-            username='admin',
-            email='admin@example.com',
-            password='adminpass'
-        )
-        self.doctor_user = User.objects.create_user(
-            username='doctor',
-            email='doctor@example.com',
-            password='doctorpass',
-            role='doctor'
-        )
-        self.patient_user = User.objects.create_user(
-            username='patient',
-            email='patient@example.com',
-            password='patientpass',
-            role='patient'
-        )
         self.appointment = Appointment.objects.create(
             doctor=self.doctor_user,
             patient=self.patient_user,
@@ -40,13 +70,27 @@ class AppointmentAPITests(APITestCase):
         self.client.force_authenticate(user=self.admin_user)
         response = self.client.get(self.appointment_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def grow(self):
+        DataSeeder(prefix='grow_', start_date=timezone.localdate(), days=3).seed_data(
+            doctors=3, patients=5, appointments=30, admins=0
+        )
+
+    def test_list_queries_do_not_grow(self):
+        self.client.force_authenticate(user=self.admin_user)
+        self.assertQueriesDoNotGrow(lambda: self.client.get(self.appointment_list_url), self.grow, budget=2)
+
+    def test_admin_changelist_queries_do_not_grow(self):
+        self.client.force_login(self.admin_user)
+        url = reverse('admin:appointments_appointment_changelist')
+        self.assertQueriesDoNotGrow(lambda: self.assertContains(self.client.get(url), 'Dr. doctor'), self.grow)
 
     def test_list_appointments_doctor(self):
         self.client.force_authenticate(user=self.doctor_user)
         response = self.client.get(self.appointment_list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_list_appointments_forbidden(self):
         self.client.force_authenticate(user=self.patient_user)
@@ -132,7 +176,1688 @@ class AppointmentAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreater(len(response.data), 0)
 
+    def test_ranges_ending_on_the_last_date(self):
+        self.client.force_authenticate(user=self.admin_user)
+        today = timezone.localdate().isoformat()
+        last = date.max.isoformat()
+        for name, params in (
+            ('appointment-summary', {'start_date': today, 'end_date': last}),
+            ('appointment-export', {'start_date': today, 'end_date': last}),
+            ('appointment-free-slots', {'start_date': '9999-12-01', 'end_date': last}),
+            ('appointment-utilization', {'start_date': '9999-12-01', 'end_date': last}),
+        ):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name), params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse('appointment-summary'), {'start_date': today, 'end_date': last})
+        self.assertEqual(response.data[0]['count'], 1)
+        response = self.client.get(reverse('appointment-utilization'), {'start_date': today, 'end_date': last})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_summary_appointment_forbidden(self):
         self.client.force_authenticate(user=self.doctor_user)
         response = self.client.get(self.appointment_summary_url, {'start_date': timezone.now().date().isoformat()})
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AppointmentSummaryQueryTests(RoleUsersMixin, QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        base = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0) + timezone.timedelta(days=1)
+        self.appointments = []
+        for day in range(5):
+            for hour in range(3):
+                self.appointments.append(Appointment.objects.create(
+                    doctor=self.doctor_user,
+                    patient=self.patient_user,
+                    scheduled_at=base + timezone.timedelta(days=day, hours=hour)
+                ))
+        self.appointment_summary_url = reverse('appointment-summary')
+        self.client.force_authenticate(user=self.admin_user)
+
+    def test_summary_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.appointment_summary_url, {'start_date': timezone.now().date().isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+
+    def test_summary_queries_do_not_grow(self):
+        def grow():
+            DataSeeder(prefix='grow_', start_date=timezone.localdate(), days=7).seed_data(
+                doctors=3, patients=5, appointments=60, admins=0
+            )
+        start_date = timezone.now().date().isoformat()
+        self.assertQueriesDoNotGrow(
+            lambda: self.client.get(self.appointment_summary_url, {'start_date': start_date}), grow, budget=1
+        )
+
+    def test_summary_matches_serializer_urls(self):
+        response = self.client.get(self.appointment_summary_url, {'start_date': timezone.now().date().isoformat()})
+        request = response.wsgi_request
+        for entry in response.data:
+            day_appointments = Appointment.objects.filter(scheduled_at__date=entry['date']).order_by('id')
+            expected = [
+                request.build_absolute_uri(reverse('appointment-detail', args=[appointment.id]))
+                for appointment in day_appointments
+            ]
+            self.assertEqual(entry['count'], len(expected))
+            self.assertEqual(entry['appointments_url'], expected)
+
+
+class AppointmentDailyCountTests(RoleUsersMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_doctor = create_user('otherdoctor', 'doctor')
+
+    def setUp(self):
+        self.day = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0) + timezone.timedelta(days=1)
+        self.appointment = Appointment.objects.create(
+            doctor=self.doctor_user,
+            patient=self.patient_user,
+            scheduled_at=self.day
+        )
+        self.appointment_summary_url = reverse('appointment-summary')
+
+    def counts(self):
+        return {
+            (row.date, row.doctor_id): row.count
+            for row in AppointmentDailyCount.objects.filter(count__gt=0)
+        }
+
+    def test_create_increments_bucket(self):
+        Appointment.objects.create(
+            doctor=self.doctor_user,
+            patient=self.patient_user,
+            scheduled_at=self.day + timezone.timedelta(hours=1)
+        )
+        self.assertEqual(self.counts(), {(self.day.date(), self.doctor_user.id): 2})
+
+    def test_move_between_dates_and_doctors(self):
+        self.appointment.scheduled_at = self.day + timezone.timedelta(days=1)
+        self.appointment.save()
+        self.assertEqual(self.counts(), {(self.day.date() + timezone.timedelta(days=1), self.doctor_user.id): 1})
+
+        self.appointment.doctor = self.other_doctor
+        self.appointment.save()
+        self.assertEqual(self.counts(), {(self.day.date() + timezone.timedelta(days=1), self.other_doctor.id): 1})
+
+    def test_delete_decrements_bucket(self):
+        self.appointment.delete()
+        self.assertEqual(self.counts(), {})
+
+        Appointment.objects.create(doctor=self.doctor_user, patient=self.patient_user, scheduled_at=self.day)
+        self.patient_user.delete()
+        self.assertEqual(self.counts(), {})
+
+    def test_rebuild_command(self):
+        AppointmentDailyCount.objects.all().delete()
+        call_command('rebuild_appointment_rollup', stdout=StringIO())
+        self.assertEqual(self.counts(), {(self.day.date(), self.doctor_user.id): 1})
+
+    def test_summary_reads_rollup_without_urls(self):
+        self.client.force_authenticate(user=self.admin_user)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.appointment_summary_url, {
+                'start_date': timezone.now().date().isoformat(),
+                'include_urls': 'false',
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{'date': self.day.date().isoformat(), 'count': 1}])
+
+
+class AppointmentListPaginationTests(RoleUsersMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_doctor = create_user('otherdoctor', 'doctor')
+
+    def setUp(self):
+        base = timezone.now().replace(microsecond=0) + timezone.timedelta(days=1)
+        for hour in range(5):
+            for doctor in (self.doctor_user, self.other_doctor):
+                Appointment.objects.create(
+                    doctor=doctor,
+                    patient=self.patient_user,
+                    scheduled_at=base + timezone.timedelta(hours=hour)
+                )
+        self.expected_ids = list(Appointment.objects.order_by('scheduled_at', 'id').values_list('id', flat=True))
+        self.appointment_list_url = reverse('appointment-list')
+
+    def collect(self, url, params=None):
+        ids = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(appointment['id'] for appointment in response.data['results'])
+            if response.data['next'] is None:
+                return ids, response
+            response = self.client.get(response.data['next'])
+
+    def test_pages_cover_all_rows_in_order(self):
+        self.client.force_authenticate(user=self.admin_user)
+        ids, last_response = self.collect(self.appointment_list_url, {'page_size': 3})
+        self.assertEqual(ids, self.expected_ids)
+
+        previous = self.client.get(last_response.data['previous'])
+        self.assertEqual([appointment['id'] for appointment in previous.data['results']], self.expected_ids[6:9])
+
+    def test_doctor_branch_uses_cursor(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        ids, _ = self.collect(self.appointment_list_url, {'page_size': 2})
+        self.assertEqual(ids, list(
+            Appointment.objects.filter(doctor=self.doctor_user).order_by('scheduled_at', 'id').values_list('id', flat=True)
+        ))
+
+    def test_page_size_is_capped(self):
+        self.client.force_authenticate(user=self.admin_user)
+        with mock.patch.object(AppointmentCursorPagination, 'max_page_size', 4):
+            response = self.client.get(self.appointment_list_url, {'page_size': 10 ** 6})
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_invalid_cursor(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(self.appointment_list_url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_forged_cursors(self):
+        self.client.force_authenticate(user=self.admin_user)
+        for payload in (
+            '{"s":"2030-01-01T09:00:00+00:00","i":Infinity}',
+            '{"s":"2030-01-01T09:00:00+00:00","i":%d}' % 10 ** 30,
+            '{"s":"9999-12-31T23:59:59-05:00","i":1}',
+            '{"s":"0001-01-01T00:00:00+05:00","i":1,"r":1}',
+        ):
+            cursor = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+            with self.subTest(payload=payload):
+                response = self.client.get(self.appointment_list_url, {'cursor': cursor})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_sparse_fields_page_through(self):
+        self.client.force_authenticate(user=self.admin_user)
+        with CaptureQueriesContext(connection) as context:
+            ids, last_response = self.collect(self.appointment_list_url, {'page_size': 3, 'fields': 'scheduled_at,id'})
+        self.assertEqual(ids, self.expected_ids)
+        self.assertEqual(list(last_response.data['results'][0]), ['id', 'scheduled_at'])
+        page_queries = [query['sql'] for query in context.captured_queries if 'LIMIT' in query['sql']]
+        self.assertTrue(page_queries)
+        for sql in page_queries:
+            self.assertNotIn('"patient_id"', sql)
+            self.assertNotIn('"created_at"', sql)
+
+    def test_sparse_fields_match_full_rows(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        full = self.client.get(self.appointment_list_url).data['results']
+        sparse = self.client.get(self.appointment_list_url, {'fields': 'url,patient,updated_at'}).data['results']
+        self.assertEqual(sparse, [
+            {'patient': row['patient'], 'updated_at': row['updated_at'], 'url': row['url']} for row in full
+        ])
+
+    def test_sparse_fields_reject_unknown(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(self.appointment_list_url, {'fields': 'id,notes'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('notes', response.data['fields'][0])
+        response = self.client.get(self.appointment_list_url, {'fields': ','})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AppointmentExportTests(RoleUsersMixin, APITestCase):
+    def setUp(self):
+        base = timezone.now() + timezone.timedelta(days=1)
+        for hour in range(3):
+            Appointment.objects.create(
+                doctor=self.doctor_user,
+                patient=self.patient_user,
+                scheduled_at=base + timezone.timedelta(hours=hour)
+            )
+        self.appointment_export_url = reverse('appointment-export')
+        self.start_date = timezone.now().date().isoformat()
+
+    def test_export_ndjson_matches_serializer(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(self.appointment_export_url, {'start_date': self.start_date})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        exported = [json.loads(line) for line in lines]
+
+        appointments = Appointment.objects.order_by('scheduled_at', 'id')
+        expected = AppointmentSerializer(appointments, many=True, context={'request': response.wsgi_request}).data
+        self.assertEqual(exported, json.loads(json.dumps(expected)))
+
+    def test_export_csv(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(self.appointment_export_url, {
+            'start_date': self.start_date,
+            'doctor_name': 'doc',
+            'export_format': 'csv',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ['id', 'doctor', 'patient', 'scheduled_at', 'created_at', 'updated_at', 'url'])
+        self.assertEqual(len(rows), 4)
+
+    def test_export_requires_start_date(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(self.appointment_export_url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'detail': 'Start date is required.'})
+
+    def test_export_forbidden(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        response = self.client.get(self.appointment_export_url, {'start_date': self.start_date})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AppointmentBulkCreateTests(RoleUsersMixin, APITestCase):
+    def setUp(self):
+        self.day = timezone.now().replace(hour=8, minute=0, second=0, microsecond=0) + timezone.timedelta(days=1)
+        self.existing = Appointment.objects.create(
+            doctor=self.doctor_user,
+            patient=self.patient_user,
+            scheduled_at=self.day
+        )
+        self.appointment_bulk_create_url = reverse('appointment-bulk-create')
+
+    def batch(self, size, offset=1, doctors=None, days=1):
+        doctors = doctors or [self.doctor_user]
+        return [
+            {
+                'doctor': doctors[index % len(doctors)].id,
+                'patient': self.patient_user.id,
+                'scheduled_at': (
+                    self.day + timezone.timedelta(days=index % days, minutes=30 * (index + offset))
+                ).isoformat(),
+            }
+            for index in range(size)
+        ]
+
+    def test_bulk_create_admin(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.post(self.appointment_bulk_create_url, self.batch(3), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 3)
+        self.assertTrue(all(appointment['id'] for appointment in response.data))
+        self.assertEqual(Appointment.objects.count(), 4)
+        self.assertEqual(AppointmentDailyCount.objects.get(date=self.day.date(), doctor=self.doctor_user).count, 4)
+
+    def test_bulk_create_query_count_is_constant(self):
+        doctors = [self.doctor_user] + [
+            User.objects.create_user(
+                username=f'doctor{index}', email=f'doctor{index}@example.com', password='doctorpass', role='doctor'
+            )
+            for index in range(2)
+        ]
+        self.client.force_authenticate(user=self.admin_user)
+        role_cache.clear()
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.post(self.appointment_bulk_create_url, self.batch(2, days=2), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        role_cache.clear()
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(
+                self.appointment_bulk_create_url, self.batch(30, offset=10, doctors=doctors, days=10), format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(Appointment.objects.count(), 33)
+        expected = Counter(
+            (Appointment.rollup_date(scheduled_at), doctor_id)
+            for doctor_id, scheduled_at in Appointment.objects.values_list('doctor_id', 'scheduled_at')
+        )
+        counts = {
+            (day, doctor_id): count
+            for day, doctor_id, count in AppointmentDailyCount.objects.values_list('date', 'doctor_id', 'count')
+        }
+        self.assertEqual(counts, dict(expected))
+        self.assertGreaterEqual(len(counts), 10)
+
+    def test_bulk_create_reports_errors_per_item(self):
+        self.client.force_authenticate(user=self.admin_user)
+        items = self.batch(2)
+        items.append({'doctor': self.patient_user.id, 'patient': self.patient_user.id, 'scheduled_at': self.day.isoformat()})
+        items.append({'doctor': self.doctor_user.id, 'patient': 0, 'scheduled_at': self.day.isoformat()})
+        items.append(dict(items[0]))
+        items.append({'doctor': self.doctor_user.id})
+        response = self.client.post(self.appointment_bulk_create_url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['errors']
+        self.assertEqual(errors[0], {})
+        self.assertEqual(errors[1], {})
+        self.assertEqual(errors[2]['doctor'], ['The selected user is not a doctor.'])
+        self.assertIn('patient', errors[3])
+        self.assertIn('non_field_errors', errors[3])
+        self.assertIn('non_field_errors', errors[4])
+        self.assertIn('scheduled_at', errors[5])
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_bulk_create_forbidden(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        response = self.client.post(self.appointment_bulk_create_url, self.batch(1), format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AppointmentIndexUsageTests(RoleUsersMixin, APITestCase):
+    def setUp(self):
+        self.day = timezone.now().replace(hour=23, minute=30, second=0, microsecond=0)
+        for offset in range(3):
+            Appointment.objects.create(
+                doctor=self.doctor_user,
+                patient=self.patient_user,
+                scheduled_at=self.day + timezone.timedelta(days=offset)
+            )
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+        self.assertNotRegex(plan, r'SCAN appointments_appointment(?! USING)', plan)
+
+    def test_scheduled_between_matches_date_lookup(self):
+        start = self.day.date()
+        end = start + timezone.timedelta(days=1)
+        self.assertQuerySetEqual(
+            Appointment.objects.scheduled_between(start, end).order_by('id'),
+            Appointment.objects.filter(scheduled_at__date__gte=start, scheduled_at__date__lte=end).order_by('id'),
+        )
+        self.assertEqual(Appointment.objects.scheduled_between(start, end).count(), 2)
+        self.assertEqual(Appointment.objects.scheduled_between(start).count(), 3)
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN output is SQLite-specific')
+    def test_summary_range_uses_scheduled_index(self):
+        start = self.day.date()
+        queryset = (
+            Appointment.objects.scheduled_between(start, start + timezone.timedelta(days=30))
+            .order_by('scheduled_at', 'id')
+            .values_list('id', 'scheduled_at')
+        )
+        self.assertUsesIndex(queryset, 'appointment_scheduled_idx')
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN output is SQLite-specific')
+    def test_patient_range_uses_patient_index(self):
+        queryset = Appointment.objects.filter(patient=self.patient_user).scheduled_between(self.day.date())
+        self.assertUsesIndex(queryset, 'appointment_patient_sched_idx')
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN output is SQLite-specific')
+    def test_change_feed_uses_updated_index(self):
+        queryset = Appointment.objects.filter(updated_at__gte=self.day).order_by('updated_at')
+        self.assertUsesIndex(queryset, 'appointment_updated_idx')
+
+
+class AppointmentReadSerializerParityTests(RoleUsersMixin, APITestCase):
+    def setUp(self):
+        base = timezone.now() + timezone.timedelta(days=1)
+        Appointment.objects.create(doctor=self.doctor_user, patient=self.patient_user, scheduled_at=base)
+        Appointment.objects.create(
+            doctor=self.doctor_user,
+            patient=self.patient_user,
+            scheduled_at=base.replace(microsecond=0) + timezone.timedelta(hours=1)
+        )
+        self.request = APIRequestFactory().get('/appointments/')
+
+    def assertParity(self):
+        queryset = Appointment.objects.order_by('scheduled_at', 'id')
+        expected = AppointmentSerializer(queryset, many=True, context={'request': self.request}).data
+        fast = AppointmentReadSerializer(self.request)
+        actual = fast.serialize(fast.get_rows(queryset))
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_parity_utc(self):
+        self.assertParity()
+
+    def test_parity_other_timezone(self):
+        with timezone.override('Asia/Karachi'):
+            self.assertParity()
+
+    @override_settings(REST_FRAMEWORK={'DATETIME_FORMAT': '%Y-%m-%d %H:%M'})
+    def test_parity_custom_format(self):
+        self.assertParity()
+
+    def test_list_response_matches_model_serializer(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(reverse('appointment-list'))
+        queryset = Appointment.objects.order_by('scheduled_at', 'id')
+        expected = AppointmentSerializer(queryset, many=True, context={'request': response.wsgi_request}).data
+        self.assertEqual(JSONRenderer().render(response.data['results']), JSONRenderer().render(expected))
+
+
+class AppointmentSchedulingTests(RoleUsersMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_doctor = create_user('otherdoctor', 'doctor')
+
+    def setUp(self):
+        self.day = (timezone.now() + timezone.timedelta(days=1)).date()
+        self.nine = timezone.make_aware(timezone.datetime.combine(self.day, timezone.datetime.min.time())) + timezone.timedelta(hours=9)
+        self.appointment = Appointment.objects.create(
+            doctor=self.doctor_user,
+            patient=self.patient_user,
+            scheduled_at=self.nine + timezone.timedelta(minutes=10)
+        )
+        self.free_slots_url = reverse('appointment-free-slots')
+
+    def test_model_rejects_overlap(self):
+        with self.assertRaises(DjangoValidationError):
+            Appointment.objects.create(
+                doctor=self.doctor_user,
+                patient=self.patient_user,
+                scheduled_at=self.nine + timezone.timedelta(minutes=30)
+            )
+        Appointment.objects.create(
+            doctor=self.other_doctor,
+            patient=self.patient_user,
+            scheduled_at=self.nine + timezone.timedelta(minutes=30)
+        )
+        self.appointment.save()
+
+    def test_api_rejects_overlap(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.post(reverse('appointment-create'), {
+            'doctor': self.doctor_user.id,
+            'patient': self.patient_user.id,
+            'scheduled_at': (self.nine + timezone.timedelta(minutes=20)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('scheduled_at', response.data)
+
+    def test_bulk_create_rejects_overlap(self):
+        self.client.force_authenticate(user=self.admin_user)
+        items = [
+            {'doctor': self.doctor_user.id, 'patient': self.patient_user.id,
+             'scheduled_at': (self.nine + timezone.timedelta(minutes=minutes)).isoformat()}
+            for minutes in (25, 60, 75)
+        ]
+        response = self.client.post(reverse('appointment-bulk-create'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['errors']
+        self.assertIn('scheduled_at', errors[0])
+        self.assertEqual(errors[1], {})
+        self.assertIn('scheduled_at', errors[2])
+
+    def test_free_slots(self):
+        self.client.force_authenticate(user=self.admin_user)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.free_slots_url, {
+                'start_date': self.day.isoformat(),
+                'work_start': '09:00',
+                'work_end': '11:00',
+                'slot_minutes': 30,
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        slots = {entry['doctor']: entry['free_slots'] for entry in response.data}
+        format_datetime = datetime_formatter()
+        expected = [format_datetime(self.nine + timezone.timedelta(minutes=minutes)) for minutes in (60, 90)]
+        self.assertEqual(slots[self.doctor_user.id], expected)
+        self.assertEqual(len(slots[self.other_doctor.id]), 4)
+
+    def test_free_slots_doctor_sees_only_own(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        response = self.client.get(self.free_slots_url, {
+            'start_date': self.day.isoformat(),
+            'doctors': str(self.other_doctor.id),
+        })
+        self.assertEqual([entry['doctor'] for entry in response.data], [self.doctor_user.id])
+
+    def test_free_slots_forbidden_and_invalid(self):
+        self.client.force_authenticate(user=self.patient_user)
+        response = self.client.get(self.free_slots_url, {'start_date': self.day.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin_user)
+        for params in (
+            {'start_date': 'soon'},
+            {'start_date': self.day.isoformat(), 'doctors': str(10 ** 30)},
+            {'start_date': self.day.isoformat(), 'doctors': f'{self.doctor_user.id},0'},
+            {'start_date': self.day.isoformat(), 'slot_minutes': 10 ** 30},
+            {'start_date': self.day.isoformat(), 'slot_minutes': 24 * 60 + 1},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.free_slots_url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_doctor_schedule(self):
+        schedule = DoctorSchedule([self.nine], timezone.timedelta(minutes=30))
+        self.assertTrue(schedule.contains(self.nine))
+        self.assertTrue(schedule.overlaps(self.nine - timezone.timedelta(minutes=29)))
+        self.assertFalse(schedule.overlaps(self.nine - timezone.timedelta(minutes=30)))
+        self.assertFalse(schedule.overlaps(self.nine + timezone.timedelta(minutes=30)))
+
+
+class AppointmentConditionalGetTests(RoleUsersMixin, APITestCase):
+    def setUp(self):
+        self.appointment = Appointment.objects.create(
+            doctor=self.doctor_user,
+            patient=self.patient_user,
+            scheduled_at=timezone.now() + timezone.timedelta(days=1)
+        )
+        self.appointment_list_url = reverse('appointment-list')
+        self.appointment_detail_url = reverse('appointment-detail', args=[self.appointment.id])
+
+    def test_list_not_modified(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(self.appointment_list_url)
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.appointment_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Appointment.objects.create(
+            doctor=self.doctor_user,
+            patient=self.patient_user,
+            scheduled_at=timezone.now() + timezone.timedelta(days=2)
+        )
+        response = self.client.get(self.appointment_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_validators_come_from_page(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.appointment_list_url, {'page_size': 1})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('MAX(', queries[0]['sql'])
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.appointment_list_url, {'page_size': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        later = Appointment.objects.create(
+            doctor=self.doctor_user,
+            patient=self.patient_user,
+            scheduled_at=timezone.now() + timezone.timedelta(days=3)
+        )
+        response = self.client.get(self.appointment_list_url, {'page_size': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        later.scheduled_at += timezone.timedelta(days=1)
+        later.save()
+        response = self.client.get(self.appointment_list_url, {'page_size': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.appointment.delete()
+        response = self.client.get(self.appointment_list_url, {'page_size': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_sparse_fields_keep_validators(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        response = self.client.get(self.appointment_list_url, {'fields': 'id'})
+        self.assertEqual(response.data['results'], [{'id': self.appointment.id}])
+        self.appointment.save()
+        response = self.client.get(self.appointment_list_url, {'fields': 'id'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_ignores_if_modified_since_after_delete(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        newer = Appointment.objects.create(
+            doctor=self.doctor_user,
+            patient=self.patient_user,
+            scheduled_at=timezone.now() + timezone.timedelta(days=2)
+        )
+        response = self.client.get(self.appointment_list_url)
+        self.assertEqual(len(response.data['results']), 2)
+        newer.delete()
+        response = self.client.get(self.appointment_list_url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_list_etag_depends_on_caller(self):
+        self.client.force_authenticate(user=self.admin_user)
+        etag = self.client.get(self.appointment_list_url)['ETag']
+        self.client.force_authenticate(user=self.doctor_user)
+        response = self.client.get(self.appointment_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_not_modified(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        response = self.client.get(self.appointment_detail_url)
+        etag = response['ETag']
+
+        response = self.client.get(self.appointment_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.appointment.scheduled_at += timezone.timedelta(hours=2)
+        self.appointment.save()
+        response = self.client.get(self.appointment_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_forbidden_ignores_validators(self):
+        self.client.force_authenticate(user=self.patient_user)
+        response = self.client.get(self.appointment_detail_url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AppointmentResponseCacheTests(RoleUsersMixin, APITestCase):
+    def setUp(self):
+        response_cache.cache.clear()
+        response_cache.reset_stats()
+        for day in (10, 11, 20):
+            self.book(date(2030, 3, day))
+        self.summary_url = reverse('appointment-summary')
+        self.client.force_authenticate(user=self.admin_user)
+
+    def book(self, day, hour=10):
+        return Appointment.objects.create(
+            doctor=self.doctor_user,
+            patient=self.patient_user,
+            scheduled_at=timezone.make_aware(datetime(day.year, day.month, day.day, hour)),
+        )
+
+    def summary(self, **params):
+        params = {'start_date': '2030-03-01', 'end_date': '2030-03-15', **params}
+        return self.client.get(self.summary_url, params)
+
+    def test_repeated_summary_is_served_from_cache(self):
+        first = self.summary()
+        with self.assertNumQueries(0):
+            second = self.summary()
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(response_cache.stats(), {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_write_inside_range_invalidates(self):
+        self.summary()
+        self.book(date(2030, 3, 11), hour=14)
+        response = self.summary()
+        self.assertEqual(response.data[1]['count'], 2)
+        self.assertEqual(response_cache.stats()['hits'], 0)
+
+    def test_write_outside_range_keeps_entry(self):
+        self.summary()
+        self.book(date(2030, 3, 20), hour=14)
+        self.summary()
+        self.assertEqual(response_cache.stats()['hits'], 1)
+
+    def test_moving_appointment_out_of_range_invalidates(self):
+        self.summary()
+        appointment = Appointment.objects.get(scheduled_at__date=date(2030, 3, 10))
+        appointment.scheduled_at = timezone.make_aware(datetime(2030, 4, 2, 10))
+        appointment.save()
+        self.assertEqual([entry['date'] for entry in self.summary().data], ['2030-03-11'])
+
+    def test_rollup_rebuild_invalidates(self):
+        AppointmentDailyCount.objects.filter(date=date(2030, 3, 10)).update(count=5)
+        self.assertEqual(self.summary(include_urls='false').data[0]['count'], 5)
+        call_command('rebuild_appointment_rollup', stdout=StringIO())
+        self.assertEqual(self.summary(include_urls='false').data[0]['count'], 1)
+        self.assertEqual(response_cache.stats()['hits'], 0)
+
+    def test_delete_invalidates(self):
+        self.summary(include_urls='false')
+        Appointment.objects.filter(scheduled_at__date=date(2030, 3, 10)).delete()
+        self.assertEqual(len(self.summary(include_urls='false').data), 1)
+
+    def test_open_ended_summary_sees_later_bookings(self):
+        self.summary(end_date='')
+        self.book(date(2031, 1, 5))
+        dates = [entry['date'] for entry in self.summary(end_date='').data]
+        self.assertEqual(dates[-1], '2031-01-05')
+
+    def test_user_change_invalidates_doctor_name_filter(self):
+        self.assertEqual(len(self.summary(doctor_name='doc').data), 2)
+        self.doctor_user.username = 'physician'
+        self.doctor_user.save()
+        self.assertEqual(self.summary(doctor_name='doc').data, [])
+
+    def test_admin_list_pages_are_cached_and_invalidated(self):
+        url = reverse('appointment-list')
+        first_page = self.client.get(url, {'page_size': 2})
+        self.assertEqual(self.client.get(url, {'page_size': 2}).data, first_page.data)
+        last_page = self.client.get(first_page.data['next'])
+        self.assertEqual(len(last_page.data['results']), 1)
+
+        self.book(date(2030, 3, 25))
+        last_page = self.client.get(first_page.data['next'])
+        self.assertEqual(len(last_page.data['results']), 2)
+        self.assertEqual(self.client.get(url, {'page_size': 2}).data, first_page.data)
+        self.assertEqual(response_cache.stats()['hits'], 2)
+
+    def test_write_between_build_and_store_is_not_served(self):
+        build_summary = AppointmentSummaryAPIView.build_summary
+
+        def build_then_book(view, *args, **kwargs):
+            data = build_summary(view, *args, **kwargs)
+            self.book(date(2030, 3, 12))
+            return data
+
+        with mock.patch.object(AppointmentSummaryAPIView, 'build_summary', build_then_book):
+            self.assertEqual(len(self.summary().data), 2)
+        self.assertEqual(len(self.summary().data), 3)
+        self.assertEqual(response_cache.stats()['hits'], 0)
+
+    def test_write_between_page_read_and_store_is_not_served(self):
+        url = reverse('appointment-list')
+        get_page = AppointmentListAPIView.get_page
+
+        def read_then_book(view, *args, **kwargs):
+            page = get_page(view, *args, **kwargs)
+            self.book(date(2030, 3, 10), hour=8)
+            return page
+
+        with mock.patch.object(AppointmentListAPIView, 'get_page', read_then_book):
+            self.assertEqual(len(self.client.get(url).data['results']), 3)
+        self.assertEqual(len(self.client.get(url).data['results']), 4)
+        self.assertEqual(response_cache.stats()['hits'], 0)
+
+    def test_covering_buckets(self):
+        self.assertEqual(
+            covering_buckets(date(2029, 12, 30), date(2031, 2, 2)),
+            ['d:2029-12-30', 'd:2029-12-31', 'y1:2030', 'm:2031-01', 'd:2031-02-01', 'd:2031-02-02'],
+        )
+        self.assertLess(len(covering_buckets(date(2024, 5, 3), date.max)), 100)
+
+    def test_cache_stats_include_token_and_role_caches(self):
+        token_cache.clear()
+        role_cache.clear()
+        token = Token.objects.create(user=self.admin_user)
+        self.client.force_authenticate(user=None)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.get(reverse('appointment-cache-stats'))
+        get_roles([self.doctor_user.id])
+        response = self.client.get(reverse('appointment-cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['hits'], 0)
+        self.assertEqual(response.data['token_cache'], {'hits': 1, 'misses': 1, 'hit_ratio': 0.5, 'size': 1})
+        self.assertEqual(response.data['role_cache']['size'], 1)
+
+    def test_cache_stats_admin_only(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        response = self.client.get(reverse('appointment-cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AppointmentCalendarTests(RoleUsersMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_doctor = create_user('otherdoctor', 'doctor')
+
+    def setUp(self):
+        # Wednesday 2030-01-09; its week runs from Monday the 7th to Sunday the 13th.
+        self.day = date(2030, 1, 9)
+        self.at = lambda day, hour, minute=0: timezone.make_aware(datetime(2030, 1, day, hour, minute))
+        for doctor, scheduled_at in (
+            (self.doctor_user, self.at(7, 9)),
+            (self.doctor_user, self.at(9, 10)),
+            (self.doctor_user, self.at(9, 10, 30)),
+            (self.doctor_user, self.at(13, 16)),
+            (self.doctor_user, self.at(14, 9)),
+            (self.doctor_user, self.at(31, 9)),
+            (self.other_doctor, self.at(9, 10)),
+        ):
+            Appointment.objects.create(doctor=doctor, patient=self.patient_user, scheduled_at=scheduled_at)
+        self.calendar_url = reverse('appointment-calendar')
+
+    def test_week_grid(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.calendar_url, {'date': self.day.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('JOIN', queries[0]['sql'])
+        data = response.data
+        self.assertEqual((data['doctor'], data['view']), (self.doctor_user.id, 'week'))
+        self.assertEqual((data['start_date'], data['end_date'], data['total']), ('2030-01-07', '2030-01-13', 4))
+        self.assertEqual([day['date'] for day in data['days']], [f'2030-01-{day:02d}' for day in range(7, 14)])
+        self.assertEqual([day['count'] for day in data['days']], [1, 0, 2, 0, 0, 0, 1])
+        wednesday = data['days'][2]['hours']
+        self.assertEqual(list(wednesday), ['10:00'])
+        self.assertEqual([entry['patient_username'] for entry in wednesday['10:00']], ['patient', 'patient'])
+        self.assertEqual(
+            [entry['scheduled_at'] for entry in wednesday['10:00']],
+            [datetime_formatter()(self.at(9, 10)), datetime_formatter()(self.at(9, 10, 30))],
+        )
+
+    def test_month_grid_for_admin(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(self.calendar_url, {'view': 'month', 'date': '2030-01-20', 'doctor': self.doctor_user.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['start_date'], response.data['end_date']), ('2030-01-01', '2030-01-31'))
+        self.assertEqual(len(response.data['days']), 31)
+        self.assertEqual(response.data['total'], 6)
+        self.assertEqual(list(response.data['days'][30]['hours']), ['09:00'])
+
+    def test_invalid_requests(self):
+        self.client.force_authenticate(user=self.admin_user)
+        for params, expected in (
+            ({}, status.HTTP_400_BAD_REQUEST),
+            ({'doctor': self.patient_user.id}, status.HTTP_404_NOT_FOUND),
+            ({'doctor': 10 ** 30}, status.HTTP_400_BAD_REQUEST),
+            ({'doctor': -1}, status.HTTP_400_BAD_REQUEST),
+            ({'doctor': self.doctor_user.id, 'view': 'year'}, status.HTTP_400_BAD_REQUEST),
+            ({'doctor': self.doctor_user.id, 'date': '2030-13-01'}, status.HTTP_400_BAD_REQUEST),
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.calendar_url, params).status_code, expected)
+
+    def test_doctor_sees_only_own_and_patient_forbidden(self):
+        self.client.force_authenticate(user=self.other_doctor)
+        response = self.client.get(self.calendar_url, {'date': self.day.isoformat(), 'doctor': self.doctor_user.id})
+        self.assertEqual((response.data['doctor'], response.data['total']), (self.other_doctor.id, 1))
+        self.client.force_authenticate(user=self.patient_user)
+        self.assertEqual(self.client.get(self.calendar_url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AppointmentUtilizationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = create_user('admin', 'admin')
+        cls.cardiologist = create_user('cardio', 'doctor', specialization='Cardiology')
+        cls.dermatologist = create_user('derma', 'doctor', specialization='Dermatology')
+        cls.patient_user = create_user('patient', 'patient')
+
+    def setUp(self):
+        # Two full weeks, Monday 2030-01-07 to Sunday 2030-01-20, so every hour of the
+        # week has 2 working days x 2 slots of 30 minutes = 4 slots per doctor.
+        self.params = {'start_date': '2030-01-07', 'end_date': '2030-01-20'}
+        self.at = lambda day, hour, minute=0: timezone.make_aware(datetime(2030, 1, day, hour, minute))
+        for doctor, scheduled_at in (
+            (self.cardiologist, self.at(7, 9)),
+            (self.cardiologist, self.at(7, 9, 30)),
+            (self.cardiologist, self.at(14, 9)),
+            (self.cardiologist, self.at(16, 15, 30)),
+            (self.dermatologist, self.at(8, 10)),
+            (self.dermatologist, self.at(21, 10)),
+        ):
+            Appointment.objects.create(doctor=doctor, patient=self.patient_user, scheduled_at=scheduled_at)
+        self.url = reverse('appointment-utilization')
+
+    def test_heatmap_percentiles_and_trend(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(self.url, {**self.params, 'rolling_weeks': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual((data['appointments'], data['slots_per_doctor'], data['specialization']), (5, 224, None))
+
+        cardio, derma = data['doctors']
+        self.assertEqual((cardio['doctor'], cardio['appointments']), (self.cardiologist.id, 4))
+        self.assertEqual(cardio['utilization'], round(4 / 224, 4))
+        self.assertEqual(cardio['heatmap'][0][9], 0.75)
+        self.assertEqual(cardio['heatmap'][2][15], 0.25)
+        self.assertEqual(cardio['heatmap'][0][10], 0.0)
+        self.assertIsNone(cardio['heatmap'][0][8])
+        self.assertEqual(derma['heatmap'][1][10], 0.25)
+        self.assertEqual(data['heatmap'][0][9], 0.375)
+
+        self.assertEqual(data['percentiles']['p50'], round((4 / 224 + 1 / 224) / 2, 4))
+        self.assertEqual(data['weekly'], [
+            {'week_start': '2030-01-07', 'appointments': 3, 'change': None, 'rolling_average': None},
+            {'week_start': '2030-01-14', 'appointments': 2, 'change': -1, 'rolling_average': 2.5},
+        ])
+
+    def test_specialization_filter(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(self.url, {**self.params, 'specialization': 'dermatology'})
+        self.assertEqual([doctor['doctor'] for doctor in response.data['doctors']], [self.dermatologist.id])
+        self.assertEqual(response.data['appointments'], 1)
+        self.assertEqual(response.data['heatmap'], response.data['doctors'][0]['heatmap'])
+
+    @override_settings(TIME_ZONE='Asia/Kolkata')
+    def test_local_time_buckets(self):
+        # 09:00 in Kolkata is 03:30 UTC; the offset is not a whole hour.
+        Appointment.objects.all().delete()
+        Appointment.objects.create(doctor=self.cardiologist, patient=self.patient_user, scheduled_at=self.at(9, 9))
+        report = UtilizationReport([(self.cardiologist.id, 'cardio', 'Cardiology')], date(2030, 1, 7), date(2030, 1, 20))
+        heatmap = report.load(Appointment.objects.all()).as_dict()['doctors'][0]['heatmap']
+        self.assertEqual(heatmap[2][9], 0.25)
+
+    def test_chunking_and_backends_agree(self):
+        doctors = list(User.objects.filter(role='doctor').order_by('pk').values_list('pk', 'username', 'specialization'))
+        expected = UtilizationReport(doctors, date(2030, 1, 7), date(2030, 1, 20), use_numpy=False).load(
+            Appointment.objects.all()
+        ).as_dict()
+        report = UtilizationReport(doctors, date(2030, 1, 7), date(2030, 1, 20), chunk_size=2, use_numpy=False)
+        self.assertEqual(report.load(Appointment.objects.all()).as_dict(), expected)
+        self.assertEqual(percentile([4, 1, 3, 2], 0.5), 2.5)
+        self.assertAlmostEqual(percentile([1, 2, 3, 4, 5], 0.9), 4.6)
+        self.assertIsNone(percentile([], 0.5))
+        self.assertEqual(percentile([], 0.5, default=0.0), 0.0)
+
+    @skipUnless(np, 'NumPy is not installed.')
+    def test_numpy_backend_agrees(self):
+        doctors = list(User.objects.filter(role='doctor').order_by('pk').values_list('pk', 'username', 'specialization'))
+        expected = UtilizationReport(doctors, date(2030, 1, 7), date(2030, 1, 20), use_numpy=False).load(
+            Appointment.objects.all()
+        ).as_dict()
+        for chunk_size in (None, 2):
+            with self.subTest(chunk_size=chunk_size):
+                report = UtilizationReport(doctors, date(2030, 1, 7), date(2030, 1, 20), chunk_size=chunk_size)
+                self.assertIs(report.np, np)
+                self.assertEqual(report.load(Appointment.objects.all()).as_dict(), expected)
+
+    def test_forbidden_and_invalid(self):
+        self.client.force_authenticate(user=self.cardiologist)
+        self.assertEqual(self.client.get(self.url, self.params).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.admin_user)
+        for params in ({}, {**self.params, 'rolling_weeks': 0}, {**self.params, 'end_date': '2029-12-31'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncAppointmentViewTests(RoleUsersMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_doctor = create_user('other', 'doctor')
+
+    def setUp(self):
+        start = timezone.now() + timezone.timedelta(days=1)
+        for index in range(5):
+            Appointment.objects.create(
+                doctor=self.doctor_user if index % 2 else self.other_doctor,
+                patient=self.patient_user,
+                scheduled_at=start + timezone.timedelta(hours=index),
+            )
+        self.appointment = Appointment.objects.filter(doctor=self.doctor_user).first()
+        self.tokens = {user: Token.objects.create(user=user).key for user in (self.admin_user, self.doctor_user, self.patient_user)}
+
+    def auth(self, user):
+        return {'authorization': f'Token {self.tokens[user]}'}
+
+    async def test_list_matches_sync_view(self):
+        for user in (self.admin_user, self.doctor_user):
+            response = await self.async_client.get(reverse('appointment-list-async'), {'page_size': 2}, headers=self.auth(user))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            expected = await sync_to_async(self.sync_get)(user, reverse('appointment-list'), {'page_size': 2})
+            data = response.json()
+            self.assertEqual(data['results'], expected['results'])
+            self.assertEqual(data['next'] is None, expected['next'] is None)
+
+    async def test_list_forbidden_for_patient(self):
+        response = await self.async_client.get(reverse('appointment-list-async'), headers=self.auth(self.patient_user))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(reverse('appointment-list-async'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+        response = await self.async_client.get(reverse('appointment-list-async'), headers={'authorization': 'Token nope'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_detail(self):
+        url = reverse('appointment-detail-async', args=[self.appointment.pk])
+        response = await self.async_client.get(url, headers=self.auth(self.doctor_user))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = await sync_to_async(self.sync_get)(self.doctor_user, reverse('appointment-detail', args=[self.appointment.pk]))
+        self.assertEqual(response.json(), expected)
+
+        response = await self.async_client.get(url, headers=self.auth(self.patient_user))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = await self.async_client.get(reverse('appointment-detail-async', args=[0]), headers=self.auth(self.admin_user))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_detail_forbidden_for_other_doctor(self):
+        other = await Appointment.objects.filter(doctor=self.other_doctor).afirst()
+        response = await self.async_client.get(reverse('appointment-detail-async', args=[other.pk]), headers=self.auth(self.doctor_user))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_summary_matches_sync_view(self):
+        params = {'start_date': timezone.localdate().isoformat()}
+        for extra in ({}, {'include_urls': 'false'}, {'doctor_name': 'doc'}):
+            response_cache.cache.clear()
+            response = await self.async_client.get(
+                reverse('appointment-summary-async'), {**params, **extra}, headers=self.auth(self.admin_user)
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response_cache.cache.clear()
+            expected = await sync_to_async(self.sync_get)(self.admin_user, reverse('appointment-summary'), {**params, **extra})
+            self.assertEqual(response.json(), expected)
+
+        response = await self.async_client.get(reverse('appointment-summary-async'), headers=self.auth(self.admin_user))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = await self.async_client.get(reverse('appointment-summary-async'), params, headers=self.auth(self.doctor_user))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def sync_get(self, user, url, params=None):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.client = APIClient()
+        self.shim = SQLiteReplicationShim()
+        self.admin_user = create_user('admin', 'admin')
+        self.doctor_user = create_user('doctor', 'doctor')
+        self.patient_user = create_user('patient', 'patient')
+        self.shim.replicate()
+        self.list_url = reverse('appointment-list')
+
+    def book(self, hours):
+        return Appointment.objects.create(
+            doctor=self.doctor_user,
+            patient=self.patient_user,
+            scheduled_at=timezone.now() + timezone.timedelta(hours=hours),
+        )
+
+    def listed_ids(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [appointment['id'] for appointment in response.data['results']]
+
+    def test_reads_use_replica_until_replicated(self):
+        appointment = self.book(24)
+        self.assertEqual(self.listed_ids(), [])
+        self.shim.replicate()
+        self.assertEqual(self.listed_ids(), [appointment.id])
+
+    def test_write_pins_client_to_primary(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.post(reverse('appointment-create'), {
+            'doctor': self.doctor_user.id,
+            'patient': self.patient_user.id,
+            'scheduled_at': (timezone.now() + timezone.timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('db_primary', response.cookies)
+
+        self.assertEqual(self.listed_ids(), [response.data['id']])
+        self.client.cookies.pop('db_primary')
+        self.assertEqual(self.listed_ids(), [])
+
+    def test_expired_cookie_reads_replica(self):
+        self.book(24)
+        self.client.cookies['db_primary'] = '0'
+        self.assertEqual(self.listed_ids(), [])
+
+    def test_router(self):
+        router = PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_read(Appointment), 'replica')
+        self.assertIsNone(router.db_for_read(Token))
+        self.assertEqual(router.db_for_write(Appointment), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'appointments'))
+        with pin_to_primary():
+            self.assertEqual(router.db_for_read(User), 'default')
+
+
+class SQLiteProductionProfileTests(APITestCase):
+    def locked_execute(self, failures):
+        calls = []
+
+        def execute(sql, params, many, context):
+            calls.append(sql)
+            if len(calls) <= failures:
+                raise OperationalError('database is locked')
+            return 'done'
+        return execute, calls
+
+    def test_retries_statements_outside_transactions(self):
+        retry = LockRetry(mock.Mock(in_atomic_block=False), retries=3, backoff=0)
+        execute, calls = self.locked_execute(failures=2)
+        self.assertEqual(retry(execute, 'INSERT INTO t VALUES (1)', None, False, {}), 'done')
+        self.assertEqual(len(calls), 3)
+
+    def test_gives_up_after_retries(self):
+        retry = LockRetry(mock.Mock(in_atomic_block=False), retries=2, backoff=0)
+        execute, calls = self.locked_execute(failures=5)
+        with self.assertRaises(OperationalError):
+            retry(execute, 'INSERT INTO t VALUES (1)', None, False, {})
+        self.assertEqual(len(calls), 3)
+
+    def test_does_not_retry_inside_transaction(self):
+        retry = LockRetry(mock.Mock(in_atomic_block=True), retries=3, backoff=0)
+        execute, calls = self.locked_execute(failures=1)
+        with self.assertRaises(OperationalError):
+            retry(execute, 'UPDATE t SET a = 1', None, False, {})
+        self.assertEqual(len(calls), 1)
+
+        execute, calls = self.locked_execute(failures=1)
+        self.assertEqual(retry(execute, 'BEGIN IMMEDIATE', None, False, {}), 'done')
+
+    def test_profile_applies_pragmas(self):
+        with tempfile.TemporaryDirectory() as directory:
+            settings_dict = connections.configure_settings({
+                'default': {**settings.SQLITE_PRODUCTION_PROFILE, 'NAME': f'{directory}/db.sqlite3'},
+            })['default']
+            wrapper = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, 'profile')
+            try:
+                with wrapper.cursor() as cursor:
+                    pragmas = {}
+                    for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size'):
+                        cursor.execute(f'PRAGMA {name}')
+                        pragmas[name] = cursor.fetchone()[0]
+                self.assertEqual(wrapper.transaction_mode, 'IMMEDIATE')
+            finally:
+                wrapper.close()
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000, 'mmap_size': 268435456})
+
+
+class BenchCommandTests(TransactionTestCase):
+    # Worker threads open their own connections, which only see committed rows.
+
+    def run_bench(self, *args, concurrency=1):
+        stdout = StringIO()
+        call_command(
+            'bench', '--doctors', '2', '--patients', '3', '--appointments', '10',
+            '--requests', '3', '--concurrency', str(concurrency), *args, stdout=stdout, stderr=StringIO(),
+        )
+        return json.loads(stdout.getvalue())
+
+    def test_reports_every_endpoint(self):
+        report = self.run_bench('--cleanup')
+        self.assertEqual(report['dataset'], {'doctors': 2, 'patients': 3, 'appointments': 10})
+        self.assertEqual(set(report['endpoints']), {'login', 'list', 'detail', 'summary', 'create', 'user_list'})
+        for name, result in report['endpoints'].items():
+            self.assertTrue(all(code.startswith('2') for code in result['statuses']), name)
+            self.assertEqual(sum(result['statuses'].values()), 3)
+            self.assertGreater(result['queries_per_request'], 0 if name == 'summary' else 0.5)
+            self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'])
+        self.assertGreater(report['peak_rss_mib'], 0)
+        self.assertFalse(User.objects.filter(username__startswith='bench_').exists())
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_concurrent_requests_count_queries(self):
+        # The in-memory test database reports concurrent writes as locked tables
+        # instead of waiting, so only read endpoints run in parallel here.
+        report = self.run_bench('--endpoints', 'detail', 'user_list', '--cleanup', concurrency=4)
+        for name, result in report['endpoints'].items():
+            self.assertEqual(result['statuses'], {'200': 3}, name)
+            self.assertGreater(result['queries_per_request'], 0.5, name)
+
+    def test_baseline_regression_fails(self):
+        report = self.run_bench('--endpoints', 'detail')
+        report['endpoints']['detail']['queries_per_request'] = 0
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as baseline:
+            json.dump(report, baseline)
+            baseline.flush()
+            with self.assertRaisesMessage(CommandError, 'detail: queries'):
+                self.run_bench('--endpoints', 'detail', '--baseline', baseline.name, '--tolerance', '100')
+
+
+class SeedDataTests(APITestCase):
+    def seed(self, *args):
+        stdout = StringIO()
+        call_command(
+            'seed_data', '--doctors', '3', '--patients', '5', '--appointments', '40',
+            '--start-date', '2030-01-07', *args, stdout=stdout,
+        )
+        return stdout.getvalue()
+
+    def bookings(self):
+        return list(
+            Appointment.objects.order_by('doctor__username', 'scheduled_at')
+            .values_list('doctor__username', 'patient__username', 'scheduled_at')
+        )
+
+    def test_seeds_consistent_data(self):
+        output = self.seed()
+        self.assertIn('Seeded 9 users, 40 appointments', output)
+        self.assertEqual(User.objects.filter(role='doctor', username__startswith='seed_').count(), 3)
+        self.assertEqual(len({user.password for user in User.objects.filter(username__startswith='seed_')}), 1)
+        self.assertTrue(User.objects.get(username='seed_patient_0').check_password('seed-password'))
+        self.assertTrue(User.objects.get(username='seed_admin_0').is_superuser)
+
+        work_start, work_end = settings.APPOINTMENT_WORKING_HOURS
+        for appointment in Appointment.objects.select_related('doctor', 'patient'):
+            local = timezone.localtime(appointment.scheduled_at)
+            self.assertGreaterEqual(local.strftime('%H:%M'), work_start)
+            self.assertLess(local.strftime('%H:%M'), work_end)
+            self.assertGreaterEqual(local.date(), date(2030, 1, 7))
+            self.assertEqual((appointment.doctor.role, appointment.patient.role), ('doctor', 'patient'))
+            self.assertFalse(Appointment.objects.overlapping(
+                appointment.doctor_id, appointment.scheduled_at, exclude_pk=appointment.pk
+            ).exists())
+
+        counts = set(AppointmentDailyCount.objects.values_list('date', 'doctor_id', 'count'))
+        call_command('rebuild_appointment_rollup', stdout=StringIO())
+        self.assertEqual(set(AppointmentDailyCount.objects.values_list('date', 'doctor_id', 'count')), counts)
+
+    def test_same_seed_gives_same_data(self):
+        self.seed()
+        first = self.bookings()
+        self.seed('--flush')
+        self.assertEqual(self.bookings(), first)
+        self.seed('--flush', '--seed', '1')
+        self.assertNotEqual(self.bookings(), first)
+
+    def test_flush_only_deletes_its_prefix(self):
+        self.seed()
+        self.seed('--prefix', 'other_')
+        other = Appointment.objects.filter(doctor__username__startswith='other_').count()
+        self.assertIn('Deleted 9 previously seeded users', self.seed('--flush'))
+        self.assertEqual(Appointment.objects.filter(doctor__username__startswith='other_').count(), other)
+        self.assertEqual(Appointment.objects.count(), other + 40)
+        counts = set(AppointmentDailyCount.objects.values_list('date', 'doctor_id', 'count'))
+        call_command('rebuild_appointment_rollup', stdout=StringIO())
+        self.assertEqual(set(AppointmentDailyCount.objects.values_list('date', 'doctor_id', 'count')), counts)
+
+    def test_rejects_existing_prefix_and_full_calendar(self):
+        self.seed()
+        with self.assertRaisesMessage(CommandError, 'already exist'):
+            self.seed()
+        with self.assertRaisesMessage(CommandError, 'cannot take'):
+            self.seed('--prefix', 'full_', '--days', '1', '--appointments', '60')
+        self.assertFalse(User.objects.filter(username__startswith='full_').exists())
+
+
+class PerformanceMiddlewareTests(RoleUsersMixin, APITestCase):
+    def setUp(self):
+        self.appointment = Appointment.objects.create(
+            doctor=self.doctor_user, patient=self.patient_user, scheduled_at=timezone.now() + timezone.timedelta(days=1)
+        )
+        slow_request_log.clear()
+
+    def timings(self, response):
+        return {
+            part.split(';')[0]: part.split(';', 1)[1]
+            for part in response['Server-Timing'].split(', ')
+        }
+
+    def test_server_timing_header(self):
+        self.client.force_authenticate(user=self.admin_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('appointment-detail', args=[self.appointment.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {'db', 'view', 'render', 'total'})
+        self.assertIn(f'desc="{len(queries)} queries"', timings['db'])
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged_and_buffered(self):
+        self.client.force_authenticate(user=self.admin_user)
+        with self.assertLogs('restapis.performance', 'WARNING') as logs:
+            self.client.get(reverse('appointment-detail', args=[self.appointment.id]))
+            response = self.client.get(reverse('slow-requests'))
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual((entry['path'], entry['status']), (reverse('appointment-detail', args=[self.appointment.id]), 200))
+        self.assertGreater(entry['size'], 0)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        latest = response.data[0]
+        self.assertEqual(latest['path'], entry['path'])
+        self.assertEqual(len(latest['sql']), latest['queries'])
+        self.assertTrue(any('appointments_appointment' in query['sql'] for query in latest['sql']))
+
+    def test_slow_requests_admin_only(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        response = self.client.get(reverse('slow-requests'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION=False, SLOW_REQUEST_MS=0)
+    def test_disabled(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(reverse('appointment-detail', args=[self.appointment.id]))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(slow_request_log.recent(), [])
+
+
+class RendererTests(RoleUsersMixin, APITestCase):
+    def setUp(self):
+        self.appointment = Appointment.objects.create(
+            doctor=self.doctor_user, patient=self.patient_user, scheduled_at=timezone.now() + timezone.timedelta(days=1)
+        )
+        self.payload = ReturnDict({
+            'at': datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=dt_timezone.utc),
+            'day': date(2024, 5, 6),
+            'price': Decimal('12.50'),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'label': gettext_lazy('Appointments'),
+            'text': 'caf\u00e9 \u2028 \u2029 "quoted"',
+            'counts': {1: 2},
+            'rows': ReturnList([{'id': 1, 'ok': True, 'none': None, 'ratio': 0.25}], serializer=None),
+        }, serializer=None)
+
+    @skipUnless(orjson, 'orjson is not installed')
+    def test_fast_json_matches_drf(self):
+        for data in (self.payload, {'big': 2 ** 70}, [], 'text', None):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        indented = 'application/json; indent=4'
+        self.assertEqual(
+            FastJSONRenderer().render(self.payload, indented), JSONRenderer().render(self.payload, indented)
+        )
+
+    @skipUnless(orjson, 'orjson is not installed')
+    def test_fast_json_parser(self):
+        body = '{"name": "caf\u00e9", "ids": [1, 2]}'
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(body.encode())), {'name': 'caf\u00e9', 'ids': [1, 2]})
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(body.encode('latin-1')), parser_context={'encoding': 'latin-1'}),
+            {'name': 'caf\u00e9', 'ids': [1, 2]},
+        )
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"name": NaN}'))
+
+    def test_api_renders_and_parses_json(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(reverse('appointment-list'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        response = self.client.post(reverse('appointment-create'), json.dumps({
+            'doctor': self.doctor_user.id,
+            'patient': self.patient_user.id,
+            'scheduled_at': (timezone.now() + timezone.timedelta(days=2)).isoformat(),
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(reverse('appointment-create'), '{"doctor":', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_msgpack_negotiation(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(reverse('appointment-list'), HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(JSONRenderer().render(response.data)))
+        body = msgpack.packb({
+            'doctor': self.doctor_user.id,
+            'patient': self.patient_user.id,
+            'scheduled_at': (timezone.now() + timezone.timedelta(days=2)).isoformat(),
+        })
+        response = self.client.post(
+            reverse('appointment-create'), body, content_type='application/msgpack', HTTP_ACCEPT='application/msgpack'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(msgpack.unpackb(response.content)['doctor'], self.doctor_user.id)
+
+    @skipIf(msgpack, 'msgpack is installed')
+    def test_msgpack_not_acceptable_without_msgpack(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(reverse('appointment-list'), HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_renderers', rows=20, repeat=1, stdout=out, stderr=StringIO())
+        results = json.loads(out.getvalue())
+        self.assertEqual(results['drf_json']['rows'], 20)
+        if orjson is not None:
+            self.assertEqual(results['fast_json']['bytes'], results['drf_json']['bytes'])
+
+
+@override_settings(SLOW_REQUEST_MS=60000)
+class EndpointQueryBudgetTests(RoleUsersMixin, QueryBudgetMixin, APITestCase):
+    """
+    Runs every endpoint of `users.urls` and `appointments.urls` before and after
+    the dataset grows, and checks its query count stays the same and within budget.
+    """
+    # URL name -> {method or label: budget}. New endpoints must be added here.
+    budgets = {
+        'login': {'post': 2},
+        'login-async': {'post': 1},
+        'user-list': {'get': 1, 'get_role': 1},
+        'user-detail': {'get': 1, 'put': 3, 'delete': 9},
+        'user-create': {'post': 3},
+        'user-import': {'post': 4},
+        'appointment-list': {'get': 1, 'get_doctor': 1},
+        'appointment-detail': {'get': 2, 'put': 12, 'delete': 3},
+        'appointment-summary': {'get': 1},
+        'appointment-free-slots': {'get': 2},
+        'appointment-calendar': {'get': 2, 'get_doctor': 1},
+        'appointment-utilization': {'get': 2},
+        'appointment-cache-stats': {'get': 0},
+        'appointment-export': {'get': 1},
+        'appointment-create': {'post': 9},
+        'appointment-bulk-create': {'post': 13},
+        'appointment-list-async': {'get': 2},
+        'appointment-detail-async': {'get': 2},
+        'appointment-summary-async': {'get': 2},
+    }
+
+    def setUp(self):
+        self.token = Token.objects.create(user=self.admin_user).key
+        Token.objects.create(user=self.doctor_user)
+        self.today = timezone.localdate()
+        self.start = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0) + timezone.timedelta(days=1)
+        self.appointment = Appointment.objects.create(
+            doctor=self.doctor_user, patient=self.patient_user, scheduled_at=self.start
+        )
+        self.counter = iter(range(1, 1000))
+        self.client.force_authenticate(user=self.admin_user)
+
+    def reset_query_caches(self):
+        super().reset_query_caches()
+        token_cache.clear()
+        role_cache.clear()
+
+    def grow(self):
+        DataSeeder(prefix=f'grow{next(self.counter)}_', start_date=self.today, days=7).seed_data(
+            doctors=3, patients=5, appointments=60, admins=0
+        )
+
+    def fresh_slot(self):
+        return self.start + timezone.timedelta(days=30 + next(self.counter))
+
+    def fresh_user(self, role='patient'):
+        index = next(self.counter)
+        return User.objects.create_user(
+            username=f'fresh{index}', email=f'fresh{index}@example.com', password='freshpass', role=role
+        )
+
+    def fresh_appointment(self):
+        return Appointment.objects.create(
+            doctor=self.doctor_user, patient=self.patient_user, scheduled_at=self.fresh_slot()
+        )
+
+    def fresh_user_rows(self):
+        return [
+            {'username': f'imported{next(self.counter)}', 'email': 'imported@example.com', 'password': 'importpass', 'role': 'patient'}
+            for _ in range(2)
+        ]
+
+    def requests(self):
+        """
+        Return, per URL name and label, a function preparing one request and
+        returning a callable that sends it and checks its status.
+        """
+        week = {'start_date': self.today.isoformat(), 'end_date': (self.today + timezone.timedelta(days=6)).isoformat()}
+        token = {'authorization': f'Token {self.token}'}
+
+        def send(method, url, expected, data=None, stream=False, **kwargs):
+            def request():
+                response = getattr(self.client, method)(url, data, **kwargs)
+                if stream:
+                    b''.join(response.streaming_content)
+                self.assertEqual(response.status_code, expected, getattr(response, 'data', None))
+            return request
+
+        def as_doctor(request):
+            def wrapped():
+                self.client.force_authenticate(user=self.doctor_user)
+                try:
+                    request()
+                finally:
+                    self.client.force_authenticate(user=self.admin_user)
+            return wrapped
+
+        return {
+            'login': {
+                'post': lambda: send('post', reverse('login'), 200, {'username': 'doctor', 'password': 'doctorpass'}),
+            },
+            'login-async': {
+                'post': lambda: send(
+                    'post', reverse('login-async'), 200, {'username': 'doctor', 'password': 'doctorpass'}, format='json'
+                ),
+            },
+            'user-list': {
+                'get': lambda: send('get', reverse('user-list'), 200),
+                'get_role': lambda: send('get', reverse('user-list'), 200, {'role': 'doctor'}),
+            },
+            'user-detail': {
+                'get': lambda: send('get', reverse('user-detail', args=[self.doctor_user.pk]), 200),
+                'put': lambda: send(
+                    'put', reverse('user-detail', args=[self.doctor_user.pk]), 200,
+                    {'username': 'doctor', 'email': 'doctor@example.com', 'role': 'doctor', 'first_name': 'Renamed'},
+                    format='json',
+                ),
+                'delete': lambda: send('delete', reverse('user-detail', args=[self.fresh_user().pk]), 204),
+            },
+            'user-create': {
+                'post': lambda: send('post', reverse('user-create'), 201, {
+                    'username': f'created{next(self.counter)}', 'email': 'created@example.com',
+                    'password': 'createdpass', 'role': 'patient',
+                }, format='json'),
+            },
+            'user-import': {
+                'post': lambda: send('post', reverse('user-import'), 201, self.fresh_user_rows(), format='json'),
+            },
+            'appointment-list': {
+                'get': lambda: send('get', reverse('appointment-list'), 200),
+                'get_doctor': lambda: as_doctor(send('get', reverse('appointment-list'), 200)),
+            },
+            'appointment-detail': {
+                'get': lambda: send('get', reverse('appointment-detail', args=[self.appointment.pk]), 200),
+                'put': lambda: send('put', reverse('appointment-detail', args=[self.appointment.pk]), 200, {
+                    'doctor': self.doctor_user.pk, 'patient': self.patient_user.pk, 'scheduled_at': self.fresh_slot().isoformat(),
+                }, format='json'),
+                'delete': lambda: send('delete', reverse('appointment-detail', args=[self.fresh_appointment().pk]), 204),
+            },
+            'appointment-summary': {
+                'get': lambda: send('get', reverse('appointment-summary'), 200, week),
+            },
+            'appointment-free-slots': {
+                'get': lambda: send('get', reverse('appointment-free-slots'), 200, {'start_date': self.today.isoformat()}),
+            },
+            'appointment-calendar': {
+                'get': lambda: send('get', reverse('appointment-calendar'), 200, {'doctor': self.doctor_user.pk}),
+                'get_doctor': lambda: as_doctor(send('get', reverse('appointment-calendar'), 200, {'view': 'month'})),
+            },
+            'appointment-utilization': {
+                'get': lambda: send('get', reverse('appointment-utilization'), 200, week),
+            },
+            'appointment-cache-stats': {
+                'get': lambda: send('get', reverse('appointment-cache-stats'), 200),
+            },
+            'appointment-export': {
+                'get': lambda: send('get', reverse('appointment-export'), 200, week, stream=True),
+            },
+            'appointment-create': {
+                'post': lambda: send('post', reverse('appointment-create'), 201, {
+                    'doctor': self.doctor_user.pk, 'patient': self.patient_user.pk, 'scheduled_at': self.fresh_slot().isoformat(),
+                }, format='json'),
+            },
+            'appointment-bulk-create': {
+                'post': lambda: send('post', reverse('appointment-bulk-create'), 201, [
+                    {'doctor': self.doctor_user.pk, 'patient': self.patient_user.pk, 'scheduled_at': self.fresh_slot().isoformat()}
+                    for _ in range(2)
+                ], format='json'),
+            },
+            'appointment-list-async': {
+                'get': lambda: send('get', reverse('appointment-list-async'), 200, headers=token),
+            },
+            'appointment-detail-async': {
+                'get': lambda: send(
+                    'get', reverse('appointment-detail-async', args=[self.appointment.pk]), 200, headers=token
+                ),
+            },
+            'appointment-summary-async': {
+                'get': lambda: send('get', reverse('appointment-summary-async'), 200, week, headers=token),
+            },
+        }
+
+    def test_every_endpoint_has_a_budget(self):
+        names = {pattern.name for pattern in [*users_urls.urlpatterns, *appointments_urls.urlpatterns]}
+        self.assertEqual(names, set(self.budgets))
+        self.assertEqual(
+            {name: set(labels) for name, labels in self.requests().items()},
+            {name: set(labels) for name, labels in self.budgets.items()},
+        )
+
+    def test_query_counts_do_not_grow(self):
+        for name, scenarios in self.requests().items():
+            for label, prepare in scenarios.items():
+                with self.subTest(endpoint=name, request=label):
+                    self.assertQueriesDoNotGrow(
+                        lambda request: request(), self.grow, budget=self.budgets[name][label], setup=prepare
+                    )
+
+
+class AppointmentRoleCacheTests(RoleUsersMixin, APITestCase):
+    def setUp(self):
+        self.start = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0) + timezone.timedelta(days=1)
+        role_cache.clear()
+
+    def user_queries(self, queries):
+        return [query['sql'] for query in queries.captured_queries if 'users_customuser' in query['sql']]
+
+    def test_save_from_ids_uses_cached_roles(self):
+        Appointment.objects.create(doctor_id=self.doctor_user.id, patient_id=self.patient_user.id, scheduled_at=self.start)
+        with CaptureQueriesContext(connection) as queries:
+            Appointment.objects.create(
+                doctor_id=self.doctor_user.id, patient_id=self.patient_user.id,
+                scheduled_at=self.start + timezone.timedelta(hours=1),
+            )
+        self.assertEqual(self.user_queries(queries), [])
+
+    def test_role_change_invalidates_cache(self):
+        get_roles([self.doctor_user.id])
+        self.doctor_user.role = 'patient'
+        self.doctor_user.save()
+        with self.assertRaises(DjangoValidationError):
+            Appointment.objects.create(doctor_id=self.doctor_user.id, patient_id=self.patient_user.id, scheduled_at=self.start)
+
+    def test_bulk_created_users_empty_the_cache(self):
+        get_roles([self.doctor_user.id])
+        DataSeeder(prefix='bulk_', start_date=self.start.date(), days=1).seed_data(
+            doctors=1, patients=1, appointments=0, admins=0
+        )
+        self.assertIsNone(role_cache.get(self.doctor_user.id))
+
+        get_roles([self.doctor_user.id])
+        UserImporter().import_rows([{'username': 'imported', 'email': 'imported@example.com', 'role': 'patient'}])
+        self.assertIsNone(role_cache.get(self.doctor_user.id))
+
+    def test_create_validates_once(self):
+        self.client.force_authenticate(user=self.admin_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('appointment-create'), {
+                'doctor': self.doctor_user.id, 'patient': self.patient_user.id, 'scheduled_at': self.start.isoformat(),
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['doctor'], self.doctor_user.id)
+        self.assertEqual(len(self.user_queries(queries)), 1)
+        selects = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertEqual(len([sql for sql in selects if 'appointments_appointment' in sql]), 1)
+        writes = [sql['sql'] for sql in queries.captured_queries if 'INTO "appointments_appointment"' in sql['sql']]
+        self.assertEqual(len(writes), 1)
+
+    def test_changed_values_are_validated_again(self):
+        Appointment.objects.create(doctor=self.doctor_user, patient=self.patient_user, scheduled_at=self.start)
+        appointment = Appointment(
+            doctor=self.doctor_user, patient=self.patient_user, scheduled_at=self.start + timezone.timedelta(hours=1)
+        )
+        appointment.mark_validated()
+        appointment.scheduled_at = self.start + timezone.timedelta(minutes=15)
+        with self.assertRaises(DjangoValidationError):
+            appointment.save()
+
+    def test_errors(self):
+        self.client.force_authenticate(user=self.admin_user)
+        Appointment.objects.create(doctor=self.doctor_user, patient=self.patient_user, scheduled_at=self.start)
+        url = reverse('appointment-create')
+        cases = [
+            ({'doctor': 0}, 'doctor', 'Invalid pk "0" - object does not exist.'),
+            ({'doctor': self.patient_user.id}, 'doctor', 'The selected user is not a doctor.'),
+            ({'patient': self.doctor_user.id}, 'patient', 'The selected user is not a patient.'),
+            ({'doctor': 'abc'}, 'doctor', 'Incorrect type. Expected pk value, received str.'),
+            ({'doctor': str(10 ** 30)}, 'doctor', f'Invalid pk "{10 ** 30}" - object does not exist.'),
+            ({'patient': str(-2 ** 63 - 1)}, 'patient', f'Invalid pk "{-2 ** 63 - 1}" - object does not exist.'),
+            ({}, 'non_field_errors', 'The fields doctor, scheduled_at must make a unique set.'),
+            ({'scheduled_at': (self.start + timezone.timedelta(minutes=15)).isoformat()}, 'scheduled_at', OVERLAP_MESSAGE),
+        ]
+        for overrides, field, message in cases:
+            with self.subTest(field=field, message=message):
+                data = {'doctor': self.doctor_user.id, 'patient': self.patient_user.id, 'scheduled_at': self.start.isoformat()}
+                response = self.client.post(url, {**data, **overrides}, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(response.data[field], [message])
+
+    def test_out_of_range_ids_are_rejected(self):
+        self.client.force_authenticate(user=self.admin_user)
+        appointment = Appointment.objects.create(doctor=self.doctor_user, patient=self.patient_user, scheduled_at=self.start)
+        data = {'doctor': str(10 ** 30), 'patient': self.patient_user.id, 'scheduled_at': self.start.isoformat()}
+        response = self.client.put(reverse('appointment-detail', args=[appointment.id]), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('doctor', response.data)
+        response = self.client.post(reverse('appointment-bulk-create'), [data], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('doctor', response.data['errors'][0])
@@ -1,9 +1,19 @@
 from django.urls import path
-from .views import AppointmentListAPIView, AppointmentCreateAPIView,AppointmentDetailAPIView, AppointmentSummaryAPIView
+from .views import AppointmentListAPIView, AppointmentCreateAPIView,AppointmentDetailAPIView, AppointmentSummaryAPIView, AppointmentExportAPIView, AppointmentBulkCreateAPIView, AppointmentFreeSlotsAPIView, AppointmentCacheStatsAPIView, AppointmentCalendarAPIView, AppointmentUtilizationAPIView
+from .views import AsyncAppointmentListView, AsyncAppointmentDetailView, AsyncAppointmentSummaryView
 
 urlpatterns = [
      path('appointments/', AppointmentListAPIView.as_view(), name='appointment-list'),
     path('appointments/<int:pk>/', AppointmentDetailAPIView.as_view(), name='appointment-detail'),
     path('appointments/summary/', AppointmentSummaryAPIView.as_view(), name='appointment-summary'),
+    path('appointments/free-slots/', AppointmentFreeSlotsAPIView.as_view(), name='appointment-free-slots'),
+    path('appointments/calendar/', AppointmentCalendarAPIView.as_view(), name='appointment-calendar'),
+    path('appointments/analytics/utilization/', AppointmentUtilizationAPIView.as_view(), name='appointment-utilization'),
+    path('appointments/cache-stats/', AppointmentCacheStatsAPIView.as_view(), name='appointment-cache-stats'),
+    path('appointments/export/', AppointmentExportAPIView.as_view(), name='appointment-export'),
     path('appointments/create/', AppointmentCreateAPIView.as_view(), name='appointment-create'),
+    path('appointments/bulk-create/', AppointmentBulkCreateAPIView.as_view(), name='appointment-bulk-create'),
+    path('appointments/async/', AsyncAppointmentListView.as_view(), name='appointment-list-async'),
+    path('appointments/async/<int:pk>/', AsyncAppointmentDetailView.as_view(), name='appointment-detail-async'),
+    path('appointments/async/summary/', AsyncAppointmentSummaryView.as_view(), name='appointment-summary-async'),
 ]
@@ -1,15 +1,43 @@
+import csv
+import io
+import json
+from collections import Counter
+from datetime import date
 from rest_framework import status, generics
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, NotFound, ParseError
+from rest_framework.request import Request
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.core.exceptions import PermissionDenied
-from django.db.models import Count
-from django.utils.dateparse import parse_date
-from .models import Appointment
-from .serializers import AppointmentSerializer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
+from django.views import View
+from restapis.conditional import ConditionalGetMixin
+from restapis.sparse import SparseFieldsMixin
+from users.authentication import CachedTokenAuthentication, token_cache
+from users.roles import MAX_USER_ID, get_roles, role_cache
+from .analytics import UtilizationReport
+from .caching import response_cache
+from .managers import day_bounds
+from .models import Appointment, AppointmentDailyCount, OVERLAP_MESSAGE
+from .pagination import AppointmentCursorPagination
+from .scheduling import ScheduleIndex, appointment_duration, candidate_slots
+from .serializers import (
+    UNIQUE_MESSAGE, AppointmentSerializer, AppointmentBulkItemSerializer, AppointmentReadSerializer,
+    appointment_url_template, datetime_formatter,
+)
 
-class AppointmentListAPIView(APIView):
+User = get_user_model()
+
+class AppointmentListAPIView(SparseFieldsMixin, ConditionalGetMixin, APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = AppointmentCursorPagination
 
     def get(self, request, *args, **kwargs):
         user_role = request.user.role
@@ -20,9 +48,64 @@ class AppointmentListAPIView(APIView):
             appointments = Appointment.objects.filter(doctor=request.user)
         else:
             return Response({'detail': 'Not authorized to view appointments'}, status=status.HTTP_403_FORBIDDEN)
-        
-        serializer = AppointmentSerializer(appointments, many=True, context={'request': request})
-        return Response(serializer.data)
+
+        fields = self.get_sparse_fields(request, AppointmentReadSerializer.fields)
+        if user_role != 'admin':
+            return self.get_page(request, appointments, fields)[1]
+
+        key = response_cache.make_key(
+            'list', user_role, request.build_absolute_uri('/'), sorted(request.query_params.lists()),
+        )
+        entry, snapshot = response_cache.get(key, *self.cursor_dates(request))
+        if entry is not None:
+            data, last_modified, version = entry
+            return self.evaluate_validators(request, last_modified, version) or Response(data)
+
+        paginator, response = self.get_page(request, appointments, fields)
+        if response.status_code == status.HTTP_200_OK:
+            start, end = self.page_dates(paginator)
+            response_cache.set(key, start, end, (response.data, *self.page_validators), snapshot)
+        return response
+
+    def get_page(self, request, appointments, fields=None):
+        """
+        Return the paginator and the response for the requested page, a 304
+        when the client's copy of the page is current.
+        """
+        serializer = AppointmentReadSerializer(request, fields=fields)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(serializer.get_rows(appointments, named=True), request, view=self)
+        self.page_validators = self.rows_validators(page, paginator.has_next, paginator.has_previous)
+        not_modified = self.evaluate_validators(request, *self.page_validators)
+        if not_modified is not None:
+            return paginator, not_modified
+        return paginator, paginator.get_paginated_response(serializer.serialize(page))
+
+    def cursor_dates(self, request):
+        """
+        Return the range of dates the requested page can come from, known before it is read.
+        """
+        cursor = self.pagination_class().decode_cursor(request)
+        if cursor is None:
+            return date.min, date.max
+        scheduled_at, _, reverse = cursor
+        day = Appointment.rollup_date(scheduled_at)
+        return (date.min, day) if reverse else (day, date.max)
+
+    def page_dates(self, paginator):
+        """
+        Return the range of dates a booking must fall in to change the page.
+
+        A page spans from its cursor to its far boundary row; a page without a
+        neighbour on one side is open-ended on that side.
+        """
+        boundaries = [paginator.first, paginator.last]
+        if paginator.cursor is not None:
+            boundaries.append(paginator.cursor[0])
+        days = [Appointment.rollup_date(getattr(b, 'scheduled_at', b)) for b in boundaries if b is not None]
+        start = min(days) if paginator.has_previous and days else date.min
+        end = max(days) if paginator.has_next and days else date.max
+        return start, end
 
 class AppointmentCreateAPIView(generics.CreateAPIView):
     serializer_class = AppointmentSerializer
@@ -33,19 +116,128 @@ class AppointmentCreateAPIView(generics.CreateAPIView):
             raise PermissionDenied("You do not have permission to create this resource.")
         serializer.save()
 
-class AppointmentDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+class AppointmentBulkCreateAPIView(APIView):
+    """
+    Creates a list of appointments in one request.
+
+    Roles of every referenced doctor and patient come from the role cache, with one query for those it misses, and
+    overlapping bookings are found with one more that loads a `ScheduleIndex`
+    covering the batch, both within the batch and against the database. The batch is inserted with `bulk_create` in a
+    single transaction, or rejected as a whole with one error entry per item.
+    """
+    permission_classes = [IsAuthenticated]
+    max_batch_size = 1000
+
+    def post(self, request, *args, **kwargs):
+        if request.user.role != 'admin':
+            raise PermissionDenied("You do not have permission to create this resource.")
+
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ParseError('Expected a non-empty list of appointments.')
+        if len(items) > self.max_batch_size:
+            raise ParseError(f'A batch may contain at most {self.max_batch_size} appointments.')
+
+        validated, errors = self.validate_batch(items)
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            appointments = self.create_batch(validated)
+        except IntegrityError:
+            return Response(
+                {'detail': 'One or more appointments collide with an existing booking.'},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        serializer = AppointmentSerializer(appointments, many=True, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def validate_batch(self, items):
+        """
+        Validate every item and return `(validated_data, errors)`, where `errors`
+        holds one dict per item (empty for valid items).
+        """
+        validated = []
+        errors = []
+        for item in items:
+            serializer = AppointmentBulkItemSerializer(data=item)
+            if serializer.is_valid():
+                validated.append(serializer.validated_data)
+                errors.append({})
+            else:
+                validated.append(None)
+                errors.append(dict(serializer.errors))
+
+        valid = [data for data in validated if data is not None]
+        roles = get_roles({data['doctor'] for data in valid} | {data['patient'] for data in valid})
+
+        schedules = None
+        if valid:
+            starts = [data['scheduled_at'] for data in valid]
+            schedules = ScheduleIndex.load(
+                {data['doctor'] for data in valid if data['doctor'] in roles}, min(starts), max(starts) + appointment_duration()
+            )
+
+        for data, item_errors in zip(validated, errors):
+            if data is None:
+                continue
+            for field, role in (('doctor', 'doctor'), ('patient', 'patient')):
+                pk = data[field]
+                if pk not in roles:
+                    item_errors[field] = [f'Invalid pk "{pk}" - object does not exist.']
+                elif roles[pk] != role:
+                    item_errors[field] = [f'The selected user is not a {role}.']
+
+            schedule = schedules.get(data['doctor'])
+            if schedule.contains(data['scheduled_at']):
+                item_errors['non_field_errors'] = [UNIQUE_MESSAGE]
+            elif schedule.overlaps(data['scheduled_at']):
+                item_errors['scheduled_at'] = [OVERLAP_MESSAGE]
+            schedule.add(data['scheduled_at'])
+
+        return validated, errors
+
+    def create_batch(self, validated):
+        """
+        Insert the validated appointments and update the daily rollup in one transaction.
+        """
+        appointments = [
+            Appointment(doctor_id=data['doctor'], patient_id=data['patient'], scheduled_at=data['scheduled_at'])
+            for data in validated
+        ]
+        buckets = Counter(
+            (Appointment.rollup_date(appointment.scheduled_at), appointment.doctor_id)
+            for appointment in appointments
+        )
+        with transaction.atomic():
+            Appointment.objects.bulk_create(appointments)
+            AppointmentDailyCount.objects.adjust_many(buckets)
+            response_cache.invalidate_dates({day for day, _ in buckets})
+        return appointments
+
+class AppointmentDetailAPIView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Appointment.objects.all()
     serializer_class = AppointmentSerializer
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
         appointment = super().get_object()
-        if self.request.user.role == 'doctor' and appointment.doctor != self.request.user:
+        if self.request.user.role == 'doctor' and appointment.doctor_id != self.request.user.pk:
             raise PermissionDenied("You do not have permission to access this appointment.")
         if self.request.user.role=="patient":
             raise PermissionDenied("You do not have permission to access appointments.")
         return appointment
 
+    def retrieve(self, request, *args, **kwargs):
+        if request.user.role in ('admin', 'doctor'):
+            row = Appointment.objects.filter(pk=kwargs['pk']).values_list('doctor_id', 'updated_at').first()
+            if row is not None and (request.user.role == 'admin' or row[0] == request.user.pk):
+                not_modified = self.evaluate_validators(request, row[1], kwargs['pk'])
+                if not_modified is not None:
+                    return not_modified
+        return super().retrieve(request, *args, **kwargs)
+
     def perform_update(self, serializer):
         if self.request.user.role != 'admin':
             raise PermissionDenied("You do not have permission to update this resource.")
@@ -56,60 +248,546 @@ class AppointmentDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
             raise PermissionDenied("You do not have permission to delete this resource.")
         instance.delete()
 
-class AppointmentSummaryAPIView(generics.GenericAPIView):
-    permission_classes = [IsAuthenticated]
-    serializer_class = AppointmentSerializer
+class AppointmentRangeFilterMixin:
+    """
+    Parses the `start_date`, `end_date` and `doctor_name` query parameters shared
+    by the summary and export endpoints.
+    """
 
-    def get(self, request, *args, **kwargs):
-        if request.user.role != 'admin':
-            raise PermissionDenied("You do not have permission to access this resource.")
-        
+    def get_range_params(self, request):
+        """
+        Return `(start_date, end_date, doctor_name)` from the query string.
+
+        Raises:
+            ParseError: If the start date is missing, malformed or after the end date.
+        """
         start_date_str = request.query_params.get('start_date')
         end_date_str = request.query_params.get('end_date')
         doctor_name = request.query_params.get('doctor_name', '')
 
         if not start_date_str:
-            return Response({'detail': 'Start date is required.'}, status=status.HTTP_400_BAD_REQUEST)
+            raise ParseError('Start date is required.')
 
         try:
             start_date = parse_date(start_date_str)
             end_date = parse_date(end_date_str) if end_date_str else None
         except ValueError:
-            return Response({'detail': 'Invalid date format. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+            raise ParseError('Invalid date format. Use YYYY-MM-DD.')
 
         if end_date and start_date and end_date < start_date:
-            return Response({'detail': 'Start date must be before end date.'}, status=status.HTTP_400_BAD_REQUEST)
+            raise ParseError('Start date must be before end date.')
 
-        filters = {'scheduled_at__date__gte': start_date}
-        if end_date:
-            filters['scheduled_at__date__lte'] = end_date
-        if doctor_name:
-            filters['doctor__username__icontains'] = doctor_name
+        return start_date, end_date, doctor_name
 
-        filters = {k: v for k, v in filters.items() if v is not None}
+    def get_range_queryset(self, start_date, end_date, doctor_name):
+        """
+        Return the appointments scheduled within the range for the given doctor name.
+        """
+        appointments = Appointment.objects.scheduled_between(start_date, end_date)
+        if doctor_name:
+            appointments = appointments.filter(doctor__username__icontains=doctor_name)
+        return appointments
 
-        appointments = Appointment.objects.filter(**filters)
+class AppointmentSummaryMixin(AppointmentRangeFilterMixin):
+    """
+    Builds the per-date summary shared by the synchronous and async summary views.
+    """
 
-        summary = (
-            appointments
-            .values('scheduled_at__date')
-            .annotate(count=Count('id'))
-            .order_by('scheduled_at__date')
+    def get_summary_params(self, request):
+        """
+        Return `(start_date, end_date, doctor_name, include_urls, cache_key)` for the request.
+        """
+        start_date, end_date, doctor_name = self.get_range_params(request)
+        include_urls = request.query_params.get('include_urls', 'true').lower() not in ('false', '0', 'no')
+        key = response_cache.make_key(
+            'summary', request.user.role, include_urls and request.build_absolute_uri('/'),
+            start_date, end_date, doctor_name.lower(), include_urls,
         )
-        
+        return start_date, end_date, doctor_name, include_urls, key
+
+    def build_summary(self, request, start_date, end_date, doctor_name, include_urls):
+        """
+        Return the per-date counts, and appointment URLs if requested, for the range.
+        """
+        if not doctor_name and not include_urls:
+            return self.format_rollup(self.get_rollup_queryset(start_date, end_date))
+        rows = self.get_summary_rows(start_date, end_date, doctor_name)
+        return self.summarize(rows.iterator(), appointment_url_template(request))
+
+    async def abuild_summary(self, request, start_date, end_date, doctor_name, include_urls):
+        """
+        Async version of `build_summary`.
+        """
+        if not doctor_name and not include_urls:
+            queryset = self.get_rollup_queryset(start_date, end_date)
+            return self.format_rollup([entry async for entry in queryset.aiterator()])
+        # Plain `values_list` rows cannot be streamed with `aiterator()`: their iterable
+        # runs the query before the first `next()`, outside the thread it hands off to.
+        rows = self.get_summary_rows(start_date, end_date, doctor_name)
+        return self.summarize([row async for row in rows], appointment_url_template(request))
+
+    def get_summary_rows(self, start_date, end_date, doctor_name):
+        """
+        Return the `(id, scheduled_at)` rows of the range in a single ordered scan.
+        """
+        appointments = self.get_range_queryset(start_date, end_date, doctor_name)
+        return appointments.order_by('scheduled_at', 'id').values_list('id', 'scheduled_at')
+
+    def summarize(self, rows, url_template):
+        """
+        Group `(id, scheduled_at)` rows by local date.
+        """
+        buckets = {}
+        for appointment_id, scheduled_at in rows:
+            day = timezone.localtime(scheduled_at).date()
+            buckets.setdefault(day, []).append(appointment_id)
+
         data = []
-        for entry in summary:
-            date_str = entry['scheduled_at__date'].strftime('%Y-%m-%d')
-            count = entry['count']
-            day_appointments = appointments.filter(scheduled_at__date=entry['scheduled_at__date'])
-            
-            serializer = self.get_serializer(day_appointments, many=True, context={'request': request})
-            appointment_urls = [appt['url'] for appt in serializer.data]
-            
+        for day, appointment_ids in buckets.items():
+            appointment_ids.sort()
             data.append({
-                'date': date_str,
-                'count': count,
-                'appointments_url': appointment_urls
+                'date': day.strftime('%Y-%m-%d'),
+                'count': len(appointment_ids),
+                'appointments_url': [url_template.format(pk) for pk in appointment_ids]
             })
-        
+        return data
+
+    def get_rollup_queryset(self, start_date, end_date):
+        """
+        Return the per-date counts from `AppointmentDailyCount` instead of scanning
+        appointments, so the cost grows with the number of days in the range.
+        """
+        filters = {'date__gte': start_date, 'count__gt': 0}
+        if end_date:
+            filters['date__lte'] = end_date
+        filters = {k: v for k, v in filters.items() if v is not None}
+
+        return (
+            AppointmentDailyCount.objects.filter(**filters)
+            .values('date')
+            .annotate(total=Sum('count'))
+            .order_by('date')
+        )
+
+    def format_rollup(self, summary):
+        return [{'date': entry['date'].strftime('%Y-%m-%d'), 'count': entry['total']} for entry in summary]
+
+class AppointmentSummaryAPIView(AppointmentSummaryMixin, generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = AppointmentSerializer
+
+    def get(self, request, *args, **kwargs):
+        if request.user.role != 'admin':
+            raise PermissionDenied("You do not have permission to access this resource.")
+
+        start_date, end_date, doctor_name, include_urls, key = self.get_summary_params(request)
+        by_name = bool(doctor_name)
+        start, end = start_date or date.min, end_date or date.max
+        data, snapshot = response_cache.get(key, start, end, users=by_name)
+        if data is None:
+            data = self.build_summary(request, start_date, end_date, doctor_name, include_urls)
+            response_cache.set(key, start, end, data, snapshot)
         return Response(data, status=status.HTTP_200_OK)
+
+class AppointmentCacheStatsAPIView(APIView):
+    """
+    Reports the hit ratio of the response cache in this process, with the
+    in-process token and role caches under `token_cache` and `role_cache`.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        if request.user.role != 'admin':
+            raise PermissionDenied("You do not have permission to access this resource.")
+        data = response_cache.stats()
+        data['token_cache'] = token_cache.stats()
+        data['role_cache'] = role_cache.stats()
+        return Response(data, status=status.HTTP_200_OK)
+
+class AppointmentExportAPIView(AppointmentRangeFilterMixin, APIView):
+    """
+    Streams every appointment in a date range as NDJSON or CSV.
+
+    Rows are read with a chunked `.iterator()` scan and written out as they
+    arrive, so memory stays flat regardless of how many rows are exported.
+    """
+    permission_classes = [IsAuthenticated]
+    export_fields = AppointmentReadSerializer.fields
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        if request.user.role != 'admin':
+            raise PermissionDenied("You do not have permission to access this resource.")
+
+        export_format = request.query_params.get('export_format', 'ndjson').lower()
+        if export_format not in ('ndjson', 'csv'):
+            raise ParseError('Invalid export format. Use ndjson or csv.')
+
+        start_date, end_date, doctor_name = self.get_range_params(request)
+        serializer = AppointmentReadSerializer(request)
+        rows = serializer.get_rows(
+            self.get_range_queryset(start_date, end_date, doctor_name).order_by('scheduled_at', 'id')
+        ).iterator(chunk_size=self.chunk_size)
+        records = map(serializer.to_values, rows)
+
+        if export_format == 'csv':
+            response = StreamingHttpResponse(self.stream_csv(records), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="appointments.csv"'
+        else:
+            response = StreamingHttpResponse(self.stream_ndjson(records), content_type='application/x-ndjson')
+        return response
+
+    def stream_ndjson(self, records):
+        fields = self.export_fields
+        buffer = []
+        for record in records:
+            buffer.append(json.dumps(dict(zip(fields, record))))
+            if len(buffer) >= self.chunk_size:
+                yield '\n'.join(buffer) + '\n'
+                buffer = []
+        if buffer:
+            yield '\n'.join(buffer) + '\n'
+
+    def stream_csv(self, records):
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(self.export_fields)
+        for index, record in enumerate(records, start=1):
+            writer.writerow(record)
+            if index % self.chunk_size == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        yield output.getvalue()
+
+
+class AppointmentFreeSlotsAPIView(APIView):
+    """
+    Lists the free slots of one or more doctors over a date window.
+
+    All appointments in the window are loaded into a per-doctor `ScheduleIndex`
+    with one range query, and each doctor's candidate slots are swept against it
+    in linear time.
+    """
+    permission_classes = [IsAuthenticated]
+    max_days = 62
+    max_slot_minutes = 24 * 60
+
+    def get(self, request, *args, **kwargs):
+        user_role = request.user.role
+        if user_role not in ('admin', 'doctor'):
+            raise PermissionDenied("You do not have permission to access this resource.")
+
+        start_date = parse_date(request.query_params.get('start_date') or '')
+        if start_date is None:
+            raise ParseError('A valid start date is required. Use YYYY-MM-DD.')
+        end_date_str = request.query_params.get('end_date')
+        end_date = parse_date(end_date_str) if end_date_str else start_date
+        if end_date is None or end_date < start_date:
+            raise ParseError('End date must be a valid date on or after the start date.')
+        if (end_date - start_date).days >= self.max_days:
+            raise ParseError(f'The window may span at most {self.max_days} days.')
+
+        default_start, default_end = getattr(settings, 'APPOINTMENT_WORKING_HOURS', ('09:00', '17:00'))
+        work_start = parse_time(request.query_params.get('work_start') or default_start)
+        work_end = parse_time(request.query_params.get('work_end') or default_end)
+        if work_start is None or work_end is None or work_end <= work_start:
+            raise ParseError('Working hours must be valid HH:MM times with work_start before work_end.')
+
+        try:
+            slot_minutes = int(request.query_params.get('slot_minutes') or appointment_duration().total_seconds() // 60)
+        except ValueError:
+            raise ParseError('slot_minutes must be an integer.')
+        if not 0 < slot_minutes <= self.max_slot_minutes:
+            raise ParseError(f'slot_minutes must be between 1 and {self.max_slot_minutes}.')
+        length = timezone.timedelta(minutes=slot_minutes)
+
+        doctor_ids = self.get_doctor_ids(request)
+        candidates = candidate_slots(start_date, end_date, length, work_start, work_end)
+        window_start, window_end = day_bounds(start_date, end_date)
+        schedules = ScheduleIndex.load(doctor_ids, window_start, window_end)
+        format_datetime = datetime_formatter()
+
+        data = [
+            {
+                'doctor': doctor_id,
+                'free_slots': [format_datetime(slot) for slot in schedules.get(doctor_id).free_slots(candidates, length)],
+            }
+            for doctor_id in doctor_ids
+        ]
+        return Response(data, status=status.HTTP_200_OK)
+
+    def get_doctor_ids(self, request):
+        """
+        Return the sorted doctor ids to search: the caller for doctors, otherwise
+        the `doctors` query parameter (comma-separated ids) or every doctor.
+        """
+        if request.user.role == 'doctor':
+            return [request.user.pk]
+
+        doctors = User.objects.filter(role='doctor')
+        doctors_param = request.query_params.get('doctors')
+        if doctors_param:
+            try:
+                requested = {int(value) for value in doctors_param.split(',') if value.strip()}
+            except ValueError:
+                raise ParseError('doctors must be a comma-separated list of ids.')
+            if not all(0 < pk <= MAX_USER_ID for pk in requested):
+                raise ParseError('doctors must be a comma-separated list of ids.')
+            doctors = doctors.filter(pk__in=requested)
+        return list(doctors.order_by('pk').values_list('pk', flat=True))
+
+
+class AppointmentCalendarAPIView(APIView):
+    """
+    Returns one doctor's appointments for a week or a month as a day-by-hour grid.
+
+    Doctors see their own calendar; admins pass `doctor`. The period's rows are
+    read with one range query on the `(doctor, scheduled_at)` index, selecting
+    only the grid's columns plus the patient's username through a JOIN, and are
+    bucketed in a single pass since they arrive in time order.
+    """
+    permission_classes = [IsAuthenticated]
+    views = ('week', 'month')
+
+    def get(self, request, *args, **kwargs):
+        doctor_id = self.get_doctor_id(request)
+
+        view = request.query_params.get('view') or 'week'
+        if view not in self.views:
+            raise ParseError(f'view must be one of: {", ".join(self.views)}.')
+        date_str = request.query_params.get('date')
+        try:
+            day = parse_date(date_str) if date_str else timezone.localdate()
+        except ValueError:
+            day = None
+        if day is None:
+            raise ParseError('A valid date is required. Use YYYY-MM-DD.')
+        start_date, end_date = self.get_period(view, day)
+
+        rows = (
+            Appointment.objects.filter(doctor_id=doctor_id)
+            .scheduled_between(start_date, end_date)
+            .order_by('scheduled_at', 'id')
+            .values_list('id', 'scheduled_at', 'patient_id', 'patient__username')
+        )
+        days, total = self.build_grid(rows, start_date, end_date)
+        return Response({
+            'doctor': doctor_id,
+            'view': view,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'total': total,
+            'days': days,
+        }, status=status.HTTP_200_OK)
+
+    def get_doctor_id(self, request):
+        """
+        Return the doctor whose calendar is shown: the caller for doctors, else the `doctor` parameter.
+
+        Raises:
+            PermissionDenied: If the caller is neither an admin nor a doctor.
+            ParseError: If an admin does not pass a valid `doctor` id.
+            NotFound: If `doctor` is not a doctor's id.
+        """
+        user_role = request.user.role
+        if user_role == 'doctor':
+            return request.user.pk
+        if user_role != 'admin':
+            raise PermissionDenied("You do not have permission to access this resource.")
+        try:
+            doctor_id = int(request.query_params['doctor'])
+        except (KeyError, ValueError):
+            raise ParseError('doctor must be the id of a doctor.')
+        if not 0 < doctor_id <= MAX_USER_ID:
+            raise ParseError('doctor must be the id of a doctor.')
+        if get_roles([doctor_id]).get(doctor_id) != 'doctor':
+            raise NotFound('No doctor matches the given id.')
+        return doctor_id
+
+    def get_period(self, view, day):
+        """
+        Return the first and last day of the week (Monday to Sunday) or month containing `day`.
+        """
+        if view == 'week':
+            start_date = day - timezone.timedelta(days=day.weekday())
+            return start_date, start_date + timezone.timedelta(days=6)
+        start_date = day.replace(day=1)
+        next_month = (start_date + timezone.timedelta(days=31)).replace(day=1)
+        return start_date, next_month - timezone.timedelta(days=1)
+
+    def build_grid(self, rows, start_date, end_date):
+        """
+        Bucket time-ordered `(id, scheduled_at, patient_id, patient_username)` rows by local day and hour.
+
+        Returns:
+            tuple: The list of days, each with its count and the appointments per
+            `HH:00` hour that has any, and the total number of appointments.
+        """
+        days = []
+        day = start_date
+        while day <= end_date:
+            days.append({'date': day.isoformat(), 'count': 0, 'hours': {}})
+            day += timezone.timedelta(days=1)
+
+        format_datetime = datetime_formatter()
+        total = 0
+        for pk, scheduled_at, patient_id, patient_username in rows:
+            local = timezone.localtime(scheduled_at) if settings.USE_TZ else scheduled_at
+            entry = days[(local.date() - start_date).days]
+            hour = f'{local.hour:02d}:00'
+            slot = entry['hours'].get(hour)
+            if slot is None:
+                slot = entry['hours'][hour] = []
+            slot.append({
+                'id': pk,
+                'scheduled_at': format_datetime(scheduled_at),
+                'patient': patient_id,
+                'patient_username': patient_username,
+            })
+            entry['count'] += 1
+            total += 1
+        return days, total
+
+
+class AppointmentUtilizationAPIView(AppointmentRangeFilterMixin, APIView):
+    """
+    Reports doctor x hour-of-week utilization, its percentiles and weekly trends.
+
+    Admins pass `start_date` and optionally `end_date` (default today),
+    `specialization` to keep only matching doctors, and `rolling_weeks` for the
+    weekly rolling average. The appointments are scanned with one chunked query
+    and aggregated by `UtilizationReport`, with NumPy when it is installed.
+    """
+    permission_classes = [IsAuthenticated]
+    max_rolling_weeks = 52
+    max_days = 3660
+
+    def get(self, request, *args, **kwargs):
+        if request.user.role != 'admin':
+            raise PermissionDenied("You do not have permission to access this resource.")
+
+        start_date, end_date, _ = self.get_range_params(request)
+        end_date = end_date or timezone.localdate()
+        if end_date < start_date:
+            raise ParseError('Start date must be before end date.')
+        if (end_date - start_date).days >= self.max_days:
+            raise ParseError(f'The range may span at most {self.max_days} days.')
+        try:
+            rolling_weeks = int(request.query_params.get('rolling_weeks') or 4)
+        except ValueError:
+            raise ParseError('rolling_weeks must be an integer.')
+        if not 1 <= rolling_weeks <= self.max_rolling_weeks:
+            raise ParseError(f'rolling_weeks must be between 1 and {self.max_rolling_weeks}.')
+
+        doctors = User.objects.filter(role='doctor')
+        appointments = Appointment.objects.all()
+        specialization = request.query_params.get('specialization')
+        if specialization:
+            doctors = doctors.filter(specialization__iexact=specialization)
+            appointments = appointments.filter(doctor_id__in=doctors.values('pk'))
+        doctors = list(doctors.order_by('pk').values_list('pk', 'username', 'specialization'))
+
+        report = UtilizationReport(doctors, start_date, end_date, rolling_weeks=rolling_weeks).load(appointments)
+        data = report.as_dict()
+        data['specialization'] = specialization or None
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class AsyncAppointmentView(View):
+    """
+    Base for the ASGI-native read views of appointments.
+
+    Handlers run on the event loop without holding a thread: the caller is
+    authenticated with `CachedTokenAuthentication.aauthenticate` or the async
+    session user, and every query goes through the async ORM. The request is
+    wrapped in a DRF `Request` so query parsing is shared with the synchronous
+    views, and errors are returned in the same `{'detail': ...}` shape.
+    """
+    authentication = CachedTokenAuthentication()
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request)
+        try:
+            request.user = await self.authenticate(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            response = JsonResponse({'detail': exc.detail}, status=exc.status_code)
+            if isinstance(exc, (AuthenticationFailed, NotAuthenticated)):
+                response['WWW-Authenticate'] = self.authentication.authenticate_header(request)
+            return response
+        except PermissionDenied as exc:
+            detail = str(exc) or 'You do not have permission to perform this action.'
+            return JsonResponse({'detail': detail}, status=status.HTTP_403_FORBIDDEN)
+        except ObjectDoesNotExist:
+            return JsonResponse({'detail': 'No Appointment matches the given query.'}, status=status.HTTP_404_NOT_FOUND)
+
+    async def authenticate(self, request):
+        """
+        Return the user making the request.
+
+        Raises:
+            AuthenticationFailed: If the token is invalid.
+            NotAuthenticated: If the request carries neither a token nor a session.
+        """
+        credentials = await self.authentication.aauthenticate(request)
+        if credentials is not None:
+            return credentials[0]
+        user = await request.auser()
+        if not user.is_authenticated:
+            raise NotAuthenticated()
+        return user
+
+class AsyncAppointmentListView(SparseFieldsMixin, AsyncAppointmentView):
+    """
+    Async version of `AppointmentListAPIView`; the page is fetched with `aiterator()`.
+    """
+    pagination_class = AppointmentCursorPagination
+
+    async def get(self, request, *args, **kwargs):
+        user_role = request.user.role
+
+        if user_role == 'admin':
+            appointments = Appointment.objects.all()
+        elif user_role == 'doctor':
+            appointments = Appointment.objects.filter(doctor_id=request.user.pk)
+        else:
+            return JsonResponse({'detail': 'Not authorized to view appointments'}, status=status.HTTP_403_FORBIDDEN)
+
+        fields = self.get_sparse_fields(request, AppointmentReadSerializer.fields)
+        serializer = AppointmentReadSerializer(request, fields=fields)
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(serializer.get_rows(appointments, named=True), request, view=self)
+        return JsonResponse(paginator.get_paginated_data(serializer.serialize(page)))
+
+class AsyncAppointmentDetailView(AsyncAppointmentView):
+    """
+    Async version of retrieving one appointment with `AppointmentDetailAPIView`.
+    """
+
+    async def get(self, request, pk, *args, **kwargs):
+        serializer = AppointmentReadSerializer(request)
+        row = await serializer.get_rows(Appointment.objects.all()).aget(pk=pk)
+        if request.user.role == 'doctor' and row[1] != request.user.pk:
+            raise PermissionDenied("You do not have permission to access this appointment.")
+        if request.user.role == 'patient':
+            raise PermissionDenied("You do not have permission to access appointments.")
+        return JsonResponse(serializer.to_representation(row))
+
+class AsyncAppointmentSummaryView(AppointmentSummaryMixin, AsyncAppointmentView):
+    """
+    Async version of `AppointmentSummaryAPIView`, sharing its response cache.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        if request.user.role != 'admin':
+            raise PermissionDenied("You do not have permission to access this resource.")
+
+        start_date, end_date, doctor_name, include_urls, key = self.get_summary_params(request)
+        by_name = bool(doctor_name)
+        start, end = start_date or date.min, end_date or date.max
+        data, snapshot = response_cache.get(key, start, end, users=by_name)
+        if data is None:
+            data = await self.abuild_summary(request, start_date, end_date, doctor_name, include_urls)
+            response_cache.set(key, start, end, data, snapshot)
+        return JsonResponse(data, safe=False)
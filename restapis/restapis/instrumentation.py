@@ -0,0 +1,217 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+logger = logging.getLogger('restapis.performance')
+
+
+class RequestMetrics:
+    """
+    Timings and counters collected while one request is served.
+    """
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = []
+        self.view_started = None
+        self.view_time = None
+        self.render_started = None
+        self.render_time = None
+
+    def as_dict(self, response, total_time):
+        return {
+            'method': self.method,
+            'path': self.path,
+            'status': response.status_code,
+            'total_ms': round(total_time * 1000, 2),
+            'db_ms': round(self.db_time * 1000, 2),
+            'queries': self.queries,
+            'view_ms': None if self.view_time is None else round(self.view_time * 1000, 2),
+            'render_ms': None if self.render_time is None else round(self.render_time * 1000, 2),
+            'size': None if response.streaming else len(response.content),
+        }
+
+
+_metrics = ContextVar('request_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper adding each statement's duration to the current request's metrics.
+
+    Installed on every connection by `PerformanceMiddleware`; outside an
+    instrumented request it only looks up the context variable.
+    """
+    metrics = _metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        metrics.queries += 1
+        metrics.db_time += duration
+        # Parameters are left out: they can hold credentials and personal data.
+        metrics.statements.append((sql, duration))
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class SlowRequestLog:
+    """
+    Ring buffer of the most recent slow requests and their SQL, per process.
+    """
+
+    def __init__(self, size=None):
+        """
+        Args:
+            size (int, optional): Entries kept. Defaults to `SLOW_REQUEST_BUFFER_SIZE`.
+        """
+        self.size = size
+        self.lock = threading.Lock()
+        self._entries = None
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            self._entries = deque(maxlen=self.size or getattr(settings, 'SLOW_REQUEST_BUFFER_SIZE', 100))
+        return self._entries
+
+    def add(self, entry):
+        with self.lock:
+            self.entries.append(entry)
+
+    def recent(self):
+        """
+        Return the buffered entries, newest first.
+        """
+        with self.lock:
+            return list(reversed(self.entries))
+
+    def clear(self):
+        with self.lock:
+            self._entries = None
+
+
+slow_request_log = SlowRequestLog()
+
+
+def _reset_slow_request_log(setting, **kwargs):
+    if setting == 'SLOW_REQUEST_BUFFER_SIZE':
+        slow_request_log.clear()
+
+
+setting_changed.connect(_reset_slow_request_log)
+
+
+class PerformanceMiddleware:
+    """
+    Measures every request and reports it in a `Server-Timing` header and a log line.
+
+    Records the number and total duration of database queries (through an
+    execute wrapper on every connection), the time spent in the view, the
+    time spent rendering a deferred (`TemplateResponse` or DRF `Response`)
+    response, and the response size. Each request is logged as one JSON line on
+    the `restapis.performance` logger, at WARNING for requests slower than
+    `SLOW_REQUEST_MS` and at INFO otherwise; slow requests are also kept with
+    their SQL in `slow_request_log`. When `PERFORMANCE_INSTRUMENTATION` is
+    False the middleware removes itself from the chain at startup.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFORMANCE_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_recorder, dispatch_uid='performance_query_recorder')
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        return self.finish(metrics, response)
+
+    async def __acall__(self, request):
+        metrics, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        return self.finish(metrics, response)
+
+    def start(self, request):
+        # Connections opened before this middleware was loaded missed `connection_created`.
+        for alias in connections:
+            install_query_recorder(connections[alias])
+        metrics = RequestMetrics(request.method, request.path)
+        request.performance_metrics = metrics
+        return metrics, _metrics.set(metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.performance_metrics.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        metrics = request.performance_metrics
+        metrics.render_started = time.perf_counter()
+        if metrics.view_started is not None:
+            metrics.view_time = metrics.render_started - metrics.view_started
+        response.add_post_render_callback(lambda rendered: self.finish_render(metrics))
+        return response
+
+    def finish_render(self, metrics):
+        metrics.render_time = time.perf_counter() - metrics.render_started
+
+    def finish(self, metrics, response):
+        total_time = time.perf_counter() - metrics.started
+        if metrics.view_time is None and metrics.view_started is not None:
+            metrics.view_time = time.perf_counter() - metrics.view_started
+        response['Server-Timing'] = self.server_timing(metrics, total_time)
+
+        entry = metrics.as_dict(response, total_time)
+        if total_time * 1000 >= getattr(settings, 'SLOW_REQUEST_MS', 500):
+            slow_request_log.add({
+                **entry,
+                'at': timezone.now().isoformat(),
+                'sql': [{'sql': sql, 'ms': round(duration * 1000, 2)} for sql, duration in metrics.statements],
+            })
+            logger.warning(json.dumps(entry), extra={'performance': entry})
+        elif logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(entry), extra={'performance': entry})
+        return response
+
+    def server_timing(self, metrics, total_time):
+        """
+        Return the `Server-Timing` header value for `metrics`.
+        """
+        timings = [f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"']
+        if metrics.view_time is not None:
+            timings.append(f'view;dur={metrics.view_time * 1000:.2f}')
+        if metrics.render_time is not None:
+            timings.append(f'render;dur={metrics.render_time * 1000:.2f}')
+        timings.append(f'total;dur={total_time * 1000:.2f}')
+        return ', '.join(timings)
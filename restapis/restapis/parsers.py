@@ -0,0 +1,38 @@
+import codecs
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import get_encoding
+from .renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+
+
+class FastJSONParser(parsers.JSONParser):
+    """
+    `JSONParser` decoding UTF-8 request bodies with orjson.
+
+    Other charsets, non-strict parsing (`STRICT_JSON = False` accepts NaN and
+    Infinity, which orjson rejects) and a missing orjson fall back to `JSONParser`.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = get_encoding(parser_context or {})
+        if orjson is None or not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackParser(parsers.BaseParser):
+    """
+    Parses `application/msgpack` request bodies. Requires msgpack.
+    """
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
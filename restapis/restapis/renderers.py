@@ -0,0 +1,62 @@
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    `JSONRenderer` producing the same bytes through orjson.
+
+    orjson writes the serialized data straight to UTF-8 bytes, walking dict and
+    list subclasses such as DRF's `ReturnDict` without copying them. Values it
+    has no exact equivalent for, including datetimes, whose DRF format trims
+    microseconds to milliseconds, go through DRF's `JSONEncoder`, so the output
+    matches `JSONRenderer` byte for byte. Indented output (`indent=` in
+    `Accept`, or the browsable API) and payloads orjson rejects, such as
+    integers beyond 64 bits, fall back to `JSONRenderer`, as does everything
+    when orjson is not installed.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or not self.compact or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=encoders.JSONEncoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping of U+2028 and U+2029 as `JSONRenderer`.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    Renders `application/msgpack` for internal services. Requires msgpack.
+
+    Values MessagePack has no type for, such as datetimes and decimals, are
+    converted by DRF's `JSONEncoder`, so they decode to the same values as
+    the JSON output.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encoders.JSONEncoder().default, use_bin_type=True, datetime=False)
@@ -0,0 +1,44 @@
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS, connections
+from .routers import replica_aliases
+
+
+class SQLiteReplicationShim:
+    """
+    Test and development stand-in for database replication between SQLite files.
+
+    `replicate()` copies the primary into every replica with SQLite's online
+    backup API, so a replica only sees writes made before the last call. Tests
+    call it explicitly to control replication lag; `connect()` replicates at the
+    end of every request so a local server with `DATABASE_REPLICAS` stays usable.
+    Not meant for production, where replicas come from the database server.
+    """
+
+    def __init__(self, primary=DEFAULT_DB_ALIAS, replicas=None):
+        """
+        Args:
+            primary (str): The alias to copy from.
+            replicas (list, optional): The aliases to copy to. Defaults to `DATABASE_REPLICAS`.
+        """
+        self.primary = primary
+        self.replicas = replicas
+
+    def replicate(self):
+        """
+        Copy the committed state of the primary into every replica.
+        """
+        source = connections[self.primary]
+        source.ensure_connection()
+        for alias in self.replicas if self.replicas is not None else replica_aliases():
+            target = connections[alias]
+            target.ensure_connection()
+            source.connection.backup(target.connection)
+
+    def connect(self):
+        request_finished.connect(self._replicate_after_request, dispatch_uid='sqlite_replication_shim')
+
+    def disconnect(self):
+        request_finished.disconnect(dispatch_uid='sqlite_replication_shim')
+
+    def _replicate_after_request(self, **kwargs):
+        self.replicate()
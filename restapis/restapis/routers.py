@@ -0,0 +1,159 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ROUTED_APP_LABELS = {'appointments', 'users'}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    """
+    Routing decisions for one request: whether reads are pinned to the primary,
+    which replica serves the other reads, and whether anything was written.
+    """
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.replica = None
+        self.wrote = False
+
+
+_state = ContextVar('database_routing_state', default=None)
+
+
+def replica_aliases():
+    """
+    Return the replica aliases from `DATABASE_REPLICAS`.
+    """
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+@contextmanager
+def pin_to_primary():
+    """
+    Send every read made inside the block to the primary.
+
+    Useful outside requests, for example in management commands that read
+    what they have just written.
+    """
+    token = _state.set(RoutingState(pinned=True))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads of the `appointments` and `users` apps to a replica and writes to the primary.
+
+    Replicas are the aliases listed in `DATABASE_REPLICAS`; with none configured
+    everything uses `default`. Within a request, reads stick to the primary once
+    the request has written, for the whole of an unsafe request, and while the
+    request carries the recent-write cookie set by `ReplicaStickinessMiddleware`.
+    Reads inside a transaction on the primary also stay there, so validation
+    done under `transaction.atomic()` never sees a stale replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in ROUTED_APP_LABELS:
+            return None
+        replicas = replica_aliases()
+        if not replicas or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        state = _state.get()
+        if state is None:
+            return random.choice(replicas)
+        if state.pinned or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if state.replica not in replicas:
+            # One replica per request, so its reads see a single point in time.
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive their schema from the primary.
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pins a client's reads to the primary for a while after it writes.
+
+    A request that writes gets a `REPLICA_STICKY_COOKIE` cookie valid for
+    `REPLICA_STICKY_SECONDS`. Later requests carrying an unexpired cookie read
+    from the primary, so clients see their own writes despite replication lag.
+    Works in both sync and async middleware chains.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(state, response)
+
+    def start(self, request):
+        state = RoutingState(pinned=request.method not in SAFE_METHODS or self.has_recent_write(request))
+        return state, _state.set(state)
+
+    def finish(self, state, response):
+        if state.wrote:
+            self.set_recent_write(response)
+        return response
+
+    def has_recent_write(self, request):
+        """
+        Return True if the request carries an unexpired recent-write cookie.
+        """
+        value = request.COOKIES.get(self.cookie_name)
+        try:
+            return value is not None and float(value) > time.time()
+        except ValueError:
+            return False
+
+    def set_recent_write(self, response):
+        window = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+        response.set_cookie(
+            self.cookie_name, str(time.time() + window), max_age=window, httponly=True, samesite='Lax'
+        )
+
+    @property
+    def cookie_name(self):
+        return getattr(settings, 'REPLICA_STICKY_COOKIE', 'db_primary')
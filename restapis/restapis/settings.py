@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import importlib.util
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,7 +45,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'restapis.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'restapis.routers.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -84,8 +87,44 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Local read replica, kept in sync by restapis.replication.SQLiteReplicationShim.
+    # Reads only go there once it is listed in DATABASE_REPLICAS.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+    },
+}
+DATABASE_ROUTERS = ['restapis.routers.PrimaryReplicaRouter']
+
+# Production profile for several worker processes sharing the SQLite files:
+# WAL so readers never block the writer, pragmas applied to every new
+# connection, write transactions that take the lock up front (waiting up to
+# busy_timeout), persistent connections, and retries with backoff when a write
+# still finds the database locked. Enable with SQLITE_PROFILE = 'production'.
+SQLITE_PROFILE = 'development'
+SQLITE_PRODUCTION_PROFILE = {
+    'ENGINE': 'restapis.sqlite',
+    'CONN_MAX_AGE': 600,
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': {
+        'init_command': (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            'PRAGMA busy_timeout=5000;'
+            'PRAGMA mmap_size=268435456;'
+            'PRAGMA cache_size=-65536;'
+            'PRAGMA temp_store=MEMORY'
+        ),
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': 5,
+        'lock_retries': 5,
+        'lock_backoff': 0.05,
+    },
 }
+if SQLITE_PROFILE == 'production':
+    for database in DATABASES.values():
+        database.update(SQLITE_PRODUCTION_PROFILE, OPTIONS=dict(SQLITE_PRODUCTION_PROFILE['OPTIONS']))
 
 
 # Password validation
@@ -130,7 +169,92 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',  # Optional if you use session authentication
-    ]
+    ],
+    # orjson-backed JSON; falls back to DRF's stdlib renderer and parser when orjson is missing.
+    'DEFAULT_RENDERER_CLASSES': [
+        'restapis.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'restapis.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# MessagePack (`Accept: application/msgpack`) for internal services, when msgpack is installed.
+if importlib.util.find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(1, 'restapis.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].insert(1, 'restapis.parsers.MessagePackParser')
+
+# In-process cache of token -> user snapshots used by CachedTokenAuthentication.
+TOKEN_CACHE_MAX_SIZE = 10000
+TOKEN_CACHE_TTL = 60  # seconds
+
+# In-process cache of user roles used to validate appointment writes.
+ROLE_CACHE_MAX_SIZE = 100000
+ROLE_CACHE_TTL = 300  # seconds
+
+# Bounded thread pool used by AsyncLoginView to verify password hashes.
+LOGIN_POOL_WORKERS = 4
+LOGIN_POOL_QUEUE = 16
+LOGIN_RETRY_AFTER = 1  # seconds
+
+# Every appointment lasts this long; bookings closer than this for the same doctor overlap.
+APPOINTMENT_DURATION_MINUTES = 30
+# Default working hours used by the free-slot search (local time, HH:MM).
+APPOINTMENT_WORKING_HOURS = ('09:00', '17:00')
+
+# Rows read per chunk by the utilization analytics endpoint.
+ANALYTICS_CHUNK_SIZE = 50000
+
+# Response cache used by the appointment summary and admin list endpoints. Set
+# RESPONSE_CACHE_BACKEND to 'file' to share entries between worker processes.
+RESPONSE_CACHE_BACKEND = 'locmem'
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = 300  # seconds
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    RESPONSE_CACHE_ALIAS: {
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'responses',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+        'file': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'cache' / 'responses',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }[RESPONSE_CACHE_BACKEND],
+}
+
+# Aliases that serve reads of the appointments and users apps; empty sends everything to default.
+DATABASE_REPLICAS = []
+# After writing, a client reads from the primary for this long (via the REPLICA_STICKY_COOKIE cookie).
+REPLICA_STICKY_SECONDS = 5
+REPLICA_STICKY_COOKIE = 'db_primary'
+
+# Server-Timing headers and per-request log lines from PerformanceMiddleware.
+# Requests slower than SLOW_REQUEST_MS are logged at WARNING and kept, with their
+# SQL, in a per-process buffer of SLOW_REQUEST_BUFFER_SIZE entries served at /slow-requests/.
+PERFORMANCE_INSTRUMENTATION = True
+SLOW_REQUEST_MS = 500
+SLOW_REQUEST_BUFFER_SIZE = 100
+# Runs the suite with the slow request log lines silenced, see restapis.testing.TestRunner.
+TEST_RUNNER = 'restapis.testing.TestRunner'
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Lower to INFO to log every request.
+        'restapis.performance': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
 }
@@ -0,0 +1,66 @@
+from rest_framework.exceptions import ValidationError
+
+
+class SparseFieldsMixin:
+    """
+    Adds a `?fields=` parameter limiting the fields of a read response.
+
+    `?fields=id,scheduled_at` keeps only the named fields, in the serializer's
+    own order. Views pass the fields the caller may read; any other name,
+    including write-only fields such as a user's password, is rejected with a
+    400 instead of being silently ignored. Views use the result to narrow both
+    the serializer and the columns selected from the database.
+    """
+    fields_query_param = 'fields'
+
+    def get_sparse_fields(self, request, available):
+        """
+        Return the requested fields in `available` order, or None when the parameter is absent.
+
+        Args:
+            request: The current DRF request.
+            available (iterable): Names of the fields the caller may read.
+
+        Raises:
+            ValidationError: If the parameter is empty or names a field not in `available`.
+        """
+        value = request.query_params.get(self.fields_query_param)
+        if value is None:
+            return None
+        available = list(available)
+        requested = {name.strip() for name in value.split(',') if name.strip()}
+        if not requested:
+            raise ValidationError({self.fields_query_param: ['Name at least one field.']})
+        unknown = sorted(requested.difference(available))
+        if unknown:
+            raise ValidationError({self.fields_query_param: [
+                f'Unknown fields: {", ".join(unknown)}. Available fields: {", ".join(available)}.'
+            ]})
+        return tuple(name for name in available if name in requested)
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Lets a serializer be created with `fields=` to drop every other field.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields).difference(fields):
+                self.fields.pop(name)
+
+    def readable_fields(self):
+        """
+        Return the names of the fields included in the output.
+        """
+        return [name for name, field in self.fields.items() if not field.write_only]
+
+    def source_columns(self):
+        """
+        Return the model fields read by the output fields, for `QuerySet.only()`.
+        """
+        return ['pk', *(
+            field.source for field in self.fields.values()
+            if not field.write_only and field.source != '*'
+        )]
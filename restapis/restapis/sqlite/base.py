@@ -0,0 +1,66 @@
+import random
+import time
+from django.db.backends.sqlite3 import base
+from django.db.utils import OperationalError
+
+
+class LockRetry:
+    """
+    Execute wrapper that retries statements failing with `database is locked`.
+
+    SQLite's `busy_timeout` already waits for the write lock; this adds a few
+    retries with exponential backoff and jitter for bursts that outlast it.
+    Only statements that hold no work yet are retried: anything outside a
+    transaction (each statement commits on its own) and the `BEGIN` that opens
+    one. A statement failing inside a transaction is raised as usual.
+    """
+
+    def __init__(self, connection, retries, backoff):
+        """
+        Args:
+            connection (DatabaseWrapper): The connection whose statements are wrapped.
+            retries (int): Retries after the first attempt.
+            backoff (float): Delay before the first retry, in seconds; doubled on each retry.
+        """
+        self.connection = connection
+        self.retries = retries
+        self.backoff = backoff
+
+    def __call__(self, execute, sql, params, many, context):
+        attempt = 0
+        while True:
+            try:
+                return execute(sql, params, many, context)
+            except OperationalError as exc:
+                if attempt >= self.retries or not self.is_retryable(sql, exc):
+                    raise
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(1, 2))
+                attempt += 1
+
+    def is_retryable(self, sql, exc):
+        if 'database is locked' not in str(exc):
+            return False
+        return not self.connection.in_atomic_block or sql.lstrip().upper().startswith('BEGIN')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend that retries writes blocked by another process.
+
+    Accepts two extra `OPTIONS`: `lock_retries` (default 5) and `lock_backoff`
+    in seconds (default 0.05). Everything else, including `init_command` for
+    pragmas and `transaction_mode`, behaves as in Django's SQLite backend.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.execute_wrappers.append(
+            LockRetry(self, options.get('lock_retries', 5), options.get('lock_backoff', 0.05))
+        )
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('lock_retries', None)
+        params.pop('lock_backoff', None)
+        return params
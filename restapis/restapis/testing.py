@@ -0,0 +1,146 @@
+import logging
+from contextlib import contextmanager
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+def format_queries(queries):
+    """
+    Return captured queries as numbered lines for a failure message.
+    """
+    return '\n'.join(f'{index}. {query["sql"]}' for index, query in enumerate(queries, start=1))
+
+
+class QueryBudgetMixin:
+    """
+    Query-count assertions for Django test cases.
+
+    `assertMaxQueries` fails when a block runs more queries than its budget, and
+    `assertQueriesDoNotGrow` fails when a request runs more queries after the
+    dataset has grown, which is how N+1 patterns show up. Both failure messages
+    list the SQL that ran. Caches are cleared before each measured request so
+    a cached response does not hide the queries behind it; override
+    `reset_query_caches` to clear other in-process caches.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=DEFAULT_DB_ALIAS):
+        """
+        Fail if the block runs more than `budget` queries on `using`.
+        """
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        if len(context) > budget:
+            self.fail(
+                f'{len(context)} queries executed, budget is {budget}:\n{format_queries(context.captured_queries)}'
+            )
+
+    def assertQueriesDoNotGrow(self, request, grow, budget=None, setup=None, using=DEFAULT_DB_ALIAS):
+        """
+        Run `request()` before and after `grow()` and fail unless both run the same number of queries.
+
+        Args:
+            request (callable): Sends one request. Called once per dataset size,
+                so requests that write must use fresh data on each call.
+            grow (callable): Adds data to the database.
+            budget (int, optional): Also fail if either run exceeds this many queries.
+            setup (callable, optional): Called before each run, outside the
+                measurement, to create fixtures; its result is passed to `request`.
+            using (str): The database alias to count queries on.
+
+        Returns:
+            int: The number of queries of each run.
+        """
+        small = self.capture_queries(request, setup, using)
+        grow()
+        large = self.capture_queries(request, setup, using)
+        if len(large) != len(small):
+            self.fail(
+                f'Query count changed from {len(small)} to {len(large)} as the dataset grew.\n'
+                f'Small dataset:\n{format_queries(small)}\nLarge dataset:\n{format_queries(large)}'
+            )
+        if budget is not None and len(large) > budget:
+            self.fail(f'{len(large)} queries executed, budget is {budget}:\n{format_queries(large)}')
+        return len(large)
+
+    def capture_queries(self, request, setup=None, using=DEFAULT_DB_ALIAS):
+        """
+        Return the queries run on `using` by `request()`, after `setup()` and `reset_query_caches()`.
+        """
+        args = () if setup is None else (setup(),)
+        self.reset_query_caches()
+        with CaptureQueriesContext(connections[using]) as context:
+            request(*args)
+        return context.captured_queries
+
+    def reset_query_caches(self):
+        for cache in caches.all():
+            cache.clear()
+
+
+def create_user(username, role, password=None, **extra_fields):
+    """
+    Create a test user with the email `<username>@example.com`.
+
+    Args:
+        username (str): The username.
+        role (str): 'admin' creates a superuser; otherwise the user's role.
+        password (str, optional): Defaults to `<role>pass`.
+        **extra_fields: Additional fields to set on the user.
+    """
+    manager = get_user_model().objects
+    email = f'{username}@example.com'
+    password = password or f'{role}pass'
+    if role == 'admin':
+        return manager.create_superuser(username=username, email=email, password=password, **extra_fields)
+    return manager.create_user(username=username, email=email, password=password, role=role, **extra_fields)
+
+
+class RoleUsersMixin:
+    """
+    Creates `admin_user`, `doctor_user` and `patient_user` once per test case class.
+
+    The users are created in `setUpTestData`, so every test of the class shares
+    their rows and gets its own copy of the instances. Extend `setUpTestData`
+    to add users with `create_user`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin_user = create_user('admin', 'admin')
+        cls.doctor_user = create_user('doctor', 'doctor')
+        cls.patient_user = create_user('patient', 'patient')
+
+
+class TestRunner(DiscoverRunner):
+    """
+    `DiscoverRunner` that keeps the `restapis.performance` log lines out of the
+    test output and hashes passwords with a fast hasher.
+
+    Requests that hash passwords regularly pass `SLOW_REQUEST_MS`. The logger
+    keeps its level, so `assertLogs` still sees its records, but they are not
+    written to the console while the suite runs. PBKDF2 makes each test user
+    cost tens of milliseconds, so the suite hashes with `password_hashers`.
+    """
+    quiet_loggers = ('restapis.performance',)
+    password_hashers = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.hashers = override_settings(PASSWORD_HASHERS=self.password_hashers)
+        self.hashers.enable()
+        self.saved_handlers = {}
+        for name in self.quiet_loggers:
+            logger = logging.getLogger(name)
+            self.saved_handlers[name] = logger.handlers
+            logger.handlers = [logging.NullHandler()]
+
+    def teardown_test_environment(self, **kwargs):
+        for name, handlers in self.saved_handlers.items():
+            logging.getLogger(name).handlers = handlers
+        self.hashers.disable()
+        super().teardown_test_environment(**kwargs)
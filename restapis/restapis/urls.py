@@ -16,9 +16,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path,include
+from .views import SlowRequestsAPIView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('slow-requests/', SlowRequestsAPIView.as_view(), name='slow-requests'),
     path('',include('users.urls')),
     path('',include('appointments.urls'))
 ]
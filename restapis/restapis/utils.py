@@ -0,0 +1,29 @@
+import math
+from itertools import islice
+
+
+def batches(iterable, size):
+    """
+    Yield lists of at most `size` items from `iterable` without materializing it.
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def percentile(values, fraction, default=None):
+    """
+    Return the `fraction` percentile of `values` with linear interpolation, like `numpy.percentile`.
+
+    Args:
+        values (iterable): The samples, in any order.
+        fraction (float): The percentile as a fraction, 0.99 for p99.
+        default: Returned when `values` is empty.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return default
+    position = (len(ordered) - 1) * fraction
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
@@ -0,0 +1,21 @@
+from django.core.exceptions import PermissionDenied
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .instrumentation import slow_request_log
+
+
+class SlowRequestsAPIView(APIView):
+    """
+    Lists the slow requests recorded by `PerformanceMiddleware` in this process, newest first.
+
+    Each entry has the request's timings, query count, response size and the
+    SQL it ran, without parameters.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        if request.user.role != 'admin':
+            raise PermissionDenied("You do not have permission to access this resource.")
+        return Response(slow_request_log.recent(), status=status.HTTP_200_OK)
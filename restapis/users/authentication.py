@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.db import router
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from .cache import TTLCache
+from .models import CustomUser
+
+SNAPSHOT_FIELDS = tuple(
+    field.attname for field in CustomUser._meta.concrete_fields
+    if field.attname in ('id', 'username', 'role', 'is_active')
+)
+
+token_cache = TTLCache(
+    max_size=getattr(settings, 'TOKEN_CACHE_MAX_SIZE', 10000),
+    ttl=getattr(settings, 'TOKEN_CACHE_TTL', 60),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication backed by an in-process LRU/TTL cache.
+
+    The cache maps a token key to a slim snapshot of its user (`SNAPSHOT_FIELDS`),
+    so authenticating a cached token costs no queries. The user returned is a
+    `CustomUser` with every other field deferred, which loads lazily if accessed.
+    Entries are invalidated by signals when a user is saved or deleted or a token
+    is deleted; the TTL bounds staleness for changes made by other processes.
+    """
+
+    def authenticate_credentials(self, key):
+        snapshot = token_cache.get(key)
+        if snapshot is None:
+            snapshot = snapshot_queryset(key).first()
+            cache_snapshot(key, snapshot)
+        return credentials_from_snapshot(key, snapshot)
+
+    async def aauthenticate(self, request):
+        """
+        Async version of `authenticate` for views running on the event loop.
+
+        A cached token costs no queries; otherwise the snapshot is read with the
+        async ORM, so no thread is held while the database answers.
+
+        Returns:
+            tuple: `(user, token)`, or None if the request carries no token.
+
+        Raises:
+            AuthenticationFailed: If the header is malformed or the token is invalid.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header. Token string should not contain invalid characters.')
+
+        snapshot = token_cache.get(key)
+        if snapshot is None:
+            snapshot = await snapshot_queryset(key).afirst()
+            cache_snapshot(key, snapshot)
+        return credentials_from_snapshot(key, snapshot)
+
+
+def snapshot_queryset(key):
+    """
+    Return a queryset reading the `SNAPSHOT_FIELDS` of the user owning token `key`.
+    """
+    return Token.objects.filter(key=key).values_list(*(f'user__{name}' for name in SNAPSHOT_FIELDS))
+
+
+def cache_snapshot(key, snapshot):
+    """
+    Cache the snapshot read for `key`.
+
+    Raises:
+        AuthenticationFailed: If no user owns the token.
+    """
+    if snapshot is None:
+        raise exceptions.AuthenticationFailed('Invalid token.')
+    token_cache.set(key, snapshot, group=snapshot[0])
+
+
+def credentials_from_snapshot(key, snapshot):
+    """
+    Return `(user, token)` built from a cached snapshot without touching the database.
+
+    Raises:
+        AuthenticationFailed: If the user is inactive.
+    """
+    user = CustomUser.from_db(router.db_for_read(CustomUser), SNAPSHOT_FIELDS, snapshot)
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed('User inactive or deleted.')
+    return (user, Token(key=key, user_id=user.pk))
@@ -0,0 +1,58 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.hashers import make_password
+
+# Below this many passwords handing work to other threads costs more than it
+# saves, so hashing happens in the calling thread.
+MIN_PARALLEL_PASSWORDS = 32
+
+
+def hash_password(password):
+    """
+    Hash a single password, returning an unusable password for empty input.
+    """
+    return make_password(password or None)
+
+
+class PasswordHasherPool:
+    """
+    Hashes passwords across a bounded pool of threads.
+
+    PBKDF2 in `hashlib` releases the GIL, as the login pool relies on, so
+    threads hash in parallel without starting processes from the server. Use
+    as a context manager so the threads are started once and shut down after
+    the import.
+    """
+
+    def __init__(self, workers=None):
+        """
+        Args:
+            workers (int, optional): Number of hashing threads. Defaults to the CPU count.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def hash_many(self, passwords):
+        """
+        Hash `passwords` and return the encoded hashes in the same order.
+
+        Args:
+            passwords (list): Raw passwords; empty values become unusable passwords.
+
+        Returns:
+            list: The encoded password hashes.
+        """
+        if self.workers <= 1 or len(passwords) < MIN_PARALLEL_PASSWORDS:
+            return [hash_password(password) for password in passwords]
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='hasher')
+        return list(self.executor.map(hash_password, passwords))
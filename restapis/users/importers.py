@@ -0,0 +1,176 @@
+import csv
+import io
+import json
+from django.db import transaction
+from restapis.utils import batches
+from .hashing import PasswordHasherPool
+from .models import CustomUser
+from .roles import forget_bulk_created_users
+from .serializers import UserImportSerializer
+
+
+def read_user_rows(stream, file_format):
+    """
+    Yield user rows as dicts from a CSV or JSON text stream.
+
+    Args:
+        stream: A text file object.
+        file_format (str): Either 'csv' (with a header row) or 'json' (a list of objects).
+
+    Raises:
+        ValueError: If the format is unknown or the JSON is not a list.
+    """
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+    elif file_format == 'json':
+        rows = json.load(stream)
+        if not isinstance(rows, list):
+            raise ValueError('Expected a JSON list of users.')
+        yield from rows
+    else:
+        raise ValueError(f'Unsupported format: {file_format}')
+
+
+def read_user_upload(upload):
+    """
+    Read rows from an uploaded file, picking the format from its name or content type.
+    """
+    name = (upload.name or '').lower()
+    file_format = 'csv' if name.endswith('.csv') or upload.content_type == 'text/csv' else 'json'
+    return list(read_user_rows(io.TextIOWrapper(upload.file, encoding='utf-8'), file_format))
+
+
+class UserImporter:
+    """
+    Imports users in batches with `bulk_create`.
+
+    Each batch is validated with `UserImportSerializer`, usernames are checked
+    against the database with one query per batch, passwords are hashed across a
+    `PasswordHasherPool` before the inserting transaction opens, and the
+    `CustomUser.save` role rules are applied through `CustomUser.apply_role_rules`
+    since `bulk_create` bypasses `save()`.
+    """
+
+    def __init__(self, batch_size=1000, workers=None):
+        """
+        Args:
+            batch_size (int): Number of users validated, hashed and inserted at a time.
+            workers (int, optional): Number of password hashing threads.
+        """
+        self.batch_size = batch_size
+        self.workers = workers
+
+    def import_rows(self, rows, atomic=False):
+        """
+        Import `rows` and return a summary.
+
+        Args:
+            rows (iterable): Dicts with the `UserImportSerializer` fields.
+            atomic (bool): If True, nothing is inserted unless every row is valid.
+                Otherwise invalid rows are skipped and each batch commits on its own.
+
+        Returns:
+            dict: `created` (int) and `errors` (dict mapping row index to field errors).
+        """
+        seen_usernames = set()
+        errors = {}
+
+        if atomic:
+            rows = list(rows)
+            batches = []
+            for start, batch in self.batches(rows):
+                validated = self.validate_batch(batch, start, seen_usernames, errors)
+                batches.append(validated)
+            if errors:
+                return {'created': 0, 'errors': errors}
+            with PasswordHasherPool(self.workers) as hasher:
+                batches = [self.build_users(validated, hasher) for validated in batches]
+            with transaction.atomic():
+                return {'created': sum(self.insert_users(users) for users in batches), 'errors': errors}
+
+        created = 0
+        with PasswordHasherPool(self.workers) as hasher:
+            for start, batch in self.batches(rows):
+                validated = self.validate_batch(batch, start, seen_usernames, errors)
+                users = self.build_users(validated, hasher)
+                with transaction.atomic():
+                    created += self.insert_users(users)
+        return {'created': created, 'errors': errors}
+
+    def batches(self, rows):
+        """
+        Yield `(start_index, rows)` pairs of at most `batch_size` rows.
+        """
+        start = 0
+        for batch in batches(rows, self.batch_size):
+            yield start, batch
+            start += len(batch)
+
+    def validate_batch(self, batch, start, seen_usernames, errors):
+        """
+        Validate one batch, recording errors by absolute row index.
+
+        Returns:
+            list: The validated data of the valid rows.
+        """
+        candidates = []
+        for index, row in enumerate(batch, start=start):
+            serializer = UserImportSerializer(data=row)
+            if serializer.is_valid():
+                candidates.append((index, serializer.validated_data))
+            else:
+                errors[index] = dict(serializer.errors)
+
+        usernames = [data['username'] for _, data in candidates]
+        taken = set(CustomUser.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+        validated = []
+        for index, data in candidates:
+            username = data['username']
+            if username in taken or username in seen_usernames:
+                errors[index] = {'username': ['A user with that username already exists.']}
+                continue
+            seen_usernames.add(username)
+            validated.append(data)
+        return validated
+
+    def build_users(self, validated, hasher):
+        """
+        Hash passwords for one batch of validated rows and build its unsaved users.
+
+        Hashing is the slow part of an import, so it runs before the transaction
+        that inserts the users and does not hold the database's write lock.
+
+        Returns:
+            list: `CustomUser` instances ready for `insert_users`.
+        """
+        if not validated:
+            return []
+        hashes = hasher.hash_many([data.get('password') for data in validated])
+        users = []
+        for data, password_hash in zip(validated, hashes):
+            user = CustomUser(
+                username=data['username'],
+                email=CustomUser.objects.normalize_email(data['email']),
+                first_name=data['first_name'],
+                last_name=data['last_name'],
+                role=data['role'],
+                specialization=data['specialization'] or None,
+                password=password_hash,
+            )
+            user.apply_role_rules()
+            users.append(user)
+        return users
+
+    def insert_users(self, users):
+        """
+        Insert users built by `build_users`.
+
+        Returns:
+            int: The number of users inserted.
+        """
+        if not users:
+            return 0
+        CustomUser.objects.bulk_create(users, batch_size=self.batch_size)
+        forget_bulk_created_users()
+        return len(users)
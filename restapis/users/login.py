@@ -0,0 +1,103 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import IntegrityError, transaction
+from rest_framework.authtoken.models import Token
+from .models import CustomUser
+
+LOGIN_FIELDS = ('id', 'password', 'role', 'is_active', 'auth_token__key')
+
+
+class LoginPoolSaturated(Exception):
+    """
+    Raised when the password verification pool has no free slot.
+    """
+
+
+class BoundedExecutor:
+    """
+    A thread pool that rejects work instead of queueing it without limit.
+
+    At most `max_workers` jobs run at once and at most `max_queue` more may
+    wait; beyond that `run` raises `LoginPoolSaturated` so callers can shed
+    load. PBKDF2 in `hashlib` releases the GIL, so threads hash in parallel.
+    """
+
+    def __init__(self, max_workers=4, max_queue=16):
+        """
+        Args:
+            max_workers (int): Number of verification threads.
+            max_queue (int): Number of jobs allowed to wait for a free thread.
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='login')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    async def run(self, func, *args):
+        """
+        Await `func(*args)` on the pool without blocking the event loop.
+
+        Raises:
+            LoginPoolSaturated: If every worker is busy and the queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise LoginPoolSaturated()
+        try:
+            return await sync_to_async(func, thread_sensitive=False, executor=self.executor)(*args)
+        finally:
+            self._slots.release()
+
+
+login_executor = BoundedExecutor(
+    max_workers=getattr(settings, 'LOGIN_POOL_WORKERS', 4),
+    max_queue=getattr(settings, 'LOGIN_POOL_QUEUE', 16),
+)
+
+
+def login_candidate_queryset(username):
+    """
+    Return a queryset fetching the user and their token key in one query.
+
+    The token comes from a LEFT JOIN on `auth_token`, so a returning user costs
+    a single query for the whole login.
+    """
+    return CustomUser.objects.filter(username=username).values(*LOGIN_FIELDS)
+
+
+def verify_password(password, encoded):
+    """
+    Check `password` against `encoded`, hashing a dummy value when the user
+    does not exist so that both cases take the same time.
+
+    This touches no database state and is safe to run on any thread.
+    """
+    if encoded is None:
+        make_password(password)
+        return False
+    return check_password(password, encoded)
+
+
+def create_token_key(user_id):
+    """
+    Create a token for `user_id` and return its key, tolerating a concurrent
+    login that created it first.
+    """
+    try:
+        with transaction.atomic():
+            return Token.objects.create(user_id=user_id).key
+    except IntegrityError:
+        return Token.objects.filter(user_id=user_id).values_list('key', flat=True).get()
+
+
+def token_key_for(user):
+    """
+    Return the token key of `user`, creating the token if needed.
+
+    Unlike `Token.objects.get_or_create`, only the key column is read and the
+    existing token is found with a single query.
+    """
+    key = Token.objects.filter(user_id=user.pk).values_list('key', flat=True).first()
+    return key or create_token_key(user.pk)
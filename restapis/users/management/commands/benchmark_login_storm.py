@@ -0,0 +1,82 @@
+import asyncio
+import json
+import statistics
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from restapis.utils import percentile
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    """
+    Measure how a burst of logins affects the latency of other endpoints under ASGI.
+    """
+    help = (
+        'Drive a login storm through the ASGI handler against both the synchronous '
+        '/login/ and the pooled /login/async/ endpoints while probing another endpoint, '
+        'and report the probe latency percentiles as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=64, help='Login requests per storm.')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent login requests.')
+        parser.add_argument('--probes', type=int, default=50, help='Probe requests per storm.')
+        parser.add_argument('--probe-url', default=None, help='URL probed during the storm. Defaults to the user list.')
+
+    def handle(self, *args, **options):
+        username = 'bench_login_storm'
+        CustomUser.objects.filter(username=username).delete()
+        user = CustomUser.objects.create_user(username=username, email='bench@example.com', password='bench-pass')
+        user.role = 'admin'
+        user.save()
+        token = Token.objects.create(user=user)
+        probe_url = options['probe_url'] or reverse('user-list') + '?role=doctor'
+
+        try:
+            results = {}
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                for name, login_url in (('sync', reverse('login')), ('async', reverse('login-async'))):
+                    results[name] = asyncio.run(self.storm(login_url, probe_url, username, token.key, options))
+        finally:
+            user.delete()
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    async def storm(self, login_url, probe_url, username, token_key, options):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        statuses = {}
+
+        async def login():
+            async with semaphore:
+                response = await client.post(login_url, {'username': username, 'password': 'bench-pass'})
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def probe():
+            latencies = []
+            for _ in range(options['probes']):
+                started = time.perf_counter()
+                await client.get(probe_url, headers={'authorization': f'Token {token_key}'})
+                latencies.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0)
+            return latencies
+
+        started = time.perf_counter()
+        storm = asyncio.gather(*(login() for _ in range(options['logins'])))
+        latencies = await probe()
+        await storm
+        elapsed = time.perf_counter() - started
+
+        return {
+            'login_statuses': statuses,
+            'seconds': round(elapsed, 3),
+            'probe_ms': {
+                'p50': round(statistics.median(latencies), 2),
+                'p99': round(percentile(latencies, 0.99, default=0.0), 2),
+                'max': round(max(latencies), 2),
+            },
+        }
@@ -0,0 +1,43 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from users.importers import UserImporter
+
+
+class Command(BaseCommand):
+    """
+    Measure bulk user import throughput.
+    """
+    help = 'Benchmark UserImporter with serial and parallel password hashing. Inserted rows are rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=2000, help='Number of synthetic users per run.')
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 0],
+                            help='Worker counts to compare; 0 means one per CPU.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per batch.')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        rows = [
+            {
+                'username': f'bench_user_{index}',
+                'email': f'bench_user_{index}@example.com',
+                'password': f'bench-password-{index}',
+                'role': 'patient' if index % 10 else 'doctor',
+                'specialization': 'General',
+            }
+            for index in range(count)
+        ]
+
+        for workers in options['workers']:
+            importer = UserImporter(batch_size=options['batch_size'], workers=workers or None)
+            with transaction.atomic():
+                started = time.perf_counter()
+                result = importer.import_rows(rows, atomic=True)
+                elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+            label = workers or 'cpu_count'
+            self.stdout.write(
+                f"workers={label} users={result['created']} seconds={elapsed:.2f} "
+                f"users_per_second={result['created'] / elapsed:.1f}"
+            )
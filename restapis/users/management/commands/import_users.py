@@ -0,0 +1,35 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from users.importers import UserImporter, read_user_rows
+
+
+class Command(BaseCommand):
+    """
+    Import users from a CSV or JSON file.
+    """
+    help = 'Bulk import users from a CSV (with a header row) or JSON (list of objects) file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the CSV or JSON file.')
+        parser.add_argument('--format', choices=['csv', 'json'], help='File format. Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users validated and inserted per batch.')
+        parser.add_argument('--workers', type=int, default=None, help='Password hashing threads. Defaults to the CPU count.')
+        parser.add_argument('--atomic', action='store_true', help='Insert nothing unless every row is valid.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'File not found: {path}')
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('csv', 'json'):
+            raise CommandError('Could not infer the format; pass --format csv or --format json.')
+
+        importer = UserImporter(batch_size=options['batch_size'], workers=options['workers'])
+        with path.open(encoding='utf-8', newline='') as stream:
+            result = importer.import_rows(read_user_rows(stream, file_format), atomic=options['atomic'])
+
+        for index, errors in sorted(result['errors'].items()):
+            self.stderr.write(f'Row {index}: {errors}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} users, skipped {len(result['errors'])} invalid rows."
+        ))
@@ -29,6 +29,11 @@ class CustomUser(AbstractUser):
         null=True,
         help_text='Specialization of the doctor. Null if the user is not a doctor.'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        help_text='Last time the user was saved. Used to validate cached user listings.'
+    )
 
     objects = CustomUserManager()
     
@@ -37,11 +42,19 @@ class CustomUser(AbstractUser):
         Override the save method to update the `specialization` field and
         set permissions based on the user role before saving the instance.
         """
+        self.apply_role_rules()
+        super().save(*args, **kwargs)
+
+    def apply_role_rules(self):
+        """
+        Clear the `specialization` of non-doctors and set permissions from the role.
+
+        Also used by bulk imports, where `save()` is bypassed by `bulk_create`.
+        """
         if self.role != 'doctor':
             self.specialization = None
-        
+
         self.update_permissions_by_role()
-        super().save(*args, **kwargs)
     
     def update_permissions_by_role(self):
         """
@@ -0,0 +1,49 @@
+from django.conf import settings
+from .cache import TTLCache
+from .models import CustomUser
+
+# Largest id a database can hold for a user: primary keys are signed 64-bit integers.
+MAX_USER_ID = 2 ** 63 - 1
+
+role_cache = TTLCache(
+    max_size=getattr(settings, 'ROLE_CACHE_MAX_SIZE', 100000),
+    ttl=getattr(settings, 'ROLE_CACHE_TTL', 300),
+)
+
+
+def get_roles(user_ids):
+    """
+    Return a dict mapping every existing user id in `user_ids` to its role.
+
+    Roles come from an in-process cache; the ids it misses are loaded with one
+    query. Entries are dropped by signals when a user is saved or deleted, and
+    the TTL bounds staleness for changes that skip signals (`bulk_create`,
+    `QuerySet.update`) or happen in other processes. Ids of missing users are
+    left out of the result and are not cached, as are ids outside 1..`MAX_USER_ID`,
+    which no user can have and the database could not compare.
+    """
+    roles = {}
+    missing = []
+    for pk in set(user_ids):
+        if pk is None or not 0 < pk <= MAX_USER_ID:
+            continue
+        role = role_cache.get(pk)
+        if role is None:
+            missing.append(pk)
+        else:
+            roles[pk] = role
+    if missing:
+        for pk, role in CustomUser.objects.filter(pk__in=missing).values_list('pk', 'role'):
+            role_cache.set(pk, role)
+            roles[pk] = role
+    return roles
+
+
+def forget_bulk_created_users():
+    """
+    Empty the role cache after users were inserted with `bulk_create`.
+
+    `bulk_create` sends no signals, and the new users may reuse ids freed by
+    earlier deletes whose roles are still cached, so no entry can be trusted.
+    """
+    role_cache.clear()
@@ -1,9 +1,13 @@
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from rest_framework import serializers
+from restapis.sparse import SparseFieldsSerializerMixin
 from .models import CustomUser
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for the `CustomUser` model.
+
+    Pass `fields=` to keep only some of the readable fields.
     """
     class Meta:
         model = CustomUser
@@ -36,3 +40,18 @@ class CustomUserSerializer(serializers.ModelSerializer):
             instance.set_password(password)
         instance.save()
         return instance
+
+
+class UserImportSerializer(serializers.Serializer):
+    """
+    Field-level validation for one row of a bulk user import.
+
+    Username uniqueness is checked for the whole batch at once by `UserImporter`.
+    """
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField()
+    password = serializers.CharField(required=False, allow_blank=True, write_only=True)
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    role = serializers.ChoiceField(choices=CustomUser.ROLE_CHOICES, default='doctor')
+    specialization = serializers.CharField(max_length=100, required=False, allow_blank=True, allow_null=True, default=None)
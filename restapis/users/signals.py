@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import token_cache
+from .models import CustomUser
+from .roles import role_cache
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    """
+    Drop cached token snapshots of a user that was saved or deleted.
+    """
+    token_cache.delete_group(instance.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_role(sender, instance, **kwargs):
+    """
+    Drop the cached role of a user that was saved or deleted.
+    """
+    role_cache.delete(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    """
+    Drop the cached snapshot of a deleted token.
+    """
+    token_cache.delete(instance.key)
@@ -1,30 +1,39 @@
+import csv
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.hashers import check_password
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from restapis.testing import QueryBudgetMixin, create_user
+from .authentication import CachedTokenAuthentication, token_cache
+from .cache import TTLCache
+from .login import login_executor
+from .hashing import MIN_PARALLEL_PASSWORDS, PasswordHasherPool
+from .importers import UserImporter
 
 CustomUser = get_user_model()
 
-class UserAPITests(APITestCase):
+class UserAPITests(QueryBudgetMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = create_user('admin', 'admin', first_name='AdminFirst', last_name='AdminLast')
+        cls.non_admin_user = create_user('user', 'patient', password='userpass', first_name='UserFirst', last_name='UserLast')
+
     def setUp(self):
-        self.admin_user = CustomUser.objects.create_superuser(
-            username='admin',
-            email='admin@example.com',
-            password='adminpass',
-            first_name='AdminFirst',
-            last_name='AdminLast'
-        )
         self.admin_token, _ = Token.objects.get_or_create(user=self.admin_user)
-        
-        self.non_admin_user = CustomUser.objects.create_user(
-            username='user',
-            email='user@example.com',
-            password='userpass',
-            role='patient',
-            first_name='UserFirst',
-            last_name='UserLast'
-        )
         self.non_admin_token, _ = Token.objects.get_or_create(user=self.non_admin_user)
         
         self.login_url = reverse('login')
@@ -48,6 +57,45 @@ class UserAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 2) 
 
+    def test_user_list_queries_do_not_grow(self):
+        grown = iter(range(1000))
+
+        def grow():
+            CustomUser.objects.bulk_create(
+                CustomUser(username=f'grown{index}', email=f'grown{index}@example.com', role='doctor')
+                for index in [next(grown) for _ in range(20)]
+            )
+        self.client.force_authenticate(user=self.admin_user)
+        self.assertQueriesDoNotGrow(lambda: self.client.get(self.user_list_url), grow, budget=2)
+        self.assertQueriesDoNotGrow(
+            lambda: self.client.get(self.user_detail_url(self.non_admin_user.id)), grow, budget=1
+        )
+
+    def test_user_list_skips_password_column(self):
+        self.client.force_authenticate(user=self.admin_user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.user_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('password', response.data[0])
+        self.assertNotIn('"password"', context.captured_queries[-1]['sql'])
+
+    def test_user_list_sparse_fields(self):
+        self.client.force_authenticate(user=self.admin_user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.user_list_url, {'fields': 'role,id,username', 'role': 'patient'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{'id': self.non_admin_user.id, 'username': 'user', 'role': 'patient'}])
+        sql = context.captured_queries[-1]['sql']
+        self.assertNotIn('"email"', sql)
+        self.assertNotIn('"first_name"', sql)
+
+    def test_user_list_rejects_hidden_fields(self):
+        self.client.force_authenticate(user=self.admin_user)
+        for fields in ('id,password', 'id,is_active'):
+            response = self.client.get(self.user_list_url, {'fields': fields})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(fields.split(',')[1], response.data['fields'][0])
+
     def test_user_list_non_admin(self):
         self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.non_admin_token.key)
         response = self.client.get(self.user_list_url)
@@ -163,4 +211,249 @@ class UserAPITests(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         
-        self.assertTrue(CustomUser.objects.filter(id=user_to_delete.id).exists())
\ No newline at end of file
+        self.assertTrue(CustomUser.objects.filter(id=user_to_delete.id).exists())
+
+class UserImportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = create_user('admin', 'admin')
+        cls.doctor_user = create_user('doctor', 'doctor')
+
+    def setUp(self):
+        self.user_import_url = reverse('user-import')
+        self.rows = [
+            {'username': 'imported_doctor', 'email': 'doc@EXAMPLE.com', 'password': 'docpass',
+             'role': 'doctor', 'specialization': 'Cardiology'},
+            {'username': 'imported_patient', 'email': 'pat@example.com', 'password': 'patpass',
+             'role': 'patient', 'specialization': 'Ignored'},
+            {'username': 'imported_admin', 'email': 'adm@example.com', 'role': 'admin'},
+        ]
+
+    def test_import_json_applies_role_rules(self):
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.post(self.user_import_url, self.rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'created': 3})
+
+        doctor = CustomUser.objects.get(username='imported_doctor')
+        self.assertEqual(doctor.specialization, 'Cardiology')
+        self.assertEqual(doctor.email, 'doc@example.com')
+        self.assertTrue(doctor.check_password('docpass'))
+        self.assertFalse(doctor.is_staff)
+
+        patient = CustomUser.objects.get(username='imported_patient')
+        self.assertIsNone(patient.specialization)
+
+        admin = CustomUser.objects.get(username='imported_admin')
+        self.assertTrue(admin.is_superuser)
+        self.assertTrue(admin.is_staff)
+        self.assertFalse(admin.has_usable_password())
+
+    def test_import_is_atomic_and_reports_errors(self):
+        self.client.force_authenticate(user=self.admin_user)
+        rows = self.rows + [
+            {'username': 'doctor', 'email': 'dup@example.com'},
+            {'username': 'imported_doctor', 'email': 'dup2@example.com'},
+            {'username': 'bad', 'email': 'not-an-email', 'role': 'nurse'},
+        ]
+        response = self.client.post(self.user_import_url, rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data['errors']), {3, 4, 5})
+        self.assertIn('email', response.data['errors'][5])
+        self.assertIn('role', response.data['errors'][5])
+        self.assertEqual(CustomUser.objects.count(), 2)
+
+    def test_import_forbidden(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        response = self.client.post(self.user_import_url, self.rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_command_csv(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            writer = csv.DictWriter(handle, fieldnames=['username', 'email', 'password', 'role', 'specialization'])
+            writer.writeheader()
+            writer.writerows(self.rows)
+        self.addCleanup(os.remove, handle.name)
+
+        call_command('import_users', handle.name, '--batch-size', '2', stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(CustomUser.objects.filter(username__startswith='imported_').count(), 3)
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_passwords_are_hashed_outside_the_transaction(self):
+        outer_depth = len(connection.savepoint_ids)
+        depths = []
+        hash_many = PasswordHasherPool.hash_many
+
+        def record_depth(hasher, passwords):
+            depths.append(len(connection.savepoint_ids))
+            return hash_many(hasher, passwords)
+
+        with mock.patch.object(PasswordHasherPool, 'hash_many', record_depth):
+            UserImporter(batch_size=2).import_rows(self.rows[:2], atomic=True)
+            UserImporter(batch_size=2).import_rows(
+                [dict(row, username=f"{row['username']}_2") for row in self.rows], atomic=False
+            )
+        self.assertEqual(depths, [outer_depth] * 3)
+        self.assertEqual(CustomUser.objects.filter(username__startswith='imported_').count(), 5)
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_parallel_hashing_matches_serial(self):
+        passwords = [f'password-{index}' for index in range(MIN_PARALLEL_PASSWORDS)]
+        with PasswordHasherPool(workers=2) as hasher:
+            hashes = hasher.hash_many(passwords)
+        self.assertEqual(len(hashes), len(passwords))
+        for password, encoded in zip(passwords, hashes):
+            self.assertTrue(check_password(password, encoded))
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = create_user('admin', 'admin')
+
+    def setUp(self):
+        token_cache.clear()
+        self.admin_token, _ = Token.objects.get_or_create(user=self.admin_user)
+        self.authentication = CachedTokenAuthentication()
+
+    def test_cache_hit_costs_no_queries(self):
+        with self.assertNumQueries(1):
+            user, _ = self.authentication.authenticate_credentials(self.admin_token.key)
+        with self.assertNumQueries(0):
+            user, _ = self.authentication.authenticate_credentials(self.admin_token.key)
+            self.assertEqual(user, self.admin_user)
+            self.assertEqual(user.role, 'admin')
+            self.assertEqual(user.username, 'admin')
+        self.assertEqual(token_cache.stats()['hits'], 1)
+        self.assertEqual(token_cache.stats()['misses'], 1)
+
+    def test_user_save_invalidates(self):
+        self.authentication.authenticate_credentials(self.admin_token.key)
+        self.admin_user.is_active = False
+        self.admin_user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.admin_token.key)
+
+    def test_token_delete_invalidates(self):
+        key = self.admin_token.key
+        self.authentication.authenticate_credentials(key)
+        self.admin_token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(key)
+
+    def test_token_request_uses_cache(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.admin_token.key)
+        self.client.get(reverse('user-list'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('user-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('authtoken_token' in query['sql'] for query in queries.captured_queries))
+
+
+class TTLCacheTests(TestCase):
+    def test_lru_eviction(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+
+    def test_expiry_and_groups(self):
+        cache = TTLCache(max_size=10, ttl=60)
+        cache.set('a', 1, group=7)
+        cache.set('b', 2, group=7)
+        cache.delete_group(7)
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+
+        cache.set('c', 3)
+        with mock.patch('users.cache.time.monotonic', return_value=time.monotonic() + 120):
+            self.assertIsNone(cache.get('c'))
+
+
+class AsyncLoginTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor_user = create_user('doctor', 'doctor')
+        cls.patient_user = create_user('patient', 'patient')
+
+    def setUp(self):
+        self.login_async_url = reverse('login-async')
+
+    def test_login_creates_then_reuses_token(self):
+        response = self.client.post(self.login_async_url, {'username': 'doctor', 'password': 'doctorpass'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = Token.objects.get(user=self.doctor_user)
+        self.assertEqual(response.json(), {'token': token.key})
+
+        with self.assertNumQueries(1):
+            response = self.client.post(self.login_async_url, {'username': 'doctor', 'password': 'doctorpass'})
+        self.assertEqual(response.json(), {'token': token.key})
+
+    def test_login_failure(self):
+        response = self.client.post(self.login_async_url, {'username': 'doctor', 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'non_field_errors': ['Invalid credentials']})
+
+        response = self.client.post(self.login_async_url, {'username': 'nobody', 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.login_async_url, {'username': 'doctor'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), ['Password not given'])
+
+    def test_login_patient_forbidden(self):
+        response = self.client.post(self.login_async_url, {'username': 'patient', 'password': 'patientpass'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_login_saturated_pool(self):
+        with mock.patch.object(login_executor, '_slots', threading.BoundedSemaphore(1)) as slots:
+            slots.acquire()
+            response = self.client.post(self.login_async_url, {'username': 'doctor', 'password': 'doctorpass'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response)
+
+    def test_sync_login_token_lookup_is_single_query(self):
+        token = Token.objects.create(user=self.doctor_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('login'), {'username': 'doctor', 'password': 'doctorpass'})
+        self.assertEqual(response.data, {'token': token.key})
+        token_queries = [query for query in queries.captured_queries if 'authtoken_token' in query['sql']]
+        self.assertEqual(len(token_queries), 1)
+
+
+class UserConditionalGetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = create_user('admin', 'admin')
+
+    def setUp(self):
+        self.user_list_url = reverse('user-list')
+        self.client.force_authenticate(user=self.admin_user)
+
+    def test_user_list_not_modified(self):
+        response = self.client.get(self.user_list_url)
+        etag = response['ETag']
+
+        response = self.client.get(self.user_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(self.user_list_url, {'role': 'doctor'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.admin_user.first_name = 'Changed'
+        self.admin_user.save()
+        response = self.client.get(self.user_list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_user_list_ignores_if_modified_since_after_delete(self):
+        newer = CustomUser.objects.create_user(username='newer', email='newer@example.com', password='newerpass')
+        response = self.client.get(self.user_list_url)
+        self.assertEqual(len(response.data), 2)
+        self.assertNotIn('Last-Modified', response)
+        newer.delete()
+        response = self.client.get(self.user_list_url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
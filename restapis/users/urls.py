@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import LoginAPIView, UserListAPIView, UserDetailAPIView, UserCreateAPIView
+from .views import LoginAPIView, AsyncLoginView, UserListAPIView, UserDetailAPIView, UserCreateAPIView, UserImportAPIView
 
 urlpatterns = [
     path('login/', LoginAPIView.as_view(), name='login'),
+    path('login/async/', AsyncLoginView.as_view(), name='login-async'),
     path('users/', UserListAPIView.as_view(), name='user-list'),
     path('users/<int:pk>/', UserDetailAPIView.as_view(), name='user-detail'),
     path('users/create/', UserCreateAPIView.as_view(), name='user-create'),
+    path('users/import/', UserImportAPIView.as_view(), name='user-import'),
 ]
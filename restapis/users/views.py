@@ -1,14 +1,26 @@
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import authenticate
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status, generics
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from django.core.exceptions import PermissionDenied
 from rest_framework.exceptions import APIException
+from restapis.conditional import ConditionalGetMixin
+from restapis.parsers import FastJSONParser
+from restapis.sparse import SparseFieldsMixin
 from .models import CustomUser
 from .serializers import CustomUserSerializer
-from rest_framework.authtoken.models import Token
+from .importers import UserImporter, read_user_upload
+from .login import LoginPoolSaturated, create_token_key, login_candidate_queryset, login_executor, token_key_for, verify_password
 
 class LoginAPIView(APIView):
     """
@@ -32,8 +44,7 @@ class LoginAPIView(APIView):
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            token, created = Token.objects.get_or_create(user=user)
-            return Response({'token': token.key}, status=status.HTTP_200_OK)
+            return Response({'token': token_key_for(user)}, status=status.HTTP_200_OK)
         else:
             return Response(
                 {'non_field_errors': ['Invalid credentials']},
@@ -41,9 +52,64 @@ class LoginAPIView(APIView):
             )
 
 
-class UserListAPIView(generics.ListCreateAPIView):
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLoginView(View):
+    """
+    Handles user login under ASGI without blocking the event loop.
+
+    The user and their token key are fetched in one query, and the password hash
+    is verified on the bounded `login_executor`. When that pool is saturated the
+    request is rejected with 503 and `Retry-After` instead of queueing, so a burst
+    of logins cannot starve other endpoints. Responses match `LoginAPIView`.
+    """
+
+    async def post(self, request, *args, **kwargs):
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or b'{}')
+            except ValueError:
+                return JsonResponse({'detail': 'JSON parse error.'}, status=status.HTTP_400_BAD_REQUEST)
+            if not isinstance(data, dict):
+                data = {}
+        else:
+            data = request.POST
+
+        username = data.get('username')
+        password = data.get('password')
+
+        if not username:
+            return JsonResponse(['Username not given'], safe=False, status=status.HTTP_400_BAD_REQUEST)
+        if not password:
+            return JsonResponse(['Password not given'], safe=False, status=status.HTTP_400_BAD_REQUEST)
+
+        candidate = await login_candidate_queryset(username).afirst()
+
+        try:
+            verified = await login_executor.run(verify_password, password, candidate and candidate['password'])
+        except LoginPoolSaturated:
+            response = JsonResponse(
+                {'detail': 'Too many login attempts in progress. Try again shortly.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+            response['Retry-After'] = str(getattr(settings, 'LOGIN_RETRY_AFTER', 1))
+            return response
+
+        if not verified or not candidate['is_active']:
+            return JsonResponse({'non_field_errors': ['Invalid credentials']}, status=status.HTTP_400_BAD_REQUEST)
+
+        if candidate['role'] == 'patient':
+            return JsonResponse({'non_field_errors': ['Patients cannot log in.']}, status=status.HTTP_403_FORBIDDEN)
+
+        token_key = candidate['auth_token__key'] or await sync_to_async(create_token_key)(candidate['id'])
+        return JsonResponse({'token': token_key}, status=status.HTTP_200_OK)
+
+
+class UserListAPIView(SparseFieldsMixin, ConditionalGetMixin, generics.ListCreateAPIView):
     """
     Lists and creates users (doctors and patients).
+
+    Listing selects only the columns of the returned fields, so the password
+    hash is never read; `?fields=` narrows them further.
     """
     serializer_class = CustomUserSerializer
     permission_classes = [IsAuthenticated]
@@ -62,6 +128,18 @@ class UserListAPIView(generics.ListCreateAPIView):
         
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        fields = self.get_sparse_fields(request, self.get_serializer().readable_fields())
+        serializer = self.get_serializer(fields=fields)
+        users = list(
+            self.filter_queryset(queryset).only(*serializer.source_columns(), self.conditional_field)
+        )
+        not_modified = self.not_modified_response(request, users)
+        if not_modified is not None:
+            return not_modified
+        return Response(self.get_serializer(users, many=True, fields=fields).data)
+
     def perform_create(self, serializer):
         if self.request.user.role != 'admin':
             raise PermissionDenied("You do not have permission to create this resource.")
@@ -124,4 +202,36 @@ class UserCreateAPIView(generics.CreateAPIView):
     def perform_create(self, serializer):
         if self.request.user.role != 'admin':
             raise PermissionDenied("You do not have permission to create this resource.")
-        serializer.save()
\ No newline at end of file
+        serializer.save()
+
+
+class UserImportAPIView(APIView):
+    """
+    Bulk import users from a JSON list or an uploaded CSV/JSON file.
+
+    The import is atomic: if any row is invalid nothing is created and the
+    errors are returned per row index.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [FastJSONParser, MultiPartParser]
+    max_rows = 50000
+
+    def post(self, request, *args, **kwargs):
+        if request.user.role != 'admin':
+            raise PermissionDenied("You do not have permission to create this resource.")
+
+        upload = request.FILES.get('file')
+        try:
+            rows = read_user_upload(upload) if upload is not None else request.data
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValidationError(f'Could not read the uploaded file: {e}')
+
+        if not isinstance(rows, list) or not rows:
+            raise ValidationError('Expected a non-empty list of users.')
+        if len(rows) > self.max_rows:
+            raise ValidationError(f'An import may contain at most {self.max_rows} users.')
+
+        result = UserImporter().import_rows(rows, atomic=True)
+        if result['errors']:
+            return Response({'errors': result['errors']}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'created': result['created']}, status=status.HTTP_201_CREATED)